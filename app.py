@@ -1,14 +1,14 @@
 # (moved health check route below after app initialization)
 import mysql.connector
 from mysql.connector import Error
-from flask import Flask, render_template, request, redirect, url_for, g, flash, session, jsonify
-from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin  
+from flask import Flask, render_template, request, redirect, url_for, g, flash, session, jsonify, Response, stream_with_context, send_file
+from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf import CSRFProtect
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import bleach
 import datetime
+import itertools
 import os
 import sqlite3
 import re
@@ -24,7 +24,26 @@ warnings.filterwarnings("ignore", category=UserWarning, module="flask_limiter")
 app = Flask(__name__)
 
 # Import the configuration from config.py
-from config import SECRET_KEY, FLASK_DEBUG, REQUESTS_PER_PAGE
+from config import SECRET_KEY, FLASK_DEBUG, REQUESTS_PER_PAGE, STUDENTS_PER_PAGE
+# Shared process-wide MySQL connection pool
+from app.database import get_pool, pool_stats
+from app.limiter_storage import RATELIMIT_CONFIG
+from app.migrations import ensure_schema
+from app.stats import fetch_stats as fetch_request_stats, record_submission
+from app.changes import record as record_change
+from app.pagination import fetch_page, cached_total
+from app.search import REQUEST_FT_COLUMNS, USER_FT_COLUMNS, match_condition, search_department_requests
+from app.reports import (EXPORT_MAX_ROWS, EXPORT_BATCH_SIZE, APPROVAL_LETTER_COLUMNS, approval_letter_key, iter_rows,
+                         status_report_query, status_report_filename, stream_status_report,
+                         render_approval_letter)
+from app.pdf_cache import get_pdf_cache
+from app.approvals import (MAX_BULK_IDS, UPDATED as DECISION_UPDATED,
+                           decide as decide_requests, parse_ids as parse_request_ids)
+from app.workflow import actionable_status, transition_for
+from app.auth import lockout
+from app.models import AuthUser, cache_user, invalidate_user, load_user as load_cached_user
+from app.auth.passwords import HashingBusy, hash_password, needs_rehash, rehash_in_background, verify_password
+from app.jobs import JobLimitError, artifact_file, enqueue as enqueue_report, get_job as get_report_job
 
 # Load secret config from environment for security
 secret_from_env = (
@@ -60,49 +79,50 @@ app.config['PERMANENT_SESSION_LIFETIME'] = 8 * 60 * 60
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
-class AuthUser(UserMixin):
-    def __init__(self, user_row):
-        # user_row should be a tuple from SELECT * FROM users
-        self.id = user_row[0]
-        self.username = user_row[1]
-        self.name = user_row[2]
-        self.role = user_row[3]
-        self.register_number = user_row[5]
-        self.email = user_row[6]
-        self.department = user_row[7]
-        self.year = user_row[8]
-        self.dob = user_row[9]
-        self.student_type = user_row[10] if len(user_row) > 10 else 'Day Scholar'
-
 @login_manager.user_loader
 def load_user(user_id):
-    try:
-        db = get_db()
-        if db is None:
-            return None
-        cur = db.cursor()
-        cur.execute("SELECT * FROM users WHERE id=%s", (user_id,))
-        row = cur.fetchone()
-        cur.close()
-        if row:
-            return AuthUser(row)
-        return None
-    except Exception:
-        return None
+    # Served from the per-process identity cache; see app/models.py
+    return load_cached_user(user_id)
 
-# Initialize rate limiter with in-memory storage explicitly
+# Initialize rate limiter; counters are shared by all workers (app/limiter_storage.py)
 from flask_limiter.util import get_remote_address
 limiter = Limiter(
     get_remote_address,
     app=app,
-    storage_uri="memory://",
+    storage_uri=RATELIMIT_CONFIG['storage_uri'],
     storage_options={},
-    strategy="fixed-window"
+    strategy=RATELIMIT_CONFIG['strategy']
 )
 
 # Enable CSRF protection for all forms
 csrf = CSRFProtect(app)
 
+# Management commands (flask db upgrade, ...)
+from app.cli import register_cli
+register_cli(app)
+
+# Fingerprinted static assets and the asset_url() template helper
+from app import assets, static_files
+assets.init_app(app)
+# /static/ is served ahead of the request hooks (precompressed, cached)
+static_files.init_app(app)
+# /service-worker.js: offline app shell and cached status pages
+from app import offline
+offline.init_app(app)
+# Web Push: the VAPID public key browsers subscribe with
+from app import push
+push.init_app(app)
+# /events/queue: live staff queues (see also `flask sse serve`)
+from app import sse
+sse.init_app(app)
+# /api/v1: JSON dashboards, queues and users
+from app.api import bp as api_bp
+app.register_blueprint(api_bp)
+
+# Persistent template bytecode cache; every template is loaded at startup
+from app import templating
+templating.init_app(app)
+
 # --- Logging ---
 logging.basicConfig(
     level=logging.DEBUG if app.debug else logging.INFO,
@@ -124,167 +144,19 @@ def healthz():
         logger.exception("Health check failed")
         return jsonify({"status": "error"}), 500
 
-# Initialize database tables
+@app.route('/healthz/pool')
+def healthz_pool():
+    return jsonify(pool_stats())
+
+# Initialize database tables via the versioned migrations in app/migrations
 def init_db():
     db = get_db()
     if db is None:
         return
-        
-    cur = db.cursor()
     try:
-        # Create tables if they don't exist
-        create_tables_if_not_exist(cur, db)
-        
-        # Check and add missing columns
-        add_missing_columns(cur, db)
-        
-        db.commit()
-        # Database structure updated successfully
+        ensure_schema(db)
     except Exception as e:
         logger.exception("Database update error")
-        db.rollback()
-    finally:
-        cur.close()
-
-def create_tables_if_not_exist(cur, db):
-    """Create tables if they don't exist"""
-    try:
-        # Create users table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(100) UNIQUE NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                role ENUM('Student', 'Mentor', 'Advisor', 'HOD') DEFAULT 'Student',
-                password VARCHAR(255),
-                register_number VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                year VARCHAR(10) DEFAULT '1',
-                dob DATE NOT NULL,
-                student_type ENUM('Day Scholar', 'Hosteller') DEFAULT 'Day Scholar',
-                mentor_email VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create requests table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS requests (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                type VARCHAR(50) NOT NULL,
-                reason TEXT NOT NULL,
-                from_date DATE NOT NULL,
-                to_date DATE NOT NULL,
-                status ENUM('Pending', 'Mentor Approved', 'Mentor Rejected', 'Advisor Approved', 'Advisor Rejected', 'Approved', 'Rejected') DEFAULT 'Pending',
-                student_name VARCHAR(100) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                request_type ENUM('Leave', 'Permission', 'Apology', 'Bonafide', 'OD') DEFAULT 'Leave',
-                advisor_note TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create permissions table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS permissions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                student_name VARCHAR(100) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                custom_subject VARCHAR(200) NOT NULL,
-                reason TEXT NOT NULL,
-                from_date DATE NOT NULL,
-                to_date DATE NOT NULL,
-                status ENUM('Pending', 'Approved', 'Rejected') DEFAULT 'Pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-
-        # Create auth_lockouts table for DB-backed lockouts
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS auth_lockouts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                register_number VARCHAR(50) UNIQUE NOT NULL,
-                failed_attempts INT NOT NULL DEFAULT 0,
-                lockout_until DATETIME NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Create push_subscriptions table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS push_subscriptions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                endpoint TEXT NOT NULL,
-                p256dh VARCHAR(255),
-                auth VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                UNIQUE KEY uniq_user_endpoint (user_id, endpoint(255)),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Database tables created/verified successfully
-        
-    except Exception as e:
-        logger.exception("Error creating tables")
-        raise
-
-def add_missing_columns(cur, db):
-    """Add missing columns to existing tables"""
-    try:
-        # Check if student_type column exists in users table
-        cur.execute("SHOW COLUMNS FROM users LIKE 'student_type'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE users 
-                ADD COLUMN student_type ENUM('Day Scholar', 'Hosteller') DEFAULT 'Day Scholar'
-            """)
-            # Added student_type column to users table
-        
-        # Check if mentor_email column exists in users table
-        cur.execute("SHOW COLUMNS FROM users LIKE 'mentor_email'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE users 
-                ADD COLUMN mentor_email VARCHAR(100)
-            """)
-            # Added mentor_email column to users table
-        
-        # Check if request_type column exists in requests table
-        cur.execute("SHOW COLUMNS FROM requests LIKE 'request_type'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE requests 
-                ADD COLUMN request_type ENUM('Leave', 'Permission', 'Apology', 'Bonafide', 'OD') DEFAULT 'Leave'
-            """)
-            # Added request_type column to requests table
-        
-        # Check if advisor_note column exists in requests table
-        cur.execute("SHOW COLUMNS FROM requests LIKE 'advisor_note'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE requests 
-                ADD COLUMN advisor_note TEXT
-            """)
-            # Added advisor_note column to requests table
-            
-    except Exception as e:
-        # Error adding missing columns
-        raise
-
-# Lockout policy
-MAX_FAILED_ATTEMPTS = 5
-LOCKOUT_TIME = 15 * 60  # 15 minutes
 
 # HTTPS enforcement in production
 @app.before_request
@@ -353,7 +225,7 @@ def save_subscription():
         existing = cur.fetchone()
         if existing:
             cur.execute(
-                "UPDATE push_subscriptions SET p256dh=%s, auth=%s WHERE id=%s",
+                "UPDATE push_subscriptions SET p256dh=%s, auth=%s, failures=0, retry_at=NULL WHERE id=%s",
                 (p256dh, auth_key, existing[0])
             )
         else:
@@ -377,13 +249,6 @@ def save_subscription():
 def root():
     return render_template('welcome.html')
 
-DB_CONFIG = {
-    'host': os.environ.get('MEF_DB_HOST', 'localhost'),
-    'user': os.environ.get('MEF_DB_USER', 'ram'),
-    'password': os.environ.get('MEF_DB_PASSWORD', 'ram123'),
-    'database': os.environ.get('MEF_DB_NAME', 'mefportal'),
-    'autocommit': False
-}
 DB_ALTERNATIVES = [
     {'host': 'localhost', 'user': 'root', 'password': '', 'database': 'mefportal', 'autocommit': False},
     {'host': 'localhost', 'user': 'root', 'password': 'root', 'database': 'mefportal', 'autocommit': False}
@@ -391,12 +256,11 @@ DB_ALTERNATIVES = [
 USING_SQLITE = False
 
 def get_db():
-    global USING_SQLITE
     db = getattr(g, '_database', None)
     if db is None:
         try:
-            # Attempt MySQL connection (without debug messages)
-            db = g._database = mysql.connector.connect(**DB_CONFIG)
+            # Check out a pooled MySQL connection for this request
+            db = g._database = get_pool().acquire()
             return db
         except Error as e:
             # Don't fall back to SQLite - force MySQL usage
@@ -405,9 +269,10 @@ def get_db():
 
 @app.teardown_appcontext
 def close_connection(exception):
-    db = getattr(g, '_database', None)
+    # Hand the connection back to the pool instead of closing it
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        get_pool().release(db)
 
 # ---------- LOGIN ----------
 @limiter.limit("5 per minute")
@@ -427,33 +292,31 @@ def login():
         flash("Database connection error", "danger")
         return render_template('login.html')
         
-    cur = db.cursor()
-    # Check DB-backed lockout
-    try:
-        cur.execute("SELECT failed_attempts, lockout_until FROM auth_lockouts WHERE register_number=%s", (register_number,))
-        row = cur.fetchone()
-        if row:
-            attempts, lockout_until = row[0], row[1]
-            if attempts >= MAX_FAILED_ATTEMPTS and lockout_until is not None:
-                # If still locked
-                cur.execute("SELECT NOW() < %s", (lockout_until,))
-                still_locked = cur.fetchone()[0]
-                if still_locked:
-                    flash("Account locked due to too many failed attempts. Try again later.", "danger")
-                    cur.close()
-                    return render_template('login.html')
-    except Exception:
-        pass
+    lockout.start_sweeper()
+
+    # Recent identical failures and locked accounts are answered from memory
+    cached = lockout.recent_failure(register_number, password)
+    if cached == lockout.LOCKED:
+        flash("Account locked due to too many failed attempts. Try again later.", "danger")
+        return render_template('login.html')
+    if cached == lockout.INVALID:
+        flash("Invalid credentials", "danger")
+        return render_template('login.html')
 
+    cur = db.cursor()
     try:
-        cur.execute("SELECT * FROM users WHERE register_number=%s", (register_number,))
-        user = cur.fetchone()
+        user, locked_for, has_lockout = lockout.fetch_login(cur, register_number)
     except Exception as e:
         logger.exception("Database error during login")
         flash("Database error. Please try again.", "danger")
+        return render_template('login.html')
+    finally:
         cur.close()
+
+    if locked_for:
+        lockout.remember_lock(register_number, locked_for)
+        flash("Account locked due to too many failed attempts. Try again later.", "danger")
         return render_template('login.html')
-    cur.close()
 
     if user:
         stored_password = user[4] if len(user) > 4 else None
@@ -463,66 +326,48 @@ def login():
             if stored_password and isinstance(stored_password, str) and (
                 stored_password.startswith('pbkdf2:') or stored_password.startswith('scrypt:')
             ):
-                is_valid_password = check_password_hash(stored_password, password)
+                is_valid_password = verify_password(stored_password, password)
+                if is_valid_password and needs_rehash(stored_password):
+                    rehash_in_background(user[0], stored_password, password)
             else:
                 # Plaintext fallback allowed only in debug/dev
                 if ALLOW_PLAINTEXT_LOGIN and stored_password is not None and stored_password == password:
                     is_valid_password = True
-                    try:
-                        new_hash = generate_password_hash(password)
-                        cur = db.cursor()
-                        cur.execute("UPDATE users SET password=%s, updated_at=NOW() WHERE id=%s", (new_hash, user[0]))
-                        db.commit()
-                        cur.close()
-                    except Exception:
-                        pass
+                    rehash_in_background(user[0], stored_password, password)
                 else:
                     is_valid_password = False
+        except HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "warning")
+            return render_template('login.html'), 503
         except Exception:
             is_valid_password = False
 
         if not stored_password or not is_valid_password:
-            # Update failed attempts
             try:
                 cur = db.cursor()
-                cur.execute("SELECT failed_attempts FROM auth_lockouts WHERE register_number=%s", (register_number,))
-                row = cur.fetchone()
-                if row:
-                    attempts = row[0] + 1
-                    if attempts >= MAX_FAILED_ATTEMPTS:
-                        cur.execute(
-                            "UPDATE auth_lockouts SET failed_attempts=%s, lockout_until=DATE_ADD(NOW(), INTERVAL %s SECOND) WHERE register_number=%s",
-                            (attempts, LOCKOUT_TIME, register_number)
-                        )
-                    else:
-                        cur.execute(
-                            "UPDATE auth_lockouts SET failed_attempts=%s WHERE register_number=%s",
-                            (attempts, register_number)
-                        )
-                else:
-                    cur.execute(
-                        "INSERT INTO auth_lockouts (register_number, failed_attempts, lockout_until) VALUES (%s,%s,NULL)",
-                        (register_number, 1)
-                    )
+                lockout.record_failure(cur, register_number)
                 db.commit()
                 cur.close()
             except Exception:
                 pass
+            lockout.remember_failure(register_number, password)
             flash("Invalid credentials", "danger")
             return render_template('login.html')
 
         # Successful login: reset lockouts
-        try:
-            cur = db.cursor()
-            cur.execute("DELETE FROM auth_lockouts WHERE register_number=%s", (register_number,))
-            db.commit()
-            cur.close()
-        except Exception:
-            pass
+        if has_lockout:
+            try:
+                cur = db.cursor()
+                lockout.clear(cur, register_number)
+                db.commit()
+                cur.close()
+            except Exception:
+                pass
 
         # Login the user
         auth_user = AuthUser(user)
         login_user(auth_user)
+        cache_user(auth_user)
 
         # Maintain existing session keys for downstream code
         session['id'] = user[0]
@@ -545,6 +390,7 @@ def login():
             return redirect(url_for('dashboard'))
 
     else:
+        lockout.remember_failure(register_number, password, user_exists=False)
         flash("Invalid credentials", "danger")
         return render_template('login.html')
 
@@ -568,16 +414,10 @@ def register():
     try:
         # Fetch all mentors with normalized department names for dropdown
         cur.execute("""
-            SELECT name, email, 
-                   UPPER(TRIM(
-                       REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                           department,
-                           'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                           'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                   )) as normalized_department
-            FROM users 
-            WHERE role='Mentor' 
-            ORDER BY normalized_department, name ASC
+            SELECT name, email, UPPER(department_key) as normalized_department
+            FROM users
+            WHERE role='Mentor'
+            ORDER BY department_key, name ASC
         """)
         mentors_data = cur.fetchall()
         mentors = [{'name': m[0], 'email': m[1], 'department': m[2]} for m in mentors_data]
@@ -654,7 +494,7 @@ def register():
         # Add mentor_email to DB if you have a column, else skip for now
         try:
             # Hash password before storing
-            hashed_pw = generate_password_hash(password)
+            hashed_pw = hash_password(password)
             logger.debug(f"Attempting to register user: {name}, role: {role}")
             
             # Force student_type to match enum values exactly
@@ -694,21 +534,22 @@ def register():
             
             if mentor_email:
                 query = """
-                    INSERT INTO users (username, name, register_number, password, email, role, department, year, dob, student_type, mentor_email)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                    INSERT INTO users (username, name, register_number, password, email, role, department, department_key, year, dob, student_type, mentor_email)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                 """
-                params = [register_number, name, register_number, hashed_pw, email, role, dept, year, formatted_dob, student_type, mentor_email]
+                params = [register_number, name, register_number, hashed_pw, email, role, dept, normalize_department_name(dept), year, formatted_dob, student_type, mentor_email]
             else:
                 query = """
-                    INSERT INTO users (username, name, register_number, password, email, role, department, year, dob, student_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                    INSERT INTO users (username, name, register_number, password, email, role, department, department_key, year, dob, student_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                 """
-                params = [register_number, name, register_number, hashed_pw, email, role, dept, year, formatted_dob, student_type]
+                params = [register_number, name, register_number, hashed_pw, email, role, dept, normalize_department_name(dept), year, formatted_dob, student_type]
                 
             logger.debug("Running user insert query")
             
             cur.execute(query, params)
             db.commit()
+            lockout.forget(register_number)
             
             logger.info(f"New user registered: {name} ({role}) dept={dept}")
             cur.close()
@@ -780,58 +621,47 @@ def dashboard():
             flash("Invalid date format", "danger")
             selected_date = None
 
+    # Both lists come back from one UNION ALL round trip; each branch is an
+    # index range read on (user_id, created_at) / (user_id, last_activity_at)
+    list_columns = """id, user_id, type, reason, from_date, to_date, status,
+                   COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
+                   student_name, department, last_activity_at, created_at"""
     try:
-        # Get requests based on filter
+        # Counters are maintained on write in request_stats (single PK lookup)
+        counters = fetch_request_stats(cur, user_id)
+
         if selected_date:
-            # Filter by specific date
-            cur.execute("""
-                SELECT id, user_id, type, reason, from_date, to_date, status,
-                       COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
-                       student_name, department
-                FROM requests 
-                WHERE user_id=%s AND DATE(created_at) = %s
-                ORDER BY created_at DESC
-            """, (user_id, selected_date))
+            # Filter by specific date (half-open range keeps it sargable)
+            day_start = datetime.datetime.combine(selected_date, datetime.time.min)
+            # No LIMIT, so MySQL drops an ORDER BY here; sorted after the fetch
+            requests_branch = f"""
+                (SELECT 'request' AS kind, {list_columns} FROM requests
+                 WHERE user_id=%s AND created_at >= %s AND created_at < %s)
+            """
+            params = [user_id, day_start, day_start + datetime.timedelta(days=1)]
         else:
-            # Show all requests if no date filter
-            cur.execute("""
-                SELECT id, user_id, type, reason, from_date, to_date, status,
-                       COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
-                       student_name, department
-                FROM requests 
-                WHERE user_id=%s
-                ORDER BY created_at DESC
-                LIMIT 5
-            """, (user_id,))
-        
-        requests_data = cur.fetchall()
-        
-        # Calculate statistics for all user requests
-        cur.execute("SELECT COUNT(*) FROM requests WHERE user_id=%s", (user_id,))
-        total_requests = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(*) FROM requests WHERE user_id=%s AND status='Pending'", (user_id,))
-        pending_requests = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(*) FROM requests WHERE user_id=%s AND status='Approved'", (user_id,))
-        approved_requests = cur.fetchone()[0] or 0
-
-        cur.execute("SELECT COUNT(*) FROM requests WHERE user_id=%s AND status='Rejected'", (user_id,))
-        rejected_requests = cur.fetchone()[0] or 0
-
-        # Get recent updates (all recent requests - submitted, approved, rejected)
-        cur.execute("""
-            SELECT id, type, status, 
-                   COALESCE(updated_at, created_at) as activity_time, 
-                   student_name FROM requests 
-            WHERE user_id=%s 
-            ORDER BY COALESCE(updated_at, created_at) DESC LIMIT 4
-        """, (user_id,))
-        recent_updates = cur.fetchall()
-        
-        # If no requests exist, create some sample data for testing
-        if total_requests == 0:
-            pass
+            requests_branch = f"""
+                (SELECT 'request' AS kind, {list_columns} FROM requests
+                 WHERE user_id=%s
+                 ORDER BY created_at DESC LIMIT 5)
+            """
+            params = [user_id]
+
+        # Recent updates (submitted, approved, rejected) by last activity
+        cur.execute(f"""
+            {requests_branch}
+            UNION ALL
+            (SELECT 'activity' AS kind, {list_columns} FROM requests
+             WHERE user_id=%s
+             ORDER BY last_activity_at DESC LIMIT 4)
+        """, params + [user_id])
+        rows = cur.fetchall()
+
+        request_rows = [row for row in rows if row[0] == 'request']
+        if selected_date:
+            request_rows.sort(key=lambda row: (row[12], row[1]), reverse=True)
+        requests_data = [row[1:11] for row in request_rows]
+        recent_updates = [(row[1], row[3], row[7], row[11], row[9]) for row in rows if row[0] == 'activity']
 
         cur.close()
     except Exception as e:
@@ -845,10 +675,10 @@ def dashboard():
                                recent_updates=[])
 
     stats = {
-        'total_requests': total_requests,
-        'pending_requests': pending_requests,
-        'approved_requests': approved_requests,
-        'rejected_requests': rejected_requests
+        'total_requests': counters['total'],
+        'pending_requests': counters['pending'],
+        'approved_requests': counters['approved'],
+        'rejected_requests': counters['rejected']
     }
 
     return render_template('dashboard_professional.html', 
@@ -873,6 +703,7 @@ def unified_request():
             return render_template('unified_request_form.html')
 
         student_name = bleach.clean((request.form.get('student_name') or '').strip(), strip=True)[:100]
+        # Already normalized, so it is stored as both department and department_key
         department = normalize_department_name(request.form.get('department'))
         if not student_name or not department:
             flash('Student name and department are required', 'danger')
@@ -901,9 +732,9 @@ def unified_request():
                     return render_template('unified_request_form.html')
                 
                 cur.execute("""
-                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, request_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                """, (session['id'], req_type, reason, from_date, to_date, 'Pending', student_name, department, 'Leave'))
+                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, department_key, request_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (session['id'], req_type, reason, from_date, to_date, 'Pending', student_name, department, department, 'Leave'))
                 
             elif request_type == 'apology':
                 # Handle apology request
@@ -914,9 +745,9 @@ def unified_request():
                     return render_template('unified_request_form.html')
                 
                 cur.execute("""
-                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, request_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                """, (session['id'], 'Apology', apology_reason, apology_date, apology_date, 'Pending', student_name, department, 'Apology'))
+                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, department_key, request_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (session['id'], 'Apology', apology_reason, apology_date, apology_date, 'Pending', student_name, department, department, 'Apology'))
                 
             elif request_type == 'bonafide':
                 # Handle bonafide request
@@ -928,9 +759,9 @@ def unified_request():
                 reason = f"Bonafide Certificate - Purpose: {purpose}. Details: {details}"
                 
                 cur.execute("""
-                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, request_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                """, (session['id'], 'Bonafide', reason, datetime.date.today(), datetime.date.today(), 'Pending', student_name, department, 'Bonafide'))
+                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, department_key, request_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (session['id'], 'Bonafide', reason, datetime.date.today(), datetime.date.today(), 'Pending', student_name, department, department, 'Bonafide'))
                 
             elif request_type == 'permission':
                 # Handle permission request
@@ -947,9 +778,9 @@ def unified_request():
                     return render_template('unified_request_form.html')
                 
                 cur.execute("""
-                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, request_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                """, (session['id'], 'Permission', reason, from_date, to_date, 'Pending', student_name, department, 'Permission'))
+                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, department_key, request_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (session['id'], 'Permission', reason, from_date, to_date, 'Pending', student_name, department, department, 'Permission'))
                 
             elif request_type == 'od':
                 # Handle on duty request
@@ -968,10 +799,14 @@ def unified_request():
                 reason = f"On Duty - Event: {event}, Organization: {organization}. Details: {od_reason}"
                 
                 cur.execute("""
-                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, request_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                """, (session['id'], 'On Duty', reason, from_date, to_date, 'Pending', student_name, department, 'OD'))
-            
+                    INSERT INTO requests (user_id, type, reason, from_date, to_date, status, student_name, department, department_key, request_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (session['id'], 'On Duty', reason, from_date, to_date, 'Pending', student_name, department, department, 'OD'))
+
+            request_id = cur.lastrowid
+            # Keep the dashboard counters and the change feed in the same transaction as the insert
+            record_submission(cur, session['id'])
+            record_change(cur, [request_id])
             db.commit()
             cur.close()
             flash(f"{request_type.title()} request submitted successfully!", "success")
@@ -1044,10 +879,10 @@ def status():
     db = get_db()
     cur = db.cursor()
     
-    # Get pagination parameters
-    page = request.args.get('page', 1, type=int)
+    # Keyset pagination: ?after= / ?before= carry an opaque (created_at, id) cursor
     per_page = REQUESTS_PER_PAGE
-    offset = (page - 1) * per_page
+    after = request.args.get('after')
+    before = request.args.get('before')
     
     # Get filter parameters
     date_filter = request.args.get('date', '')
@@ -1058,10 +893,15 @@ def status():
     where_conditions = ["user_id = %s"]
     params = [session['id']]
     
-    # Add date filter
+    # Add date filter (half-open range so the index stays usable)
     if date_filter:
-        where_conditions.append("DATE(created_at) = %s")
-        params.append(date_filter)
+        try:
+            day_start = datetime.datetime.strptime(date_filter, "%Y-%m-%d")
+            where_conditions.append("created_at >= %s AND created_at < %s")
+            params.extend([day_start, day_start + datetime.timedelta(days=1)])
+        except ValueError:
+            flash("Invalid date format", "danger")
+            date_filter = ''
     
     # Add status filter
     if status_filter:
@@ -1070,36 +910,36 @@ def status():
     
     # Add search filter
     if search_query:
-        where_conditions.append("(type LIKE %s OR reason LIKE %s)")
-        search_param = f"%{search_query}%"
-        params.extend([search_param, search_param])
-    
-    where_clause = " AND ".join(where_conditions)
+        search_sql, search_params = match_condition(REQUEST_FT_COLUMNS, search_query)
+        where_conditions.append(search_sql)
+        params.extend(search_params)
     
     try:
-        # Get total count for pagination
-        count_query = f"SELECT COUNT(*) FROM requests WHERE {where_clause}"
-        cur.execute(count_query, params)
-        total_requests = cur.fetchone()[0]
-        
-        # Calculate pagination info
-        total_pages = (total_requests + per_page - 1) // per_page
-        has_prev = page > 1
-        has_next = page < total_pages
+        # Unfiltered totals come from the maintained counters; filtered ones
+        # are counted at most once a minute per filter combination
+        if not (date_filter or status_filter or search_query):
+            total_requests = fetch_request_stats(cur, session['id'])['total']
+        else:
+            total_requests = cached_total(
+                cur,
+                f"SELECT COUNT(*) FROM requests WHERE {' AND '.join(where_conditions)}",
+                params,
+                ('status', session['id'], date_filter, status_filter, search_query)
+            )
         
-        # Get requests with pagination
-        main_query = f"""
+        requests_list, page_info = fetch_page(
+            cur,
+            """
             SELECT id, user_id, type, reason, from_date, to_date, status,
                    COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
                    student_name, department, created_at
-            FROM requests 
-            WHERE {where_clause}
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([per_page, offset])
-        cur.execute(main_query, params)
-        requests_list = cur.fetchall()
+            FROM requests
+            """,
+            where_conditions, params,
+            order_columns=['created_at', 'id'],
+            key=lambda row: (row[10], row[0]),
+            per_page=per_page, after=after, before=before
+        )
         cur.close()
     except Exception as e:
         # Database error in status
@@ -1107,22 +947,12 @@ def status():
         flash("Error loading status data", "danger")
         return render_template('status.html', 
                                requests=[], 
-                               pagination={'page': 1, 'per_page': per_page, 'total': 0, 'total_pages': 0, 'has_prev': False, 'has_next': False, 'prev_num': None, 'next_num': None},
+                               pagination={'per_page': per_page, 'total': 0, 'has_prev': False, 'has_next': False, 'prev_cursor': None, 'next_cursor': None},
                                date_filter=date_filter,
                                status_filter=status_filter,
                                search_query=search_query)
     
-    # Pagination info
-    pagination = {
-        'page': page,
-        'per_page': per_page,
-        'total': total_requests,
-        'total_pages': total_pages,
-        'has_prev': has_prev,
-        'has_next': has_next,
-        'prev_num': page - 1 if has_prev else None,
-        'next_num': page + 1 if has_next else None
-    }
+    pagination = dict(page_info, total=total_requests)
     
     return render_template('status.html', 
                            requests=requests_list, 
@@ -1149,159 +979,50 @@ def download_status():
             flash("Database connection error", "danger")
             return redirect(url_for('status'))
             
-        cur = db.cursor()
-        
-        # Build WHERE clause (same as status route)
-        where_conditions = ["user_id = %s"]
-        params = [session['id']]
-        
-        # Add date filter
-        if date_filter:
-            where_conditions.append("DATE(created_at) = %s")
-            params.append(date_filter)
-        
-        # Add status filter
-        if status_filter:
-            where_conditions.append("status = %s")
-            params.append(status_filter)
+        # Unbuffered: rows are read from the server while the PDF is written
+        cur = db.cursor(buffered=False)
         
-        # Add search filter
-        if search_query:
-            where_conditions.append("(type LIKE %s OR reason LIKE %s)")
-            search_param = f"%{search_query}%"
-            params.extend([search_param, search_param])
-        
-        where_clause = " AND ".join(where_conditions)
-        
-        # Get all filtered requests
-        query = f"""
-            SELECT id, user_id, type, reason, from_date, to_date, status,
-                   COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
-                   student_name, department, created_at
-            FROM requests 
-            WHERE {where_clause}
-            ORDER BY created_at DESC
-        """
+        # Same filters as the status page
+        query, params = status_report_query(session['id'], date_filter, status_filter, search_query)
         cur.execute(query, params)
-        requests_list = cur.fetchall()
-        cur.close()
+        first_batch = cur.fetchmany(EXPORT_BATCH_SIZE)
         
-        if not requests_list:
+        if not first_batch:
+            cur.close()
             flash("No requests found to download", "info")
             return redirect(url_for('status'))
         
-        # Generate PDF using FPDF
-        try:
-            from fpdf import FPDF
-            
-            # Create PDF instance
-            pdf = FPDF()
-            
-            for request_data in requests_list:
-                pdf.add_page()
-                
-                # Set font
-                pdf.set_font("Arial", size=12)
-                
-                # Add header
-                pdf.set_font("Arial", 'B', 16)
-                pdf.cell(200, 10, txt="REQUEST STATUS REPORT", ln=1, align='C')
-                pdf.ln(5)
-                
-                # Add application details
-                pdf.set_font("Arial", 'B', 12)
-                pdf.cell(200, 10, txt="REQUEST DETAILS", ln=1, align='L')
-                pdf.ln(5)
-                
-                pdf.set_font("Arial", size=12)
-                details = [
-                    ("Application ID", f"LEV-2025-{request_data[0]}"),
-                    ("Student Name", request_data[8] or session.get('name', 'N/A')),
-                    ("Department", request_data[9] or session.get('department', 'N/A')),
-                    ("Request Type", request_data[2]),
-                    ("Duration", f"{request_data[4]} to {request_data[5]}"),
-                    ("Status", request_data[6]),
-                    ("Reason", request_data[3]),
-                    ("Submitted Date", str(request_data[10]) if len(request_data) > 10 else "N/A"),
-                    ("Last Updated", request_data[7] if len(request_data) > 7 else "N/A")
-                ]
-                
-                for label, value in details:
-                    pdf.set_font("Arial", 'B', 12)
-                    pdf.cell(50, 8, txt=f"{label}:", ln=0)
-                    pdf.set_font("Arial", size=12)
-                    pdf.cell(0, 8, txt=str(value), ln=1)
-                
-                pdf.ln(10)
-                
-                # Add separator for multiple requests
-                if requests_list.index(request_data) < len(requests_list) - 1:
-                    pdf.set_draw_color(200, 200, 200)
-                    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-                    pdf.ln(10)
-            
-            # Add summary page
-            pdf.add_page()
-            pdf.set_font("Arial", 'B', 16)
-            pdf.cell(200, 10, txt="REQUEST SUMMARY", ln=1, align='C')
-            pdf.ln(10)
-            
-            pdf.set_font("Arial", size=12)
-            summary_stats = [
-                ("Total Requests", len(requests_list)),
-                ("Approved Requests", len([r for r in requests_list if r[6] == 'Approved'])),
-                ("Pending Requests", len([r for r in requests_list if r[6] == 'Pending'])),
-                ("Rejected Requests", len([r for r in requests_list if r[6] == 'Rejected'])),
-                ("Mentor Approved", len([r for r in requests_list if r[6] == 'Mentor Approved'])),
-                ("Advisor Approved", len([r for r in requests_list if r[6] == 'Advisor Approved']))
-            ]
-            
-            for label, value in summary_stats:
-                pdf.set_font("Arial", 'B', 12)
-                pdf.cell(60, 8, txt=f"{label}:", ln=0)
-                pdf.set_font("Arial", size=12)
-                pdf.cell(0, 8, txt=str(value), ln=1)
-            
-            pdf.ln(10)
-            
-            # Add footer
-            pdf.set_font("Arial", 'I', 10)
-            pdf.cell(0, 10, txt=f"Generated by MEF Portal - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=1, align='C')
-            
-            # Generate PDF content
-            pdf_output = pdf.output(dest='S').encode('latin1')
-            
-            # Create response with PDF
-            from flask import Response
-            response = Response(pdf_output)
-            response.headers['Content-Type'] = 'application/pdf'
-            
-            # Create filename with filters
-            filename_parts = ["requests_report"]
-            if date_filter:
-                filename_parts.append(f"date_{date_filter}")
-            if status_filter:
-                filename_parts.append(f"status_{status_filter.lower()}")
-            if search_query:
-                filename_parts.append(f"search_{search_query[:10]}")
-            
-            filename = f"{'_'.join(filename_parts)}.pdf"
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
-            
-        except ImportError:
-            flash("PDF generation library not available", "danger")
-            return redirect(url_for('status'))
-        except Exception as e:
-            logger.exception("PDF generation error")
-            flash("Error generating PDF report", "danger")
-            return redirect(url_for('status'))
+        student_name = session.get('name', 'N/A')
+        department = session.get('department', 'N/A')
+        
+        def generate():
+            try:
+                yield from stream_status_report(
+                    itertools.chain(first_batch, iter_rows(cur, EXPORT_BATCH_SIZE)),
+                    EXPORT_MAX_ROWS, student_name, department
+                )
+            except Exception:
+                # Headers are already sent; the client gets a truncated file
+                logger.exception("PDF generation error")
+            finally:
+                try:
+                    cur.close()
+                except Exception:
+                    # Unread rows are drained when the connection returns to the pool
+                    pass
+        
+        filename = status_report_filename(date_filter, status_filter, search_query)
+        response = Response(stream_with_context(generate()), mimetype='application/pdf')
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
             
     except Exception as e:
         logger.exception("Database error in download status")
         if 'cur' in locals():
-            cur.close()
+            try:
+                cur.close()
+            except Exception:
+                pass
         flash("Error loading requests data", "danger")
         return redirect(url_for('status'))
 
@@ -1359,7 +1080,10 @@ def download_single_approved(req_id):
             return redirect(url_for('dashboard'))
             
         cur = db.cursor()
-        cur.execute("SELECT * FROM requests WHERE id=%s AND user_id=%s AND status='Approved'", (req_id, session['id']))
+        cur.execute(f"""
+            SELECT {APPROVAL_LETTER_COLUMNS} FROM requests
+            WHERE id=%s AND user_id=%s AND status='Approved'
+        """, (req_id, session['id']))
         request_data = cur.fetchone()
         cur.close()
     except Exception as e:
@@ -1373,79 +1097,187 @@ def download_single_approved(req_id):
         flash("Approved request not found", "danger")
         return redirect(url_for('dashboard'))
     
-    # Generate PDF using FPDF
+    student_name = session.get('name', 'N/A')
+    department = session.get('department', 'N/A')
+
+    # Keyed on id, updated_at and every value the letter prints (with the
+    # session fallbacks) plus the layout version, so any edit re-renders it
+    key = approval_letter_key(request_data, student_name, department)
+    download_name = f"approved_leave_{request_data[0]}.pdf"
+
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+    else:
+        pdf_cache = get_pdf_cache()
+        cached = pdf_cache.open(key)
+        if cached is not None:
+            response = send_file(cached, mimetype='application/pdf', as_attachment=True,
+                                 download_name=download_name, etag=False)
+        else:
+            try:
+                pdf_output = render_approval_letter(request_data, student_name, department)
+            except ImportError:
+                flash("PDF generation library not available", "danger")
+                return redirect(url_for('status'))
+            except Exception as e:
+                logger.exception("PDF generation error")
+                flash("Error generating PDF", "danger")
+                return redirect(url_for('status'))
+
+            try:
+                pdf_cache.put(key, pdf_output)
+            except OSError:
+                logger.exception("Could not cache approval letter %s", request_data[0])
+
+            response = Response(pdf_output, mimetype='application/pdf')
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+
+    response.set_etag(key)
+    # Per-student content: browsers may keep it but must revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# ---------- APPROVAL DECISIONS ----------
+def _limit_key():
+    """Rate-limit signed-in staff per account; a department often shares one IP"""
+    return f"user:{session['id']}" if 'id' in session else get_remote_address()
+
+def _decision_cost():
+    # Each request decided counts once, whether it came alone or in a batch
+    if 'request_ids' in request.form:
+        return max(1, min(len(parse_request_ids(request.form.getlist('request_ids'))), MAX_BULK_IDS))
+    return 1
+
+# Decisions per staff member per hour, shared by the single and bulk endpoints
+decision_limit = limiter.shared_limit("300 per hour", scope="decisions", key_func=_limit_key, cost=_decision_cost)
+# Bulk submissions per staff member, on top of the per-decision budget
+bulk_limit = limiter.limit("60 per hour", key_func=_limit_key)
+
+def _wants_json():
+    return request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'application/json'
+
+def _listed_on_dashboard(role, status):
+    """Whether the role's dashboard lists a request in ``status``"""
+    if role == 'HOD':
+        # hod() shows the whole department except approved requests
+        return status != 'Approved'
+    return status == actionable_status(role)
+
+def _decision_reply(role, action, results, dashboard_endpoint):
+    """Outcome of a single or bulk decision.
+
+    Pages that submit with fetch get the per-request outcomes and drop or
+    mark just those cards (``remove`` says whether a reload would still
+    list the request); the redirect back to the dashboard is the no-JS
+    fallback.
+    """
+    updated = sum(1 for r in results if r['outcome'] == DECISION_UPDATED)
+    new_status = transition_for(role, action)[1]
+    if len(results) == 1:
+        request_id = results[0]['id']
+        if updated:
+            message, category = f"Request #{request_id} {new_status}", "success"
+        else:
+            message, category = f"Request #{request_id} was already processed or is not in your department", "warning"
+    elif updated == len(results):
+        message, category = f"{updated} request(s) {new_status}", "success"
+    else:
+        message, category = (f"{updated} of {len(results)} request(s) {new_status}; "
+                             f"the rest were already decided or are not in your department"), "warning"
+
+    if _wants_json():
+        results = [dict(r, remove=r['outcome'] == DECISION_UPDATED and not _listed_on_dashboard(role, r['status']))
+                   for r in results]
+        return jsonify({'action': action, 'updated': updated, 'results': results,
+                        'message': message, 'category': category})
+    flash(message, category)
+    return redirect(url_for(dashboard_endpoint))
+
+def _decision_error(message, category, status, dashboard_endpoint):
+    if _wants_json():
+        return jsonify({'error': message}), status
+    flash(message, category)
+    return redirect(url_for(dashboard_endpoint))
+
+def _single_decision(role, dashboard_endpoint):
+    if 'username' not in session or session.get('role') != role:
+        if _wants_json():
+            return jsonify({'error': 'Access denied'}), 403
+        return redirect(url_for('login'))
+
+    request_ids = parse_request_ids([request.form.get('request_id', '')])[:1]
+    action = 'Approve' if request.form.get('action') == 'Approve' else 'Reject'
+    if not request_ids:
+        return _decision_error("Choose a request", "warning", 400, dashboard_endpoint)
+
+    db = get_db()
+    if db is None:
+        return _decision_error("Database connection error", "danger", 503, dashboard_endpoint)
+
     try:
-        from fpdf import FPDF
-        
-        # Create PDF instance
-        pdf = FPDF()
-        pdf.add_page()
-        
-        # Set font
-        pdf.set_font("Arial", size=12)
-        
-        # Add header
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(200, 10, txt="LEAVE APPLICATION - APPROVED", ln=1, align='C')
-        pdf.ln(10)
-        
-        # Add application details
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(200, 10, txt="APPLICATION DETAILS", ln=1, align='L')
-        pdf.ln(5)
-        
-        pdf.set_font("Arial", size=12)
-        details = [
-            ("Application ID", f"LEV-2025-{request_data[0]}"),
-            ("Student Name", request_data[8] or session.get('name', 'N/A')),
-            ("Department", request_data[9] or session.get('department', 'N/A')),
-            ("Leave Type", request_data[2]),
-            ("Duration", f"{request_data[4]} to {request_data[5]}"),
-            ("Status", request_data[6]),
-            ("Reason", request_data[3]),
-            ("Submitted Date", str(request_data[10]) if len(request_data) > 10 else "N/A")
-        ]
-        
-        for label, value in details:
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(50, 8, txt=f"{label}:", ln=0)
-            pdf.set_font("Arial", size=12)
-            pdf.cell(0, 8, txt=str(value), ln=1)
-        
-        pdf.ln(10)
-        
-        # Add approval section
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(200, 10, txt="APPROVAL INFORMATION", ln=1, align='L')
-        pdf.ln(5)
-        
-        pdf.set_font("Arial", size=12)
-        pdf.multi_cell(0, 8, txt=f"This application has been officially approved by the Head of Department. The request was processed and approved on {request_data[7] if len(request_data) > 7 else 'N/A'}.")
-        
-        pdf.ln(10)
-        
-        # Add footer
-        pdf.set_font("Arial", 'I', 10)
-        pdf.cell(0, 10, txt="Generated by MEF Portal - Selvam College of Technology", ln=1, align='C')
-        
-        # Generate PDF content
-        pdf_output = pdf.output(dest='S').encode('latin1')
-        
-        # Create response with PDF
-        from flask import Response
-        response = Response(pdf_output)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename="approved_leave_{request_data[0]}.pdf"'
-        
-        return response
-        
-    except ImportError:
-        flash("PDF generation library not available", "danger")
-        return redirect(url_for('status'))
-    except Exception as e:
-        logger.exception("PDF generation error")
-        flash("Error generating PDF", "danger")
-        return redirect(url_for('status'))
+        results = decide_requests(
+            db, role, normalize_department_name(session.get('department')), request_ids, action,
+            advisor_note=request.form.get('advisor_note', '').strip()
+        )
+    except Exception:
+        logger.exception("Database error in %s action", role)
+        return _decision_error("Error updating request status", "danger", 500, dashboard_endpoint)
+
+    return _decision_reply(role, action, results, dashboard_endpoint)
+
+def _bulk_decision(role, dashboard_endpoint):
+    if 'username' not in session or session.get('role') != role:
+        if _wants_json():
+            return jsonify({'error': 'Access denied'}), 403
+        return redirect(url_for('login'))
+
+    request_ids = parse_request_ids(request.form.getlist('request_ids'))
+    action = request.form.get('action')
+    error = None
+    if action not in ('Approve', 'Reject'):
+        error = "Choose Approve or Reject"
+    elif not request_ids:
+        error = "Select at least one request"
+    elif len(request_ids) > MAX_BULK_IDS:
+        error = f"Select at most {MAX_BULK_IDS} requests at a time"
+    if error:
+        return _decision_error(error, "warning", 400, dashboard_endpoint)
+
+    db = get_db()
+    if db is None:
+        return _decision_error("Database connection error", "danger", 503, dashboard_endpoint)
+
+    try:
+        results = decide_requests(
+            db, role, normalize_department_name(session.get('department')), request_ids, action,
+            advisor_note=request.form.get('advisor_note', '').strip()
+        )
+    except Exception:
+        logger.exception("Database error in bulk %s action", role)
+        return _decision_error("Error updating request status", "danger", 500, dashboard_endpoint)
+
+    return _decision_reply(role, action, results, dashboard_endpoint)
+
+@app.route('/mentor_action/bulk', methods=['POST'])
+@login_required
+@bulk_limit
+@decision_limit
+def mentor_bulk_action():
+    return _bulk_decision('Mentor', 'mentor')
+
+@app.route('/advisor_action/bulk', methods=['POST'])
+@login_required
+@bulk_limit
+@decision_limit
+def advisor_bulk_action():
+    return _bulk_decision('Advisor', 'advisor')
+
+@app.route('/hod_action/bulk', methods=['POST'])
+@login_required
+@bulk_limit
+@decision_limit
+def hod_bulk_action():
+    return _bulk_decision('HOD', 'hod')
 
 # ---------- MENTOR ----------
 @app.route('/mentor')
@@ -1461,48 +1293,17 @@ def mentor():
         
     cur = db.cursor()
     
-    # Debug: print all mentor session values
-    logger.debug(f"Mentor session: {dict(session)}")
-    
-    # Debug: print all pending requests and compare departments
-    try:
-        cur.execute("SELECT id, student_name, department, status FROM requests WHERE status='Pending'")
-        pending_reqs = cur.fetchall()
-        mentor_dept = normalize_department_name(session.get('department'))
-    except Exception as e:
-        logger.exception("Database error in mentor debug queries")
-        cur.close()
-        flash("Error loading mentor dashboard", "danger")
-        return render_template('mentor.html', requests=[])
-    logger.debug('All Pending requests:')
-    for req in pending_reqs:
-        db_dept = str(req[2]).strip().lower()
-        db_dept_norm = re.sub(r'^(iv[\s-]*|IV[\s-]*|v[\s-]*|V[\s-]*)', '', db_dept)
-        logger.debug(f"  Request ID: {req[0]}, Dept: '{req[2]}' (db), Normalized: '{db_dept_norm}' vs '{mentor_dept}' (mentor session)")
-    logger.debug(f"Mentor session department: {mentor_dept}")
-    
-    # Debug: Print the actual query parameters for mentor
+    mentor_dept = normalize_department_name(session.get('department'))
     logger.debug(f"Mentor query department parameter: '{mentor_dept}'")
     
     try:
-        # Case-insensitive, trimmed department match
-        # Normalize department in SQL: remove 'iv-' and 'v-' prefix, lower, trim
-        # Normalize department in SQL: remove iv/v/IV/V with dash or space
+        # Sargable match on the normalized department key stored at write time
         cur.execute("""
             SELECT id, user_id, type, reason, from_date, to_date, status,
                    COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
                    student_name, department, created_at
             FROM requests
-            WHERE 
-                (
-                    LOWER(TRIM(
-                        REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                            department,
-                            'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                            'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                    ))
-                ) = %s
-                AND status='Pending'
+            WHERE department_key = %s AND status='Pending'
             ORDER BY created_at DESC
         """, (mentor_dept,))
         requests_data = cur.fetchall()
@@ -1519,33 +1320,9 @@ def mentor():
 
 @app.route('/mentor_action', methods=['POST'])
 @login_required
-@limiter.limit("30 per hour")
+@decision_limit
 def mentor_action():
-    if 'username' not in session or session.get('role') != 'Mentor':
-        return redirect(url_for('login'))
-
-    req_id = request.form['request_id']
-    action = request.form['action']
-    status_value = 'Mentor Approved' if action == 'Approve' else 'Mentor Rejected'
-
-    try:
-        db = get_db()
-        if db is None:
-            flash("Database connection error", "danger")
-            return redirect(url_for('mentor'))
-            
-        cur = db.cursor()
-        cur.execute("UPDATE requests SET status=%s, updated_at=NOW() WHERE id=%s", (status_value, req_id))
-        db.commit()
-        cur.close()
-        flash(f"Request #{req_id} {status_value}", "success")
-        return redirect(url_for('mentor'))
-    except Exception as e:
-        # Database error in mentor action
-        if 'cur' in locals():
-            cur.close()
-        flash("Error updating request status", "danger")
-        return redirect(url_for('mentor'))
+    return _single_decision('Mentor', 'mentor')
 
 # ---------- LOGOUT ----------
 @app.route('/logout')
@@ -1580,28 +1357,14 @@ def advisor():
         # Get all mentors in this department
         cur.execute("""
             SELECT name FROM users
-            WHERE role='Mentor' AND (
-                LOWER(TRIM(
-                    REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                        department,
-                        'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                        'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                ))
-            ) = %s
+            WHERE role='Mentor' AND department_key = %s
             ORDER BY name ASC
         """, (advisor_dept,))
         mentors_in_dept = [row[0] for row in cur.fetchall()]
 
         cur.execute("""
             SELECT name, register_number, year, email FROM users
-            WHERE role='Student' AND (
-                LOWER(TRIM(
-                    REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                        department,
-                        'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                        'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                ))
-            ) = %s
+            WHERE role='Student' AND department_key = %s
             ORDER BY name ASC
         """, (advisor_dept,))
         students_list = cur.fetchall()
@@ -1612,16 +1375,7 @@ def advisor():
                    COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
                    student_name, department, created_at
             FROM requests
-            WHERE 
-                (
-                    LOWER(TRIM(
-                        REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                            department,
-                            'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                            'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                    ))
-                ) = %s
-                AND status='Mentor Approved'
+            WHERE department_key = %s AND status='Mentor Approved'
             ORDER BY created_at DESC
         """, (advisor_dept,))
         requests_data = cur.fetchall()
@@ -1637,37 +1391,9 @@ def advisor():
 # ---------- ADVISOR ACTION ----------
 @app.route('/advisor_action', methods=['POST'])
 @login_required
-@limiter.limit("30 per hour")
+@decision_limit
 def advisor_action():
-    if 'username' not in session or session.get('role') != 'Advisor':
-        return redirect(url_for('login'))
-
-    req_id = request.form['request_id']
-    action = request.form['action']
-    advisor_note = request.form.get('advisor_note', '').strip()
-    status_value = 'Advisor Approved' if action == 'Approve' else 'Advisor Rejected'
-
-    try:
-        db = get_db()
-        if db is None:
-            flash("Database connection error", "danger")
-            return redirect(url_for('advisor'))
-            
-        cur = db.cursor()
-        if action == 'Approve':
-            cur.execute("UPDATE requests SET status=%s, updated_at=NOW(), advisor_note=%s WHERE id=%s", (status_value, advisor_note, req_id))
-        else:
-            cur.execute("UPDATE requests SET status=%s, updated_at=NOW(), advisor_note=%s WHERE id=%s", (status_value, advisor_note, req_id))
-        db.commit()
-        cur.close()
-        flash(f"Request #{req_id} {status_value}", "success")
-        return redirect(url_for('advisor'))
-    except Exception as e:
-        # Database error in advisor action
-        if 'cur' in locals():
-            cur.close()
-        flash("Error updating request status", "danger")
-        return redirect(url_for('advisor'))
+    return _single_decision('Advisor', 'advisor')
 
 # ---------- HOD DASHBOARD ----------
 @app.route('/hod')
@@ -1679,44 +1405,42 @@ def hod():
     db = get_db()
     if db is None:
         flash("Database connection error", "danger")
-        return render_template('hodd.html', requests=[], mentors=[])
+        return render_template('hodd.html', requests=[], mentors=[], pagination=None)
         
     cur = db.cursor()
     
     # Get HOD's normalized department
     hod_dept = normalize_department_name(session.get('department'))
 
+    search_query = request.args.get('search', '').strip()
+
     try:
-        # Fetch all requests for HOD's department
-        cur.execute("""
-            SELECT r.id, r.user_id, r.type, r.reason, r.from_date, r.to_date, r.status,
-                   COALESCE(DATE_FORMAT(r.updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(r.created_at, '%Y-%m-%d %H:%i')) as updation,
-                   r.student_name, r.department, r.created_at, r.advisor_note
-            FROM requests r
-            WHERE 
-                (
-                    LOWER(TRIM(
-                        REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                            r.department,
-                            'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                            'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                    ))
-                ) = %s
-            ORDER BY r.created_at DESC
-        """, (hod_dept,))
-        requests_data = cur.fetchall()
+        if search_query:
+            # Ranked search over the whole department; no pager
+            requests_data = search_department_requests(cur, hod_dept, search_query, limit=REQUESTS_PER_PAGE * 5)
+            pagination = None
+        else:
+            # One keyset page of the department's requests (approved ones are
+            # hidden by the dashboard, so they are filtered out here)
+            requests_data, pagination = fetch_page(
+                cur,
+                """
+                SELECT r.id, r.user_id, r.type, r.reason, r.from_date, r.to_date, r.status,
+                       COALESCE(DATE_FORMAT(r.updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(r.created_at, '%Y-%m-%d %H:%i')) as updation,
+                       r.student_name, r.department, r.created_at, r.advisor_note
+                FROM requests r
+                """,
+                ["r.department_key = %s", "r.status <> 'Approved'"], [hod_dept],
+                order_columns=['r.created_at', 'r.id'],
+                key=lambda row: (row[10], row[0]),
+                per_page=REQUESTS_PER_PAGE,
+                after=request.args.get('after'), before=request.args.get('before')
+            )
 
         # Fetch all mentors in HOD's department
         cur.execute("""
             SELECT name, email FROM users
-            WHERE role='Mentor' AND (
-                LOWER(TRIM(
-                    REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                        department,
-                        'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                        'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                ))
-            ) = %s
+            WHERE role='Mentor' AND department_key = %s
             ORDER BY name ASC
         """, (hod_dept,))
         mentors_data = cur.fetchall()
@@ -1724,43 +1448,170 @@ def hod():
 
         cur.close()
 
-        return render_template('hodd.html', requests=requests_data, mentors=mentors)
+        return render_template('hodd.html', requests=requests_data, mentors=mentors,
+                               pagination=pagination, search_query=search_query)
     except Exception as e:
         logger.exception("Database error in HOD dashboard")
         cur.close()
         flash("Error loading HOD dashboard", "danger")
-        return render_template('hodd.html', requests=[], mentors=[])
+        return render_template('hodd.html', requests=[], mentors=[], pagination=None)
+
+# ---------- BACKGROUND REPORTS ----------
+def _report_job_json(job):
+    data = {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'error': job['error'] if job['status'] == 'failed' else None,
+        'status_url': url_for('report_job_status', job_id=job['id']),
+    }
+    if job['status'] == 'done':
+        data['download_url'] = url_for('download_report_job', job_id=job['id'])
+        data['expires_at'] = job['expires_at'].isoformat() if job['expires_at'] else None
+    return data
 
-# ---------- HOD ACTION ----------
-@app.route('/hod_action', methods=['POST'])
+@app.route('/reports', methods=['POST'])
 @login_required
-@limiter.limit("30 per hour")
-def hod_action():
-    if 'username' not in session or session.get('role') != 'HOD':
-        return redirect(url_for('login'))
+@limiter.limit("20 per hour")
+def enqueue_report_job():
+    """Queue a PDF for the background worker; poll the returned status_url"""
+    if 'username' not in session:
+        return jsonify({'error': 'Login required'}), 401
 
-    req_id = request.form['request_id']
-    action = request.form['action']
-    status_value = 'Approved' if action == 'Approve' else 'Rejected'
+    kind = request.form.get('kind', 'status_report')
+    params = {
+        'user_id': session['id'],
+        'student_name': session.get('name'),
+        'department': session.get('department'),
+    }
+    if kind == 'status_report':
+        params.update({
+            'date': request.form.get('date', ''),
+            'status': request.form.get('status', ''),
+            'search': request.form.get('search', ''),
+        })
+    elif kind == 'approval_letter':
+        request_id = request.form.get('request_id', type=int)
+        if not request_id:
+            return jsonify({'error': 'request_id is required'}), 400
+        params['request_id'] = request_id
+    else:
+        return jsonify({'error': 'Unknown report kind'}), 400
 
+    db = get_db()
+    if db is None:
+        return jsonify({'error': 'Database connection error'}), 503
+
+    cur = db.cursor()
     try:
-        db = get_db()
-        if db is None:
-            flash("Database connection error", "danger")
-            return redirect(url_for('hod'))
-            
-        cur = db.cursor()
-        cur.execute("UPDATE requests SET status=%s, updated_at=NOW() WHERE id=%s", (status_value, req_id))
+        job_id = enqueue_report(cur, session['id'], kind, params)
         db.commit()
+        job = get_report_job(cur, job_id, session['id'])
+    except JobLimitError as e:
+        db.rollback()
+        return jsonify({'error': str(e)}), 429
+    except Exception:
+        db.rollback()
+        logger.exception("Could not queue report")
+        return jsonify({'error': 'Could not queue report'}), 500
+    finally:
         cur.close()
-        flash(f"Request #{req_id} {status_value}", "success")
-        return redirect(url_for('hod'))
-    except Exception as e:
-        # Database error in HOD action
-        if 'cur' in locals():
-            cur.close()
-        flash("Error updating request status", "danger")
-        return redirect(url_for('hod'))
+
+    return jsonify(_report_job_json(job)), 202
+
+@app.route('/reports/<int:job_id>')
+@login_required
+def report_job_status(job_id):
+    if 'username' not in session:
+        return jsonify({'error': 'Login required'}), 401
+
+    db = get_db()
+    if db is None:
+        return jsonify({'error': 'Database connection error'}), 503
+
+    cur = db.cursor()
+    try:
+        job = get_report_job(cur, job_id, session['id'])
+    finally:
+        cur.close()
+
+    if job is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return jsonify(_report_job_json(job))
+
+@app.route('/reports/<int:job_id>/download')
+@login_required
+def download_report_job(job_id):
+    if 'username' not in session:
+        return redirect(url_for('login'))
+
+    db = get_db()
+    if db is None:
+        flash("Database connection error", "danger")
+        return redirect(url_for('status'))
+
+    cur = db.cursor()
+    try:
+        job = get_report_job(cur, job_id, session['id'])
+    finally:
+        cur.close()
+
+    path = artifact_file(job) if job else None
+    if path is None:
+        flash("This report is not ready or has expired", "info")
+        return redirect(url_for('status'))
+
+    return send_file(path, mimetype='application/pdf', as_attachment=True,
+                     download_name=job['artifact_name'] or f"report_{job_id}.pdf")
+
+# ---------- STAFF SEARCH ----------
+@app.route('/search/requests')
+@login_required
+@limiter.limit("60 per minute")
+def staff_search():
+    """Ranked search over the caller's department for Mentors, Advisors and HODs."""
+    if session.get('role') not in ('Mentor', 'Advisor', 'HOD'):
+        return jsonify({'error': 'Access denied'}), 403
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'results': []})
+
+    db = get_db()
+    if db is None:
+        return jsonify({'error': 'Database connection error'}), 503
+
+    cur = db.cursor()
+    try:
+        rows = search_department_requests(
+            cur, normalize_department_name(session.get('department')), query
+        )
+    except Exception:
+        logger.exception("Database error in staff search")
+        return jsonify({'error': 'Search failed'}), 500
+    finally:
+        cur.close()
+
+    return jsonify({'results': [
+        {
+            'id': row[0],
+            'type': row[2],
+            'reason': row[3],
+            'from_date': str(row[4]) if row[4] else None,
+            'to_date': str(row[5]) if row[5] else None,
+            'status': row[6],
+            'updated': row[7],
+            'student_name': row[8],
+        }
+        for row in rows
+    ]})
+
+# ---------- HOD ACTION ----------
+@app.route('/hod_action', methods=['POST'])
+@login_required
+@decision_limit
+def hod_action():
+    return _single_decision('HOD', 'hod')
 
 # ---------- USER MANAGEMENT ----------
 @app.route('/user_management')
@@ -1792,26 +1643,12 @@ def user_management():
         
         # If HOD, limit to their department only
         if session.get('role') == 'HOD':
-            where_conditions.append("""
-                LOWER(TRIM(
-                    REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                        department,
-                        'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                        'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                )) = %s
-            """)
+            where_conditions.append("department_key = %s")
             params.append(user_dept)
         
         # Add department filter
         if dept_filter:
-            where_conditions.append("""
-                LOWER(TRIM(
-                    REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                        department,
-                        'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                        'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                )) = %s
-            """)
+            where_conditions.append("department_key = %s")
             params.append(normalize_department_name(dept_filter))
         
         # Add role filter
@@ -1821,24 +1658,26 @@ def user_management():
         
         # Add search filter
         if search_query:
-            where_conditions.append("(name LIKE %s OR register_number LIKE %s OR email LIKE %s)")
-            search_param = f"%{search_query}%"
-            params.extend([search_param, search_param, search_param])
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        # Get users
-        query = f"""
-            SELECT id, username, name, role, register_number, email, department, year, dob, student_type, mentor_email
-            FROM users 
-            WHERE {where_clause}
-            ORDER BY role, department, name
-        """
-        cur.execute(query, params)
-        users_data = cur.fetchall()
-        
-        # Get all departments for filter dropdown
-        cur.execute("SELECT DISTINCT department FROM users WHERE department IS NOT NULL ORDER BY department")
+            search_sql, search_params = match_condition(USER_FT_COLUMNS, search_query)
+            where_conditions.append(search_sql)
+            params.extend(search_params)
+        
+        # Get one keyset page of users, newest first
+        users_data, pagination = fetch_page(
+            cur,
+            """
+            SELECT id, username, name, role, register_number, email, department, year, dob, student_type, mentor_email, created_at
+            FROM users
+            """,
+            where_conditions, params,
+            order_columns=['created_at', 'id'],
+            key=lambda row: (row[11], row[0]),
+            per_page=STUDENTS_PER_PAGE,
+            after=request.args.get('after'), before=request.args.get('before')
+        )
+        
+        # Get all departments for filter dropdown (served from the department_key index)
+        cur.execute("SELECT DISTINCT department_key FROM users WHERE department_key IS NOT NULL ORDER BY department_key")
         departments = [row[0] for row in cur.fetchall()]
         
         cur.close()
@@ -1846,6 +1685,7 @@ def user_management():
         return render_template('user_management.html', 
                                users=users_data, 
                                departments=departments,
+                               pagination=pagination,
                                current_dept_filter=dept_filter,
                                current_role_filter=role_filter,
                                current_search=search_query)
@@ -1907,10 +1747,11 @@ def edit_user(user_id):
             try:
                 cur.execute("""
                     UPDATE users 
-                    SET name=%s, email=%s, role=%s, department=%s, year=%s, student_type=%s, mentor_email=%s, updated_at=NOW()
+                    SET name=%s, email=%s, role=%s, department=%s, department_key=%s, year=%s, student_type=%s, mentor_email=%s, updated_at=NOW()
                     WHERE id=%s
-                """, (name, email, role, department, year, student_type, mentor_email, user_id))
+                """, (name, email, role, department, normalize_department_name(department), year, student_type, mentor_email, user_id))
                 db.commit()
+                invalidate_user(user_id)
                 flash(f"User {name} updated successfully", "success")
                 return redirect(url_for('user_management'))
             except Exception as e:
@@ -1970,6 +1811,7 @@ def delete_user(user_id):
         # Delete user
         cur.execute("DELETE FROM users WHERE id=%s", (user_id,))
         db.commit()
+        invalidate_user(user_id)
         cur.close()
         
         flash(f"User {user[0]} deleted successfully", "success")
@@ -3,6 +3,8 @@ from flask import Flask
 from app.extensions import login_manager, limiter, csrf
 from app.database import init_app as init_db_app
 from app.models import load_user
+from app.cli import register_cli
+from app import assets, offline, push, sse, static_files, templating
 
 def create_app(test_config=None):
     import os
@@ -40,6 +42,7 @@ def create_app(test_config=None):
     limiter.init_app(app)
     csrf.init_app(app)
     init_db_app(app)
+    register_cli(app)
 
     # User Loader
     @login_manager.user_loader
@@ -58,5 +61,23 @@ def create_app(test_config=None):
 
     from app.staff import bp as staff_bp
     app.register_blueprint(staff_bp)
+
+    # /api/v1: JSON dashboards, queues and users
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp)
+
+    # Fingerprinted static assets and the asset_url() template helper
+    assets.init_app(app)
+    # /static/ is served ahead of the request hooks (precompressed, cached)
+    static_files.init_app(app)
+    # /service-worker.js: offline app shell and cached status pages
+    offline.init_app(app)
+    # Web Push: the VAPID public key browsers subscribe with
+    push.init_app(app)
+    # /events/queue: live staff queues (see also `flask sse serve`)
+    sse.init_app(app)
+
+    # Persistent template bytecode cache, then load every template
+    templating.init_app(app)
     
     return app
@@ -0,0 +1,8 @@
+"""Versioned JSON API (``/api/v1``) for the dashboards, queues and users."""
+from flask import Blueprint
+
+API_VERSION = 'v1'
+
+bp = Blueprint('api', __name__, url_prefix=f'/api/{API_VERSION}')
+
+from app.api import routes
@@ -0,0 +1,118 @@
+"""What the API exposes, and how it is selected and serialised.
+
+Each resource maps public field names to SQL expressions. ``fields=``
+picks a subset, and only those columns are read (plus the sort key for
+the cursor). Pages use the same keyset cursors as the HTML views
+(``app.pagination``). Responses are compact JSON: no whitespace, dates as
+ISO strings, and with ``shape=rows`` the field names once followed by
+one array per row.
+"""
+import datetime
+import json
+
+from app.pagination import fetch_page
+
+class ApiError(Exception):
+    """Turned into ``{"error": message}`` with ``status``"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+class Resource:
+    def __init__(self, source, fields, default, key):
+        self.source = source
+        self.fields = fields
+        self.default = default
+        # Unique sort key, newest first
+        self.key = key
+
+    def parse_fields(self, raw):
+        """The requested field names, in order; the defaults for none"""
+        if not raw:
+            return list(self.default)
+        names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+        return names or list(self.default)
+
+    def select(self, names):
+        """``(select_sql, columns)``: the fields plus any key column not among them"""
+        columns = names + [name for name in self.key if name not in names]
+        return f"SELECT {', '.join(self.fields[name] for name in columns)} FROM {self.source}", columns
+
+    def page(self, cur, names, conditions, params, per_page, after=None, before=None):
+        """One keyset page as ``(rows, page_info)``; rows hold just ``names``"""
+        select_sql, columns = self.select(names)
+        positions = [columns.index(name) for name in self.key]
+        rows, page_info = fetch_page(
+            cur, select_sql, conditions, params,
+            order_columns=[self.fields[name] for name in self.key],
+            key=lambda row: tuple(row[i] for i in positions),
+            per_page=per_page, after=after, before=before,
+        )
+        if len(columns) > len(names):
+            rows = [row[:len(names)] for row in rows]
+        return rows, page_info
+
+REQUESTS = Resource(
+    'requests r',
+    {
+        'id': 'r.id',
+        'type': 'r.type',
+        'request_type': 'r.request_type',
+        'reason': 'r.reason',
+        'from_date': 'r.from_date',
+        'to_date': 'r.to_date',
+        'status': 'r.status',
+        'student_name': 'r.student_name',
+        'department': 'r.department',
+        'advisor_note': 'r.advisor_note',
+        'created_at': 'r.created_at',
+        'updated_at': 'r.updated_at',
+    },
+    default=['id', 'type', 'from_date', 'to_date', 'status', 'student_name', 'updated_at'],
+    key=['created_at', 'id'],
+)
+
+# Never the password hash
+USERS = Resource(
+    'users',
+    {
+        'id': 'id',
+        'username': 'username',
+        'name': 'name',
+        'role': 'role',
+        'register_number': 'register_number',
+        'email': 'email',
+        'department': 'department',
+        'year': 'year',
+        'dob': 'dob',
+        'student_type': 'student_type',
+        'mentor_email': 'mentor_email',
+        'created_at': 'created_at',
+    },
+    default=['id', 'name', 'role', 'register_number', 'email', 'department', 'year'],
+    key=['created_at', 'id'],
+)
+
+def _default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+def shape(rows, names, as_rows=False):
+    """Rows as a list of objects, or ``{"fields": names, "rows": [...]}``"""
+    if as_rows:
+        return {'fields': names, 'rows': rows}
+    return [dict(zip(names, row)) for row in rows]
+
+def dumps(payload):
+    """Compact JSON bytes; dates and datetimes become ISO strings"""
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=_default).encode('utf-8')
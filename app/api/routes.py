@@ -0,0 +1,170 @@
+"""``/api/v1`` endpoints.
+
+Every list takes ``fields=`` (comma-separated names, see
+``app.api.resources``), ``limit=`` (1-100), ``after=``/``before=`` cursors
+from the previous page, and ``shape=rows`` for the compact array form.
+Every endpoint needs a signed-in session (401 otherwise). Responses
+carry a strong ETag over the body, so a client that sends it back in
+``If-None-Match`` gets an empty 304 while nothing changed.
+"""
+import datetime
+import hashlib
+import logging
+
+from flask import Response, request, session
+from flask_login import current_user
+
+from app.api import bp
+from app.api.resources import REQUESTS, USERS, ApiError, dumps, shape
+from app.database import get_db
+from app.search import REQUEST_FT_COLUMNS, USER_FT_COLUMNS, match_condition
+from app.stats import fetch_stats
+from app.utils import normalize_department_name
+from config import REQUESTS_PER_PAGE, STUDENTS_PER_PAGE
+
+logger = logging.getLogger(__name__)
+
+MAX_LIMIT = 100
+DASHBOARD_RECENT = 5
+
+# URL role -> (session role, extra conditions); the same rows as the HTML queues
+QUEUES = {
+    'mentor': ('Mentor', ["r.status = 'Pending'"]),
+    'advisor': ('Advisor', ["r.status = 'Mentor Approved'"]),
+    'hod': ('HOD', ["r.status <> 'Approved'"]),
+}
+
+def _json(payload, status=200):
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    if status == 200:
+        response.set_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+        # Per-user data: only the browser may keep it, and must revalidate
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.make_conditional(request)
+    return response
+
+@bp.errorhandler(ApiError)
+def api_error(error):
+    return _json({'error': error.message}, error.status)
+
+@bp.before_request
+def require_login():
+    # A JSON 401 in place of login_required's redirect to the HTML login page
+    if not current_user.is_authenticated or 'id' not in session:
+        return _json({'error': 'Authentication required'}, 401)
+
+def _limit(default):
+    raw = request.args.get('limit')
+    if not raw:
+        return default
+    try:
+        return max(1, min(int(raw), MAX_LIMIT))
+    except ValueError:
+        raise ApiError("limit must be a number")
+
+def _require_role(*roles):
+    if session.get('role') not in roles:
+        raise ApiError('Access denied', 403)
+
+def _cursor():
+    db = get_db()
+    if db is None:
+        raise ApiError('Database connection error', 503)
+    return db.cursor()
+
+def _page(resource, conditions, params, default_limit):
+    names = resource.parse_fields(request.args.get('fields'))
+    cur = _cursor()
+    try:
+        rows, page_info = resource.page(
+            cur, names, conditions, params, _limit(default_limit),
+            after=request.args.get('after'), before=request.args.get('before'),
+        )
+    except ApiError:
+        raise
+    except Exception:
+        logger.exception("Database error in %s", request.path)
+        raise ApiError('Error loading data', 500)
+    finally:
+        cur.close()
+    return _json({
+        'data': shape(rows, names, request.args.get('shape') == 'rows'),
+        'page': {'next': page_info['next_cursor'], 'prev': page_info['prev_cursor']},
+    })
+
+def _date_condition(conditions, params, column):
+    raw = request.args.get('date')
+    if not raw:
+        return
+    try:
+        day_start = datetime.datetime.strptime(raw, "%Y-%m-%d")
+    except ValueError:
+        raise ApiError("date must be YYYY-MM-DD")
+    conditions.append(f"{column} >= %s AND {column} < %s")
+    params.extend([day_start, day_start + datetime.timedelta(days=1)])
+
+@bp.route('/dashboard')
+def dashboard():
+    """The student's counters and their most recent requests"""
+    names = REQUESTS.parse_fields(request.args.get('fields'))
+    cur = _cursor()
+    try:
+        counters = fetch_stats(cur, session['id'])
+        rows, _ = REQUESTS.page(cur, names, ["r.user_id = %s"], [session['id']], DASHBOARD_RECENT)
+    except ApiError:
+        raise
+    except Exception:
+        logger.exception("Database error in API dashboard")
+        raise ApiError('Error loading data', 500)
+    finally:
+        cur.close()
+    return _json({
+        'stats': counters,
+        'recent': shape(rows, names, request.args.get('shape') == 'rows'),
+    })
+
+@bp.route('/requests')
+def request_list():
+    """The student's own requests (the status page), newest first"""
+    conditions, params = ["r.user_id = %s"], [session['id']]
+    _date_condition(conditions, params, 'r.created_at')
+    if request.args.get('status'):
+        conditions.append("r.status = %s")
+        params.append(request.args['status'])
+    if request.args.get('search'):
+        search_sql, search_params = match_condition(REQUEST_FT_COLUMNS, request.args['search'])
+        conditions.append(search_sql)
+        params.extend(search_params)
+    return _page(REQUESTS, conditions, params, REQUESTS_PER_PAGE)
+
+@bp.route('/queues/<role>')
+def queue(role):
+    """The caller's department queue; ``role`` must be their own"""
+    if role not in QUEUES:
+        raise ApiError('No such queue', 404)
+    session_role, extra = QUEUES[role]
+    _require_role(session_role)
+    conditions = ["r.department_key = %s", *extra]
+    params = [normalize_department_name(session.get('department'))]
+    return _page(REQUESTS, conditions, params, REQUESTS_PER_PAGE)
+
+@bp.route('/users')
+def users():
+    """User management: HODs see their own department, Admins everyone"""
+    _require_role('HOD', 'Admin')
+    conditions, params = [], []
+    if session.get('role') == 'HOD':
+        conditions.append("department_key = %s")
+        params.append(normalize_department_name(session.get('department')))
+    if request.args.get('department'):
+        conditions.append("department_key = %s")
+        params.append(normalize_department_name(request.args['department']))
+    if request.args.get('role'):
+        conditions.append("role = %s")
+        params.append(request.args['role'])
+    if request.args.get('search'):
+        search_sql, search_params = match_condition(USER_FT_COLUMNS, request.args['search'])
+        conditions.append(search_sql)
+        params.extend(search_params)
+    return _page(USERS, conditions, params, STUDENTS_PER_PAGE)
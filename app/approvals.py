@@ -0,0 +1,65 @@
+"""Approve/reject decisions, one request or a whole queue at a time.
+
+The transitions themselves live in ``app.workflow``; this module turns a
+staff member's submission into per-request outcomes.
+"""
+from app import workflow
+
+# Upper bound on ids in one bulk request
+MAX_BULK_IDS = 200
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+NOT_ACTIONABLE = 'not_actionable'
+
+def parse_ids(values):
+    """Request ids from form values (repeated fields or comma separated)"""
+    ids = []
+    seen = set()
+    for value in values:
+        for part in str(value).split(','):
+            part = part.strip()
+            if part.isdigit() and int(part) not in seen:
+                seen.add(int(part))
+                ids.append(int(part))
+    return ids
+
+def decide(db, role, department_key, request_ids, action, advisor_note=None):
+    """Apply ``action`` to ``request_ids`` for a staff member; commits.
+
+    Returns ``[{'id', 'outcome', 'status'}]`` in input order. Requests in
+    other departments are reported as not found so their existence is not
+    disclosed. Raises ``workflow.IllegalTransition`` for an action the
+    role cannot take.
+    """
+    ids = list(dict.fromkeys(int(i) for i in request_ids))[:MAX_BULK_IDS]
+    if not ids:
+        return []
+
+    moved, new_status = workflow.apply_many(db, role, action, ids, department_key, advisor_note)
+    moved = set(moved)
+
+    # Explain the rest; this read only labels outcomes, it decides nothing
+    current = {}
+    others = [i for i in ids if i not in moved]
+    if others:
+        placeholders = ", ".join(["%s"] * len(others))
+        cur = db.cursor()
+        try:
+            cur.execute(f"""
+                SELECT id, status FROM requests
+                WHERE id IN ({placeholders}) AND department_key = %s
+            """, others + [department_key])
+            current = dict(cur.fetchall())
+        finally:
+            cur.close()
+
+    results = []
+    for request_id in ids:
+        if request_id in moved:
+            results.append({'id': request_id, 'outcome': UPDATED, 'status': new_status})
+        elif request_id in current:
+            results.append({'id': request_id, 'outcome': NOT_ACTIONABLE, 'status': current[request_id]})
+        else:
+            results.append({'id': request_id, 'outcome': NOT_FOUND, 'status': None})
+    return results
@@ -0,0 +1,268 @@
+"""Fingerprinted static assets.
+
+Page styles and scripts live in ``static/src/`` rather than inline in the
+templates, so the browser caches them once instead of receiving them with
+every HTML response. ``build`` copies each source, and each bundle in
+``BUNDLES``, to ``static/dist/`` under a content-hashed name and records
+the mapping in ``static/dist/manifest.json``. Templates refer to assets by
+their logical name:
+
+    <link rel="stylesheet" href="{{ asset_url('css/status.css') }}">
+
+which renders as ``/static/dist/css/status.3f9c2a1b7d.css``. A changed
+file gets a new name, so the old one can be cached forever.
+
+Text assets are also written precompressed (``.gz``, plus ``.br`` when the
+optional ``brotli`` package is installed) for ``app.static_files`` to
+serve. The build runs at startup when the manifest is missing or older
+than a source, and ahead of a deploy with ``flask assets build``.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import time
+
+from flask import current_app, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger('mefportal')
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ASSET_CONFIG = {
+    'static_dir': os.path.join(_BASE_DIR, 'static'),
+    # Build at startup when the manifest is stale
+    'auto_build': os.environ.get('MEF_ASSETS_AUTO_BUILD', 'true').lower() in ('true', '1', 'yes'),
+}
+
+SOURCE_DIR = 'src'
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# Top-level static files that are published fingerprinted as well
+# (service-worker.js is not: its URL must never change)
+PUBLISHED = ['style.css', 'mobile-responsive.css', 'mobile-responsive.js', 'mef_logo.png']
+
+# Extensions worth precompressing, and the smallest file worth it
+# (woff2 is already compressed)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt')
+MIN_COMPRESS_SIZE = 512
+
+# Bundles: logical name -> files (relative to static/) concatenated in order
+BUNDLES = {
+    # Everything base.html loads at the end of <body>
+    'js/layout.js': ['src/js/base.js', 'mobile-responsive.js'],
+}
+
+# Relative url() references in stylesheets (not data:, absolute or fragment URLs)
+CSS_URL = re.compile(r'url\(\s*(["\']?)(?![a-z]+:|/|#)([^"\')?#]+)([^"\')]*)\1\s*\)')
+
+def _sources(static_dir):
+    """Logical name -> list of files (relative to static/) it is built from"""
+    sources = {}
+    src_root = os.path.join(static_dir, SOURCE_DIR)
+    for directory, _, files in os.walk(src_root):
+        for filename in files:
+            path = os.path.relpath(os.path.join(directory, filename), static_dir).replace(os.sep, '/')
+            sources[path[len(SOURCE_DIR) + 1:]] = [path]
+    for name in PUBLISHED:
+        if os.path.exists(os.path.join(static_dir, name)):
+            sources[name] = [name]
+    sources.update(BUNDLES)
+    return sources
+
+def _read(static_dir, parts):
+    if len(parts) == 1:
+        with open(os.path.join(static_dir, parts[0]), 'rb') as f:
+            return f.read()
+    chunks = []
+    for part in parts:
+        with open(os.path.join(static_dir, part), 'rb') as f:
+            chunks.append(f.read().rstrip(b'\n') + b'\n')
+    # A newline and semicolon keep one script's last statement from running into the next
+    separator = b';\n' if parts[0].endswith('.js') else b'\n'
+    return separator.join(chunks)
+
+def _rewrite_urls(name, data, manifest):
+    """Point the relative ``url()``s in stylesheet ``name`` at fingerprinted copies"""
+    base = posixpath.dirname(name)
+    built_dir = posixpath.join(DIST_DIR, base)
+
+    def replace(match):
+        quote, path, suffix = match.groups()
+        target = manifest.get(posixpath.normpath(posixpath.join(base, path)))
+        if target is None:
+            return match.group(0)
+        return f"url({quote}{posixpath.relpath(target, built_dir)}{suffix}{quote})"
+
+    return CSS_URL.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+def _file_mode():
+    # mkstemp creates 0600 files; published assets should get the usual
+    # mode for a new file. Reading the umask means setting it, so do it once.
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o644 & ~umask
+
+_FILE_MODE = _file_mode()
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, _FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def _precompress(path, data):
+    """Write missing ``path.gz`` (and ``path.br``) next to ``path`` when they are smaller"""
+    if not path.endswith(COMPRESSIBLE) or len(data) < MIN_COMPRESS_SIZE:
+        return
+    variants = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda: brotli.compress(data, quality=11)))
+    for suffix, compress in variants:
+        # The name is content-hashed, so a variant already on disk is current
+        if os.path.exists(path + suffix):
+            continue
+        compressed = compress()
+        if len(compressed) < len(data):
+            _write_atomic(path + suffix, compressed)
+
+def build(static_dir=None, prune=False):
+    """Write fingerprinted copies and the manifest; returns the manifest.
+
+    Earlier builds are kept so pages rendered before a deploy can still
+    load their assets, unless ``prune`` is set.
+    """
+    static_dir = static_dir or ASSET_CONFIG['static_dir']
+    dist_root = os.path.join(static_dir, DIST_DIR)
+    manifest = {}
+    # Stylesheets last, so the fonts and images they refer to are already named
+    for name, parts in sorted(_sources(static_dir).items(), key=lambda item: (item[0].endswith('.css'), item[0])):
+        data = _read(static_dir, parts)
+        if name.endswith('.css'):
+            data = _rewrite_urls(name, data, manifest)
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        stem, ext = os.path.splitext(name)
+        target = f"{DIST_DIR}/{stem}.{digest}{ext}"
+        path = os.path.join(static_dir, target)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        # Also fills in variants an earlier build could not produce, e.g.
+        # ``.br`` once brotli is installed
+        _precompress(path, data)
+        manifest[name] = target
+    _write_atomic(os.path.join(dist_root, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    if prune:
+        keep = {
+            os.path.normpath(os.path.join(static_dir, target)) + suffix
+            for target in manifest.values()
+            for suffix in ('', '.gz', '.br')
+        }
+        keep.add(os.path.normpath(os.path.join(dist_root, MANIFEST)))
+        for directory, _, files in os.walk(dist_root):
+            for filename in files:
+                path = os.path.normpath(os.path.join(directory, filename))
+                if path not in keep:
+                    os.unlink(path)
+    return manifest
+
+def _newest_source_mtime(static_dir):
+    newest = 0.0
+    for parts in _sources(static_dir).values():
+        for part in parts:
+            try:
+                newest = max(newest, os.stat(os.path.join(static_dir, part)).st_mtime)
+            except OSError:
+                pass
+    return newest
+
+def _manifest_mtime(static_dir):
+    try:
+        return os.stat(os.path.join(static_dir, DIST_DIR, MANIFEST)).st_mtime
+    except OSError:
+        return None
+
+def load_manifest(static_dir=None):
+    static_dir = static_dir or ASSET_CONFIG['static_dir']
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def is_stale(static_dir=None):
+    static_dir = static_dir or ASSET_CONFIG['static_dir']
+    built = _manifest_mtime(static_dir)
+    return built is None or _newest_source_mtime(static_dir) > built
+
+class _Assets:
+    """The manifest for one app; rechecked about once a second in debug"""
+
+    def __init__(self, static_dir, auto_build):
+        self.static_dir = static_dir
+        self.auto_build = auto_build
+        self.manifest = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            if self.auto_build and is_stale(self.static_dir):
+                try:
+                    self.manifest = build(self.static_dir)
+                    logger.info("Built %d static asset(s)", len(self.manifest))
+                except OSError as e:
+                    logger.warning("Static asset build failed: %s", e)
+                    self.manifest = load_manifest(self.static_dir)
+            else:
+                self.manifest = load_manifest(self.static_dir)
+            self._checked = time.monotonic()
+
+    def current(self, debug=False):
+        if debug and time.monotonic() - self._checked > 1.0:
+            self.refresh()
+        return self.manifest
+
+    def lookup(self, name, debug=False):
+        return self.current(debug).get(name)
+
+def asset_url(name, **values):
+    """URL of the fingerprinted copy of ``name``, or of ``name`` itself when unbuilt"""
+    assets = current_app.extensions.get('mef_assets')
+    target = assets.lookup(name, current_app.debug) if assets is not None else None
+    if target is None and os.path.exists(os.path.join(current_app.static_folder, SOURCE_DIR, name)):
+        target = f"{SOURCE_DIR}/{name}"
+    return url_for('static', filename=target or name, **values)
+
+def has_asset(name):
+    """Whether ``name`` exists, built or as a source"""
+    assets = current_app.extensions.get('mef_assets')
+    if assets is not None and assets.lookup(name, current_app.debug) is not None:
+        return True
+    return os.path.exists(os.path.join(current_app.static_folder, SOURCE_DIR, name))
+
+def init_app(app):
+    assets = _Assets(app.static_folder or ASSET_CONFIG['static_dir'], ASSET_CONFIG['auto_build'])
+    assets.refresh()
+    app.extensions['mef_assets'] = assets
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.jinja_env.globals['has_asset'] = has_asset
@@ -0,0 +1,172 @@
+"""Login lockout bookkeeping.
+
+A login costs one query to load the user together with their lockout
+state, then at most one write: a single upsert on failure, or a DELETE on
+success when a lockout row exists. Repeated failures are also remembered
+in process for a few seconds (only as keyed digests), so a
+credential-stuffing burst of the same pair, or hammering on a locked or
+unknown account, is answered without touching MySQL or hashing a password.
+Stale ``auth_lockouts`` rows are removed by a background sweeper.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.database import get_pool
+
+logger = logging.getLogger('mefportal')
+
+MAX_FAILED_ATTEMPTS = 5
+LOCKOUT_TIME = 15 * 60  # 15 minutes
+
+NEGATIVE_CACHE_TTL = float(os.environ.get('MEF_LOGIN_NEGATIVE_TTL', 30))
+NEGATIVE_CACHE_SIZE = 10000
+SWEEP_INTERVAL = float(os.environ.get('MEF_LOCKOUT_SWEEP_INTERVAL', 300))
+
+LOCKED = 'locked'
+INVALID = 'invalid'
+
+class _NegativeCache:
+    """Bounded map of key -> (reason, expiry) with per-entry TTLs"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[0]
+
+    def put(self, key, reason, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (reason, time.monotonic() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_negative = _NegativeCache(NEGATIVE_CACHE_SIZE)
+# Per-process key: cached digests are useless outside this process
+_digest_key = os.urandom(32)
+
+def _pair_key(register_number, password):
+    digest = hmac.new(_digest_key, f"{register_number}\0{password}".encode('utf-8'), hashlib.sha256)
+    return ('pair', digest.digest())
+
+def recent_failure(register_number, password):
+    """LOCKED or INVALID if this attempt is known to fail, else None"""
+    return (
+        _negative.get(('account', register_number))
+        or _negative.get(_pair_key(register_number, password))
+    )
+
+def remember_failure(register_number, password, user_exists=True):
+    if user_exists:
+        _negative.put(_pair_key(register_number, password), INVALID, NEGATIVE_CACHE_TTL)
+    else:
+        _negative.put(('account', register_number), INVALID, NEGATIVE_CACHE_TTL)
+
+def remember_lock(register_number, seconds):
+    _negative.put(('account', register_number), LOCKED, min(seconds, NEGATIVE_CACHE_TTL))
+
+def forget(register_number):
+    """Drop the account-level entry (after registration or a password reset)"""
+    _negative.discard(('account', register_number))
+
+def fetch_login(cur, register_number):
+    """Load a user and their lockout state in one query.
+
+    Returns ``(user_row, locked_for, has_lockout_row)``: ``user_row`` is
+    the ``users`` row (or None), ``locked_for`` the seconds left on an
+    active lockout (0 if none).
+    """
+    cur.execute("""
+        SELECT u.*,
+               l.register_number IS NOT NULL AS has_lockout,
+               IF(l.failed_attempts >= %s AND l.lockout_until > NOW(),
+                  TIMESTAMPDIFF(SECOND, NOW(), l.lockout_until), 0) AS locked_for
+        FROM users u
+        LEFT JOIN auth_lockouts l ON l.register_number = u.register_number
+        WHERE u.register_number = %s
+    """, (MAX_FAILED_ATTEMPTS, register_number))
+    row = cur.fetchone()
+    if row is None:
+        return None, 0, False
+    return row[:-2], int(row[-1] or 0), bool(row[-2])
+
+def record_failure(cur, register_number):
+    """Count a failed attempt; the lockout expiry is computed in SQL.
+
+    An attempt after an expired lockout starts a fresh count.
+    """
+    # ON DUPLICATE KEY UPDATE assigns left to right, so lockout_until sees
+    # the new failed_attempts
+    cur.execute("""
+        INSERT INTO auth_lockouts (register_number, failed_attempts, lockout_until)
+        VALUES (%s, 1, NULL)
+        ON DUPLICATE KEY UPDATE
+            failed_attempts = IF(lockout_until IS NOT NULL AND lockout_until <= NOW(), 1, failed_attempts + 1),
+            lockout_until = IF(failed_attempts >= %s, NOW() + INTERVAL %s SECOND,
+                               IF(lockout_until <= NOW(), NULL, lockout_until))
+    """, (register_number, MAX_FAILED_ATTEMPTS, LOCKOUT_TIME))
+
+def clear(cur, register_number):
+    cur.execute("DELETE FROM auth_lockouts WHERE register_number=%s", (register_number,))
+
+def sweep(cur, idle_seconds=LOCKOUT_TIME, batch=1000):
+    """Delete rows that are not locked and saw no failure for ``idle_seconds``"""
+    cur.execute("""
+        DELETE FROM auth_lockouts
+        WHERE (lockout_until IS NULL OR lockout_until < NOW())
+          AND updated_at < NOW() - INTERVAL %s SECOND
+        LIMIT %s
+    """, (idle_seconds, batch))
+    return cur.rowcount
+
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+def _sweep_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            pool = get_pool()
+            db = pool.acquire()
+            try:
+                cur = db.cursor()
+                removed = sweep(cur)
+                db.commit()
+                cur.close()
+                if removed:
+                    logger.info("Removed %d stale lockout row(s)", removed)
+            finally:
+                pool.release(db)
+        except Exception as e:
+            logger.warning("Lockout sweep failed: %s", e)
+
+def start_sweeper(interval=SWEEP_INTERVAL):
+    """Start the background sweep thread once per process"""
+    global _sweeper_pid
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid() or interval <= 0:
+            return
+        _sweeper_pid = os.getpid()
+    threading.Thread(target=_sweep_forever, args=(interval,), name='lockout-sweeper', daemon=True).start()
@@ -0,0 +1,131 @@
+"""Password hashing off the request thread.
+
+scrypt and pbkdf2 are deliberately slow. Running them inline lets a login
+storm put every request thread on the CPU at once; here they run on a
+small fixed pool (hashlib releases the GIL while hashing), and at most
+``MEF_PASSWORD_HASH_QUEUE`` hashes may wait for it. Beyond that callers
+get ``HashingBusy`` instead of queueing without bound.
+
+The cost is set with ``MEF_PASSWORD_HASH_METHOD`` in werkzeug's format,
+e.g. ``pbkdf2:sha256:600000`` or ``scrypt:32768:8:1``. Hashes made with
+other parameters keep working and are replaced after the next successful
+login (``rehash_in_background``).
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.database import get_pool
+
+logger = logging.getLogger('mefportal')
+
+HASH_CONFIG = {
+    'method': os.environ.get('MEF_PASSWORD_HASH_METHOD', 'pbkdf2'),
+    'workers': int(os.environ.get('MEF_PASSWORD_HASH_WORKERS', os.cpu_count() or 2)),
+    # Hashes allowed to wait for a worker, on top of the running ones
+    'queue': int(os.environ.get('MEF_PASSWORD_HASH_QUEUE', 64)),
+    # Seconds a caller waits for a queue slot before giving up
+    'wait': float(os.environ.get('MEF_PASSWORD_HASH_WAIT', 5)),
+}
+
+class HashingBusy(RuntimeError):
+    """Too many hashes are already queued"""
+
+class Hasher:
+    """A bounded executor for password hashes"""
+
+    def __init__(self, method, workers, queue, wait):
+        self.method = method
+        self.wait = wait
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pwhash')
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._prefix = None
+
+    def _submit(self, fn, *args, block=True):
+        if not self._slots.acquire(timeout=self.wait if block else 0):
+            raise HashingBusy("Password hashing queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method).result()
+
+    def verify(self, stored_hash, password):
+        return self._submit(check_password_hash, stored_hash, password).result()
+
+    @property
+    def prefix(self):
+        """Method and parameters of new hashes, e.g. ``pbkdf2:sha256:600000``"""
+        if self._prefix is None:
+            self._prefix = self.hash('').split('$', 1)[0]
+        return self._prefix
+
+    def needs_rehash(self, stored_hash):
+        return not stored_hash or stored_hash.split('$', 1)[0] != self.prefix
+
+    def rehash_in_background(self, user_id, stored_hash, password):
+        """Replace ``stored_hash`` for ``user_id`` without blocking the caller.
+
+        The UPDATE only applies while the stored hash is unchanged, so a
+        password changed in the meantime is never overwritten. Skipped
+        when the queue is full; the next login tries again.
+        """
+        try:
+            self._submit(self._rehash, user_id, stored_hash, password, block=False)
+        except HashingBusy:
+            logger.info("Skipping password rehash for user %s, hashing queue is full", user_id)
+
+    def _rehash(self, user_id, stored_hash, password):
+        new_hash = generate_password_hash(password, self.method)
+        pool = get_pool()
+        try:
+            db = pool.acquire()
+        except Exception as e:
+            logger.warning("Password rehash for user %s failed: %s", user_id, e)
+            return
+        try:
+            cur = db.cursor()
+            cur.execute(
+                "UPDATE users SET password=%s, updated_at=NOW() WHERE id=%s AND password=%s",
+                (new_hash, user_id, stored_hash)
+            )
+            db.commit()
+            cur.close()
+        except Exception as e:
+            logger.warning("Password rehash for user %s failed: %s", user_id, e)
+        finally:
+            pool.release(db)
+
+_hasher = None
+_hasher_pid = None
+_hasher_lock = threading.Lock()
+
+def get_hasher():
+    """The process-wide hasher; recreated after a fork"""
+    global _hasher, _hasher_pid
+    if _hasher is None or _hasher_pid != os.getpid():
+        with _hasher_lock:
+            if _hasher is None or _hasher_pid != os.getpid():
+                _hasher = Hasher(**HASH_CONFIG)
+                _hasher_pid = os.getpid()
+    return _hasher
+
+def hash_password(password):
+    return get_hasher().hash(password)
+
+def verify_password(stored_hash, password):
+    return get_hasher().verify(stored_hash, password)
+
+def needs_rehash(stored_hash):
+    return get_hasher().needs_rehash(stored_hash)
+
+def rehash_in_background(user_id, stored_hash, password):
+    get_hasher().rehash_in_background(user_id, stored_hash, password)
@@ -3,20 +3,17 @@ import re
 import datetime
 from flask import render_template, redirect, url_for, flash, request, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import check_password_hash, generate_password_hash
 import bleach
 
-from app.auth import bp
+from app.auth import bp, lockout
+from app.auth.passwords import HashingBusy, hash_password, needs_rehash, rehash_in_background, verify_password
 from app.database import get_db
-from app.models import AuthUser
+from app.models import AuthUser, cache_user
 from app.utils import validate_password, normalize_department_name
 from app.extensions import limiter
 
 logger = logging.getLogger('mefportal')
 
-MAX_FAILED_ATTEMPTS = 5
-LOCKOUT_TIME = 15 * 60  # 15 minutes
-
 @bp.route('/login', methods=['GET', 'POST'])
 @limiter.limit("5 per minute")
 def login():
@@ -34,34 +31,31 @@ def login():
         flash("Database connection error", "danger")
         return render_template('login.html')
         
-    cur = db.cursor()
-    # Check DB-backed lockout
-    try:
-        cur.execute("SELECT failed_attempts, lockout_until FROM auth_lockouts WHERE register_number=%s", (register_number,))
-        row = cur.fetchone()
-        if row:
-            attempts, lockout_until = row[0], row[1]
-            if attempts >= MAX_FAILED_ATTEMPTS and lockout_until is not None:
-                # If still locked
-                cur.execute("SELECT NOW() < %s", (lockout_until,))
-                still_locked_res = cur.fetchone()
-                still_locked = still_locked_res[0] if still_locked_res else False
-                if still_locked:
-                    flash("Account locked due to too many failed attempts. Try again later.", "danger")
-                    cur.close()
-                    return render_template('login.html')
-    except Exception:
-        pass
+    lockout.start_sweeper()
 
+    # Recent identical failures and locked accounts are answered from memory
+    cached = lockout.recent_failure(register_number, password)
+    if cached == lockout.LOCKED:
+        flash("Account locked due to too many failed attempts. Try again later.", "danger")
+        return render_template('login.html')
+    if cached == lockout.INVALID:
+        flash("Invalid credentials", "danger")
+        return render_template('login.html')
+
+    cur = db.cursor()
     try:
-        cur.execute("SELECT * FROM users WHERE register_number=%s", (register_number,))
-        user = cur.fetchone()
+        user, locked_for, has_lockout = lockout.fetch_login(cur, register_number)
     except Exception:
         logger.exception("Database error during login")
         flash("Database error. Please try again.", "danger")
+        return render_template('login.html')
+    finally:
         cur.close()
+
+    if locked_for:
+        lockout.remember_lock(register_number, locked_for)
+        flash("Account locked due to too many failed attempts. Try again later.", "danger")
         return render_template('login.html')
-    cur.close()
 
     if user:
         # user structure: 0:id, 1:username, 2:name, 3:role, 4:password ...
@@ -72,68 +66,49 @@ def login():
             if stored_password and isinstance(stored_password, str) and (
                 stored_password.startswith('pbkdf2:') or stored_password.startswith('scrypt:')
             ):
-                is_valid_password = check_password_hash(stored_password, password)
+                is_valid_password = verify_password(stored_password, password)
+                if is_valid_password and needs_rehash(stored_password):
+                    rehash_in_background(user[0], stored_password, password)
             else:
                 # Plaintext fallback for dev
                 allow_plaintext = current_app.config.get('DEBUG')
                 if allow_plaintext and stored_password is not None and stored_password == password:
                     is_valid_password = True
-                    try:
-                        # Auto-migrate to hash
-                        new_hash = generate_password_hash(password)
-                        cur = db.cursor()
-                        cur.execute("UPDATE users SET password=%s, updated_at=NOW() WHERE id=%s", (new_hash, user[0]))
-                        db.commit()
-                        cur.close()
-                    except Exception:
-                        pass
+                    rehash_in_background(user[0], stored_password, password)
                 else:
                     is_valid_password = False
+        except HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "warning")
+            return render_template('login.html'), 503
         except Exception:
             is_valid_password = False
 
         if not stored_password or not is_valid_password:
-            # Update failed attempts
             try:
                 cur = db.cursor()
-                cur.execute("SELECT failed_attempts FROM auth_lockouts WHERE register_number=%s", (register_number,))
-                row = cur.fetchone()
-                if row:
-                    attempts = row[0] + 1
-                    if attempts >= MAX_FAILED_ATTEMPTS:
-                        cur.execute(
-                            "UPDATE auth_lockouts SET failed_attempts=%s, lockout_until=DATE_ADD(NOW(), INTERVAL %s SECOND) WHERE register_number=%s",
-                            (attempts, LOCKOUT_TIME, register_number)
-                        )
-                    else:
-                        cur.execute(
-                            "UPDATE auth_lockouts SET failed_attempts=%s WHERE register_number=%s",
-                            (attempts, register_number)
-                        )
-                else:
-                    cur.execute(
-                        "INSERT INTO auth_lockouts (register_number, failed_attempts, lockout_until) VALUES (%s,%s,NULL)",
-                        (register_number, 1)
-                    )
+                lockout.record_failure(cur, register_number)
                 db.commit()
                 cur.close()
             except Exception:
                 pass
+            lockout.remember_failure(register_number, password)
             flash("Invalid credentials", "danger")
             return render_template('login.html')
 
         # Successful login: reset lockouts
-        try:
-            cur = db.cursor()
-            cur.execute("DELETE FROM auth_lockouts WHERE register_number=%s", (register_number,))
-            db.commit()
-            cur.close()
-        except Exception:
-            pass
+        if has_lockout:
+            try:
+                cur = db.cursor()
+                lockout.clear(cur, register_number)
+                db.commit()
+                cur.close()
+            except Exception:
+                pass
 
         # Login the user
         auth_user = AuthUser(user)
         login_user(auth_user)
+        cache_user(auth_user)
 
         # Maintain session keys (Legacy Support)
         session['id'] = user[0]
@@ -161,6 +136,7 @@ def login():
             return redirect(url_for('main.dashboard'))
 
     else:
+        lockout.remember_failure(register_number, password, user_exists=False)
         flash("Invalid credentials", "danger")
         return render_template('login.html')
 
@@ -190,16 +166,10 @@ def register():
     try:
         # Fetch mentors
         cur.execute("""
-            SELECT name, email, 
-                   UPPER(TRIM(
-                       REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
-                           department,
-                           'iv-', ''), 'IV-', ''), 'v-', ''), 'V-', ''),
-                           'iv ', ''), 'IV ', ''), 'v ', ''), 'V ', '')
-                   )) as normalized_department
-            FROM users 
-            WHERE role='Mentor' 
-            ORDER BY normalized_department, name ASC
+            SELECT name, email, UPPER(department_key) as normalized_department
+            FROM users
+            WHERE role='Mentor'
+            ORDER BY department_key, name ASC
         """)
         mentors_data = cur.fetchall()
         mentors = [{'name': m[0], 'email': m[1], 'department': m[2]} for m in mentors_data]
@@ -263,7 +233,7 @@ def register():
             return render_template('register.html', mentors=mentors)
 
         try:
-            hashed_pw = generate_password_hash(password)
+            hashed_pw = hash_password(password)
             
             # Normalize student type
             st_lower = student_type.lower()
@@ -278,19 +248,20 @@ def register():
 
             if mentor_email:
                 query = """
-                    INSERT INTO users (username, name, register_number, password, email, role, department, year, dob, student_type, mentor_email)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                    INSERT INTO users (username, name, register_number, password, email, role, department, department_key, year, dob, student_type, mentor_email)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                 """
-                params = [register_number, name, register_number, hashed_pw, email, role, dept, year, formatted_dob, student_type, mentor_email]
+                params = [register_number, name, register_number, hashed_pw, email, role, dept, normalize_department_name(dept), year, formatted_dob, student_type, mentor_email]
             else:
                 query = """
-                    INSERT INTO users (username, name, register_number, password, email, role, department, year, dob, student_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                    INSERT INTO users (username, name, register_number, password, email, role, department, department_key, year, dob, student_type)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
                 """
-                params = [register_number, name, register_number, hashed_pw, email, role, dept, year, formatted_dob, student_type]
+                params = [register_number, name, register_number, hashed_pw, email, role, dept, normalize_department_name(dept), year, formatted_dob, student_type]
                 
             cur.execute(query, params)
             db.commit()
+            lockout.forget(register_number)
             cur.close()
             
             if role in ['Mentor', 'Advisor', 'HOD']:
@@ -0,0 +1,106 @@
+"""Request change feed kept in ``request_changes``.
+
+Every write that adds a request or moves its status also appends a row
+here, in the same transaction, so the feed's auto-increment ``id`` is a
+monotonically increasing change id. Readers remember the last id they
+saw and ask only for what came after it (``since``). That is one range
+scan on the primary key, however large the queues are, and it is what
+the staff queue streams (``app.sse``) are built on.
+
+Rows older than ``MEF_FEED_RETENTION_HOURS`` are pruned; a reader that
+falls further behind than that simply reloads.
+"""
+import os
+from collections import namedtuple
+
+FEED_CONFIG = {
+    'retention_hours': int(os.environ.get('MEF_FEED_RETENTION_HOURS', 48)),
+}
+
+# ``age``: seconds since the change was written (None when not known)
+Change = namedtuple(
+    'Change',
+    'id request_id department_key old_status new_status student_name type from_date to_date age',
+    defaults=(None,),
+)
+
+def record(cur, request_ids, old_status=None):
+    """Append the current status of ``request_ids``; ``old_status`` None means new"""
+    if not request_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(request_ids))
+    cur.execute(f"""
+        INSERT INTO request_changes (request_id, department_key, old_status, new_status)
+        SELECT id, department_key, %s, status FROM requests
+        WHERE id IN ({placeholders})
+        ORDER BY id
+    """, [old_status] + list(request_ids))
+
+def head(cur):
+    """The newest change id (0 for an empty feed)"""
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM request_changes")
+    return cur.fetchone()[0]
+
+def since(cur, after_id, department_key=None, limit=500):
+    """Changes after ``after_id``, oldest first, optionally for one department"""
+    condition, params = "c.id > %s", [after_id]
+    if department_key is not None:
+        condition += " AND c.department_key = %s"
+        params.append(department_key)
+    cur.execute(f"""
+        SELECT c.id, c.request_id, c.department_key, c.old_status, c.new_status,
+               r.student_name, r.type, r.from_date, r.to_date,
+               TIMESTAMPDIFF(SECOND, c.created_at, NOW())
+        FROM request_changes c
+        JOIN requests r ON r.id = c.request_id
+        WHERE {condition}
+        ORDER BY c.id
+        LIMIT %s
+    """, params + [limit])
+    return [Change(*row) for row in cur.fetchall()]
+
+def committed_prefix(rows, after_id, gap_timeout):
+    """The leading ``rows`` a reader can move past, and the id to resume after.
+
+    ``rows`` come from an unfiltered ``since(after_id)``. Ids are allotted
+    when a transaction inserts, not when it commits, so a missing id may
+    still appear. Reading stops at such a gap unless the row after it was
+    written more than ``gap_timeout`` seconds ago (the missing insert was
+    then rolled back).
+    """
+    last_id = after_id
+    for i, row in enumerate(rows):
+        if row.id != last_id + 1 and row.age is not None and row.age < gap_timeout:
+            return rows[:i], last_id
+        last_id = row.id
+    return rows, last_id
+
+def prune(cur, limit=5000):
+    """Delete one chunk of expired changes; returns how many went"""
+    cur.execute("""
+        DELETE FROM request_changes
+        WHERE created_at < NOW() - INTERVAL %s HOUR
+        ORDER BY id
+        LIMIT %s
+    """, (FEED_CONFIG['retention_hours'], limit))
+    return cur.rowcount
+
+class MemoryFeed:
+    """``head``/``since`` over a list, for tests and benchmarks"""
+
+    def __init__(self):
+        self.changes = []
+
+    def append(self, request_id, department_key, old_status, new_status, **fields):
+        change = Change(len(self.changes) + 1, request_id, department_key, old_status, new_status,
+                        fields.get('student_name', ''), fields.get('type', 'Leave'),
+                        fields.get('from_date'), fields.get('to_date'))
+        self.changes.append(change)
+        return change
+
+    def head(self):
+        return len(self.changes)
+
+    def since(self, after_id, department_key=None, limit=500):
+        rows = [c for c in self.changes[after_id:] if department_key in (None, c.department_key)]
+        return rows[:limit]
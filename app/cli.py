@@ -0,0 +1,223 @@
+import asyncio
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.database import get_db
+from app import assets, changes, fonts, jobs, mail, migrations, push, sse, stats, templating
+
+db_cli = AppGroup('db', help='Database schema commands.')
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Stop after this migration version.')
+def db_upgrade(target):
+    """Apply pending schema migrations."""
+    version = migrations.upgrade(get_db(), target=target)
+    click.echo(f"Schema at version {version}")
+
+@db_cli.command('current')
+def db_current():
+    """Show the applied and latest schema versions."""
+    cur = get_db().cursor()
+    try:
+        version = migrations.current_version(cur)
+    finally:
+        cur.close()
+    click.echo(f"Applied: {version}  Latest: {migrations.latest_version()}")
+    for number, name, _ in migrations.discover():
+        state = 'applied' if number <= version else 'pending'
+        click.echo(f"  {number:04d}_{name}  {state}")
+
+stats_cli = AppGroup('stats', help='Dashboard counter commands.')
+
+@stats_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user\'s counters.')
+def stats_rebuild(user_id):
+    """Recompute request_stats from the requests table."""
+    db = get_db()
+    cur = db.cursor()
+    try:
+        rows = stats.rebuild(cur, user_id=user_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+    click.echo(f"Rebuilt counters for {rows} user(s)")
+
+jobs_cli = AppGroup('jobs', help='Background report commands.')
+
+@jobs_cli.command('worker')
+@click.option('--processes', type=int, default=None, help='Renderer processes (default: MEF_JOBS_WORKERS).')
+@click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+def jobs_worker(processes, once):
+    """Render queued reports until stopped."""
+    jobs.Worker(workers=processes).run(once=once)
+
+@jobs_cli.command('cleanup')
+def jobs_cleanup():
+    """Delete expired report jobs and their files."""
+    db = get_db()
+    cur = db.cursor()
+    try:
+        removed = jobs.Worker().cleanup_expired(db, cur)
+    finally:
+        cur.close()
+    click.echo(f"Removed {removed} expired job(s)")
+
+templates_cli = AppGroup('templates', help='Template cache commands.')
+
+@templates_cli.command('compile')
+@click.option('--clear', is_flag=True, help='Drop cached bytecode first.')
+def templates_compile(clear):
+    """Compile every template into the bytecode cache."""
+    if current_app.jinja_env.bytecode_cache is None:
+        raise click.ClickException("The template bytecode cache is not configured")
+    if clear:
+        templating.clear_cache(current_app)
+    loaded, failed = templating.compile_templates(current_app)
+    click.echo(f"Compiled {len(loaded)} template(s) into {templating.TEMPLATE_CACHE_CONFIG['dir']}")
+    for name in failed:
+        click.echo(f"  failed: {name}", err=True)
+    if failed:
+        raise SystemExit(1)
+
+assets_cli = AppGroup('assets', help='Static asset commands.')
+
+@assets_cli.command('build')
+@click.option('--prune', is_flag=True, help='Delete files from earlier builds.')
+def assets_build(prune):
+    """Write fingerprinted assets and their manifest to static/dist."""
+    manifest = assets.build(current_app.static_folder, prune=prune)
+    current_app.extensions['mef_assets'].refresh()
+    click.echo(f"Built {len(manifest)} asset(s)")
+
+@assets_cli.command('fonts')
+@click.option('--icons', 'icons_dir', type=click.Path(exists=True, file_okay=False), default=None,
+              help='A Font Awesome 6 Free distribution (css/all.css and webfonts/).')
+@click.option('--text', 'text_dir', type=click.Path(exists=True, file_okay=False), default=None,
+              help='Static font files named like Inter-SemiBold.ttf.')
+@click.option('--download', is_flag=True, help='Fetch whatever is not given from cdnjs and Google Fonts.')
+def assets_fonts(icons_dir, text_dir, download):
+    """Subset the icon and text fonts to what the templates use."""
+    if not (icons_dir or text_dir or download):
+        raise click.UsageError("Give --icons and/or --text, or --download")
+    try:
+        report = fonts.build(current_app.static_folder, icons_dir=icons_dir, text_dir=text_dir, download=download)
+    except (RuntimeError, OSError) as e:
+        raise click.ClickException(str(e))
+    if report['glyphs']:
+        click.echo(f"Icons: {report['glyphs']} glyph(s)")
+    for family, weights in report['families'].items():
+        click.echo(f"{family}: {', '.join(map(str, weights))}")
+    for path, full, size in report['files']:
+        was = f" (from {full / 1024:.1f}KB)" if full else ''
+        click.echo(f"  {os.path.relpath(path, current_app.static_folder)}  {size / 1024:.1f}KB{was}")
+    manifest = assets.build(current_app.static_folder)
+    current_app.extensions['mef_assets'].refresh()
+    click.echo(f"Built {len(manifest)} asset(s)")
+
+push_cli = AppGroup('push', help='Web Push commands.')
+
+@push_cli.command('worker')
+@click.option('--concurrency', type=int, default=None, help='Pushes in flight (default: MEF_PUSH_CONCURRENCY).')
+@click.option('--once', is_flag=True, help='Exit once the outbox is empty.')
+def push_worker(concurrency, once):
+    """Send queued push notifications until stopped."""
+    config = {'concurrency': concurrency} if concurrency else None
+    push.Dispatcher(config=config).run(once=once)
+
+@push_cli.command('keys')
+def push_keys():
+    """Generate a VAPID key pair."""
+    if push.ec is None:
+        raise click.ClickException("Generating keys needs the cryptography package")
+    private, public = push.Vapid.generate()
+    click.echo(f"MEF_VAPID_PRIVATE_KEY={private}")
+    click.echo(f"MEF_VAPID_PUBLIC_KEY={public}")
+
+@push_cli.command('standin')
+@click.option('--port', type=int, default=8099, show_default=True)
+@click.option('--latency', type=float, default=0.0, help='Seconds before each response.')
+def push_standin(port, latency):
+    """Run a local push service that accepts and discards pushes."""
+    async def serve():
+        standin = await push.PushStandIn(port=port, latency=latency).start()
+        click.echo(f"Accepting pushes at {standin.url('<token>')}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+mail_cli = AppGroup('mail', help='Email notice commands.')
+
+@mail_cli.command('worker')
+@click.option('--connections', type=int, default=None, help='Parallel SMTP connections (default: MEF_MAIL_CONNECTIONS).')
+@click.option('--once', is_flag=True, help='Exit once the outbox is empty.')
+def mail_worker(connections, once):
+    """Send queued mail until stopped."""
+    config = {'connections': connections} if connections else None
+    mail.Sender(config=config).run(once=once)
+
+@mail_cli.command('digest')
+def mail_digest():
+    """Queue the mentor digests now."""
+    composed = mail.MailOutbox('cli').compose_digests()
+    click.echo(f"Queued {composed} digest(s)")
+
+@mail_cli.command('standin')
+@click.option('--port', type=int, default=8025, show_default=True)
+def mail_standin(port):
+    """Run a local SMTP server that prints what it receives."""
+    def show(sender, recipients, data):
+        subject = next((line for line in data.decode('utf-8', 'replace').splitlines() if line.startswith('Subject:')), '')
+        click.echo(f"{', '.join(recipients)}  {subject}")
+
+    server = mail.SMTPStandIn(port=port, on_message=show)
+    click.echo(f"Accepting mail on 127.0.0.1:{server.port}; set MAIL_PORT={server.port} MAIL_USE_TLS=false")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+sse_cli = AppGroup('sse', help='Live queue stream commands.')
+
+@sse_cli.command('serve')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', type=int, default=8090, show_default=True)
+def sse_serve(host, port):
+    """Hold the staff queue streams and fan the change feed out to them."""
+    sse.Hub(current_app.secret_key).run(host, port)
+
+@sse_cli.command('prune')
+def sse_prune():
+    """Delete change feed rows past MEF_FEED_RETENTION_HOURS."""
+    db = get_db()
+    cur = db.cursor()
+    removed = 0
+    try:
+        while True:
+            chunk = changes.prune(cur)
+            db.commit()
+            removed += chunk
+            if chunk <= 0:
+                break
+    finally:
+        cur.close()
+    click.echo(f"Removed {removed} change(s)")
+
+def register_cli(app):
+    """Attach the management commands to ``flask``"""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(templates_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(push_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(sse_cli)
@@ -1,8 +1,13 @@
 import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
 from flask import g
 import logging
+from app.migrations import ensure_schema
 
 logger = logging.getLogger('mefportal')
 
@@ -14,169 +19,207 @@ DB_CONFIG = {
     'autocommit': False
 }
 
+# Connection pool settings (per worker process)
+POOL_CONFIG = {
+    'size': int(os.environ.get('MEF_DB_POOL_SIZE', 5)),
+    'timeout': float(os.environ.get('MEF_DB_POOL_TIMEOUT', 10)),
+    'ping_interval': float(os.environ.get('MEF_DB_POOL_PING_INTERVAL', 5)),
+    'recycle': float(os.environ.get('MEF_DB_POOL_RECYCLE', 3600)),
+}
+
+class ConnectionPool:
+    """Process-wide pool of MySQL connections.
+
+    Connections are checked out for the lifetime of a request and handed back
+    at teardown. A connection that sat idle longer than ``ping_interval`` is
+    pinged before reuse, and one older than ``recycle`` is replaced.
+    """
+
+    def __init__(self, config, size=5, timeout=10.0, ping_interval=5.0, recycle=3600.0):
+        self.config = dict(config)
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.recycle = recycle
+        self._idle = deque()  # (connection, created_at, last_used)
+        self._created = {}
+        self._cond = threading.Condition(threading.Lock())
+        self._open = 0
+        self._in_use = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._checkouts = 0
+        self._checkout_total = 0.0
+        self._checkout_max = 0.0
+
+    def acquire(self):
+        """Check out a live connection, waiting up to ``timeout`` seconds"""
+        start = time.monotonic()
+        entry = None
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if self._idle or self._open < self.size:
+                        continue
+                    self._timeouts += 1
+                    raise Error(msg=f"Timed out after {self.timeout}s waiting for a pooled connection")
+            self._in_use += 1
+
+        try:
+            db = self._checkout(entry)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_total += elapsed
+            self._checkout_max = max(self._checkout_max, elapsed)
+        return db
+
+    def release(self, db):
+        """Return a connection to the pool, discarding it if it is unusable"""
+        reusable = True
+        try:
+            if db.unread_result:
+                db.consume_results()
+            if db.in_transaction:
+                db.rollback()
+        except Exception:
+            reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((db, self._created.get(id(db), time.monotonic()), time.monotonic()))
+            else:
+                self._open -= 1
+                self._created.pop(id(db), None)
+            self._cond.notify()
+
+        if not reusable:
+            self._close_quietly(db)
+
+    def stats(self):
+        """Snapshot of pool usage for sizing the pool per worker"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'checkouts': self._checkouts,
+                'avg_checkout_ms': round(self._checkout_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'max_checkout_ms': round(self._checkout_max * 1000, 3),
+            }
+
+    def close(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for db, _, _ in idle:
+            self._created.pop(id(db), None)
+            self._close_quietly(db)
+
+    def _checkout(self, entry):
+        now = time.monotonic()
+        if entry is not None:
+            db, created_at, last_used = entry
+            if now - created_at < self.recycle:
+                if now - last_used < self.ping_interval:
+                    return db
+                try:
+                    db.ping(reconnect=False)
+                    return db
+                except Exception:
+                    logger.info("Discarding dead pooled MySQL connection")
+            self._created.pop(id(db), None)
+            self._close_quietly(db)
+
+        db = mysql.connector.connect(**self.config)
+        self._created[id(db)] = time.monotonic()
+        return db
+
+    @staticmethod
+    def _close_quietly(db):
+        try:
+            db.close()
+        except Exception:
+            pass
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the connection pool for this process, creating it on first use"""
+    global _pool, _pool_pid
+    # A forked worker must never share its parent's sockets
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+@contextmanager
+def pooled_connection():
+    """A pooled connection outside a request (workers, background threads)"""
+    pool = get_pool()
+    db = pool.acquire()
+    try:
+        yield db
+    finally:
+        pool.release(db)
+
+def pool_stats():
+    return get_pool().stats()
+
 def get_db():
     """Get database connection for the current request context"""
     db = getattr(g, '_database', None)
     if db is None:
         try:
-            # Attempt MySQL connection
-            db = g._database = mysql.connector.connect(**DB_CONFIG)
+            db = g._database = get_pool().acquire()
         except Error as e:
             raise Exception(f"MySQL connection required but failed: {e}")
     return db
 
 def close_db(e=None):
-    """Close database connection on teardown"""
-    db = getattr(g, '_database', None)
+    """Return the request's connection to the pool on teardown"""
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        get_pool().release(db)
 
 def init_app(app):
     """Register database functions with the Flask app"""
     app.teardown_appcontext(close_db)
 
 def init_db():
-    """Initialize the database with tables"""
+    """Bring the schema up to date; a single version check when it already is"""
     db = get_db()
     if db is None:
         return
-        
-    cur = db.cursor()
     try:
-        create_tables_if_not_exist(cur, db)
-        add_missing_columns(cur, db)
-        db.commit()
+        version = ensure_schema(db)
+        logger.info(f"Database schema at version {version}")
     except Exception:
         logger.exception("Database update error")
-        db.rollback()
-    finally:
-        cur.close()
-
-def create_tables_if_not_exist(cur, db):
-    """Create tables if they don't exist"""
-    try:
-        # Create users table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(100) UNIQUE NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                role ENUM('Student', 'Mentor', 'Advisor', 'HOD') DEFAULT 'Student',
-                password VARCHAR(255),
-                register_number VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                year VARCHAR(10) DEFAULT '1',
-                dob DATE NOT NULL,
-                student_type ENUM('Day Scholar', 'Hosteller') DEFAULT 'Day Scholar',
-                mentor_email VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create requests table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS requests (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                type VARCHAR(50) NOT NULL,
-                reason TEXT NOT NULL,
-                from_date DATE NOT NULL,
-                to_date DATE NOT NULL,
-                status ENUM('Pending', 'Mentor Approved', 'Mentor Rejected', 'Advisor Approved', 'Advisor Rejected', 'Approved', 'Rejected') DEFAULT 'Pending',
-                student_name VARCHAR(100) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                request_type ENUM('Leave', 'Permission', 'Apology', 'Bonafide', 'OD') DEFAULT 'Leave',
-                advisor_note TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create permissions table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS permissions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                student_name VARCHAR(100) NOT NULL,
-                department VARCHAR(100) NOT NULL,
-                custom_subject VARCHAR(200) NOT NULL,
-                reason TEXT NOT NULL,
-                from_date DATE NOT NULL,
-                to_date DATE NOT NULL,
-                status ENUM('Pending', 'Approved', 'Rejected') DEFAULT 'Pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-
-        # Create auth_lockouts table for DB-backed lockouts
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS auth_lockouts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                register_number VARCHAR(50) UNIQUE NOT NULL,
-                failed_attempts INT NOT NULL DEFAULT 0,
-                lockout_until DATETIME NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Create push_subscriptions table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS push_subscriptions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                endpoint TEXT NOT NULL,
-                p256dh VARCHAR(255),
-                auth VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                UNIQUE KEY uniq_user_endpoint (user_id, endpoint(255)),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        
-    except Exception:
-        logger.exception("Error creating tables")
-        raise
-
-def add_missing_columns(cur, db):
-    """Add missing columns to existing tables"""
-    try:
-        # Check if student_type column exists in users table
-        cur.execute("SHOW COLUMNS FROM users LIKE 'student_type'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE users 
-                ADD COLUMN student_type ENUM('Day Scholar', 'Hosteller') DEFAULT 'Day Scholar'
-            """)
-        
-        # Check if mentor_email column exists in users table
-        cur.execute("SHOW COLUMNS FROM users LIKE 'mentor_email'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE users 
-                ADD COLUMN mentor_email VARCHAR(100)
-            """)
-        
-        # Check if request_type column exists in requests table
-        cur.execute("SHOW COLUMNS FROM requests LIKE 'request_type'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE requests 
-                ADD COLUMN request_type ENUM('Leave', 'Permission', 'Apology', 'Bonafide', 'OD') DEFAULT 'Leave'
-            """)
-        
-        # Check if advisor_note column exists in requests table
-        cur.execute("SHOW COLUMNS FROM requests LIKE 'advisor_note'")
-        if not cur.fetchone():
-            cur.execute("""
-                ALTER TABLE requests 
-                ADD COLUMN advisor_note TEXT
-            """)
-            
-    except Exception:
-        raise
@@ -4,6 +4,8 @@ from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
 import logging
 
+from app.limiter_storage import RATELIMIT_CONFIG
+
 # Initialize extensions
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
@@ -11,12 +13,12 @@ login_manager.login_message_category = 'info'
 
 csrf = CSRFProtect()
 
-# Initialize Rate Limiter
+# Initialize Rate Limiter; counters are shared by all workers (app/limiter_storage.py)
 limiter = Limiter(
     key_func=get_remote_address,
-    storage_uri="memory://",
+    storage_uri=RATELIMIT_CONFIG['storage_uri'],
     storage_options={},
-    strategy="fixed-window"
+    strategy=RATELIMIT_CONFIG['strategy']
 )
 
 # Logging
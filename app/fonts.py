@@ -0,0 +1,369 @@
+"""Self-hosted, subsetted web fonts and icons.
+
+Pages used to load the whole Font Awesome stylesheet from cdnjs and
+Poppins, Inter or Outfit from Google Fonts. That is two or three extra
+origins (DNS, TLS, render-blocking CSS) before the first paint, and three
+icon fonts of ~150KB each for the few dozen glyphs the portal shows.
+``build`` scans the templates and scripts for the ``fa-*`` classes
+and the stylesheets for the font weights in use, and writes into
+``static/src/``:
+
+- ``css/icons.css``: only the Font Awesome rules for the classes found;
+- ``fonts/fa-*.woff2``: the icon fonts cut down to those glyphs;
+- ``css/fonts/<family>.css`` and ``fonts/<family>-*.woff2``: each text
+  font in the weights found, limited to Latin.
+
+These are published fingerprinted and cached like every other asset.
+Templates load them through ``components/fonts.html``, which falls back
+to the CDNs for anything not generated yet. The generated files are
+committed, so this only needs rerunning when a page starts using a new
+icon or weight:
+
+    flask --app run:create_app assets fonts --download
+    flask --app run:create_app assets fonts --icons path/to/fontawesome --text path/to/ttf
+
+Subsetting needs the ``fonttools`` and ``brotli`` packages; serving the
+result does not.
+"""
+import logging
+import os
+import re
+import tempfile
+import urllib.parse
+import urllib.request
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # optional: only needed to regenerate the fonts
+    subset = TTFont = None
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FONT_CONFIG = {
+    'static_dir': os.path.join(_BASE_DIR, 'static'),
+    'templates_dir': os.path.join(_BASE_DIR, 'templates'),
+}
+
+FA_VERSION = '6.4.0'
+FA_CDN = f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FA_VERSION}/'
+
+# Font file stem -> the classes that select it
+FA_STYLES = {
+    'fa-solid-900': {'fa', 'fas', 'fa-solid'},
+    'fa-regular-400': {'far', 'fa-regular'},
+    'fa-brands-400': {'fab', 'fa-brands'},
+}
+
+# Families the templates load, and the weights requested when falling back
+TEXT_FONTS = ('Inter', 'Poppins', 'Outfit')
+GOOGLE_FONTS_CSS = 'https://fonts.googleapis.com/css2'
+# Google Fonts only serves woff2 to browsers it recognises
+WOFF2_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+# Google's "latin" subset, plus the rupee sign
+LATIN = (
+    'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, '
+    'U+0304, U+0308, U+0329, U+2000-206F, U+2074, U+20AC, U+20B9, U+2122, '
+    'U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD'
+)
+
+WEIGHT_NAMES = {
+    'thin': 100, 'extralight': 200, 'light': 300, 'regular': 400, 'normal': 400, 'medium': 500,
+    'semibold': 600, 'bold': 700, 'extrabold': 800, 'black': 900,
+}
+
+ICONS_CSS = 'css/icons.css'
+FONTS_DIR = 'fonts'
+TEXT_CSS_DIR = 'css/fonts'
+TAILWIND_CONFIG = 'js/tailwind-config.js'
+
+ICON_CLASS = re.compile(r'(?<![\w-])fa(?:[srb]|(?:-[a-z0-9]+)+)?(?![\w-])')
+JS_STRING = re.compile(r'([\'"`])((?:\\.|(?!\1).)*?)\1', re.S)
+CSS_CLASS = re.compile(r'\.(fa[\w-]*)')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+LICENSE_COMMENT = re.compile(r'/\*!.*?\*/', re.S)
+GLYPH = re.compile(r'content:\s*"\\([0-9a-fA-F]+)\s*"')
+FONT_WEIGHT = re.compile(r'font-weight:\s*(\d{3}|bold|normal)')
+TAILWIND_WEIGHT = re.compile(r'(?<![\w-])font-(thin|extralight|light|normal|medium|semibold|bold|extrabold|black)(?![\w-])')
+FONT_FACE_URL = re.compile(r'url\(["\']?[^"\')]*/([\w-]+)\.(?:woff2|ttf)["\']?\)')
+GOOGLE_FACE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}')
+
+def _require_fonttools():
+    if subset is None:
+        raise RuntimeError("Subsetting fonts needs the fonttools and brotli packages")
+
+def _slug(family):
+    return re.sub(r'[^a-z0-9]+', '-', family.lower()).strip('-')
+
+def _read_text(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+def _files(root, extensions, skip=()):
+    for directory, _, files in os.walk(root):
+        for filename in sorted(files):
+            path = os.path.join(directory, filename)
+            if filename.endswith(extensions) and not any(path.startswith(s) for s in skip):
+                yield path
+
+def _generated(static_dir):
+    src = os.path.join(static_dir, 'src')
+    return (os.path.join(src, ICONS_CSS), os.path.join(src, TEXT_CSS_DIR) + os.sep)
+
+def used_icon_classes(templates_dir=None, static_dir=None):
+    """``fa``/``fa-*`` classes that appear in the templates or static scripts"""
+    templates_dir = templates_dir or FONT_CONFIG['templates_dir']
+    static_dir = static_dir or FONT_CONFIG['static_dir']
+    used = set()
+    for path in _files(templates_dir, ('.html',)):
+        used.update(ICON_CLASS.findall(_read_text(path)))
+    # Only string literals in scripts, so a variable named ``fab`` is not a class
+    for path in _files(static_dir, ('.js',), skip=(os.path.join(static_dir, 'dist'),)):
+        for _, literal in JS_STRING.findall(_read_text(path)):
+            used.update(ICON_CLASS.findall(literal))
+    return used
+
+def used_font_weights(templates_dir=None, static_dir=None, families=TEXT_FONTS):
+    """Family -> weights set in the stylesheets that use it.
+
+    A stylesheet's ``font-weight`` values count for every family it
+    names; families configured as a Tailwind font take the weights of the
+    ``font-*`` classes in the templates. 400 and 700 (``<strong>``) are
+    always included.
+    """
+    templates_dir = templates_dir or FONT_CONFIG['templates_dir']
+    static_dir = static_dir or FONT_CONFIG['static_dir']
+    weights = {family: {400, 700} for family in families}
+    skip = _generated(static_dir) + (os.path.join(static_dir, 'dist'),)
+
+    def named(text):
+        return [family for family in families if re.search(rf"\b{re.escape(family)}\b", text)]
+
+    for path in _files(static_dir, ('.css',), skip=skip):
+        text = _read_text(path)
+        found = {int(w) if w.isdigit() else WEIGHT_NAMES[w] for w in FONT_WEIGHT.findall(text)}
+        for family in named(text):
+            weights[family].update(found)
+    tailwind_config = os.path.join(static_dir, 'src', TAILWIND_CONFIG)
+    if os.path.exists(tailwind_config):
+        found = set()
+        for template in _files(templates_dir, ('.html',)):
+            found.update(WEIGHT_NAMES[name] for name in TAILWIND_WEIGHT.findall(_read_text(template)))
+        for family in named(_read_text(tailwind_config)):
+            weights[family].update(found)
+    return {family: sorted(found) for family, found in weights.items()}
+
+def _rules(css):
+    """Top-level ``(prelude, body)`` pairs of a stylesheet, comments removed"""
+    css = CSS_COMMENT.sub('', css)
+    rules, depth, start, body_start = [], 0, 0, 0
+    for i, ch in enumerate(css):
+        if ch == '{':
+            if depth == 0:
+                body_start = i + 1
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:body_start - 1].strip(), css[body_start:i]))
+                start = i + 1
+    return rules
+
+def _shake(rules, used):
+    """Rules from ``rules`` that apply to a class in ``used`` (or to none)"""
+    kept = []
+    for prelude, body in rules:
+        if prelude.startswith('@media') or prelude.startswith('@supports'):
+            inner = _shake(_rules(body), used)
+            if inner:
+                kept.append(f"{prelude} {{\n{''.join(inner)}}}\n")
+        elif prelude.startswith('@keyframes'):
+            if prelude.split()[1] in used:
+                kept.append(f"{prelude} {{{body}}}\n")
+        elif not prelude.startswith('@'):
+            selectors = [s.strip() for s in prelude.split(',') if set(CSS_CLASS.findall(s)) <= used]
+            if selectors:
+                kept.append(',\n'.join(selectors) + f" {{{body}}}\n")
+    return kept
+
+def _subset(source, unicodes, target):
+    """Write ``source`` cut down to ``unicodes`` as woff2; returns its size"""
+    options = subset.Options()
+    options.flavor = 'woff2'
+    logging.getLogger('fontTools').setLevel(logging.WARNING)
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    subset.save_font(font, target, options)
+    return os.path.getsize(target)
+
+def _cmap(path):
+    with TTFont(path, lazy=True) as font:
+        return set(font.getBestCmap())
+
+def _find_font(directory, stem):
+    for extension in ('.woff2', '.ttf', '.otf'):
+        for path in _files(directory, (stem + extension,)):
+            return path
+    return None
+
+def build_icons(source_dir, static_dir=None, used=None):
+    """Write ``css/icons.css`` and the icon fonts from a Font Awesome 6 Free
+    distribution (``css/all.css`` and ``webfonts/``) in ``source_dir``.
+
+    Returns ``(glyphs, [(path, full size, subset size)])``.
+    """
+    _require_fonttools()
+    static_dir = static_dir or FONT_CONFIG['static_dir']
+    used = used_icon_classes(static_dir=static_dir) if used is None else used
+    css = _read_text(os.path.join(source_dir, 'css', 'all.css'))
+    license_header = LICENSE_COMMENT.search(css)
+    rules = [(prelude, body) for prelude, body in _rules(css) if prelude != '@font-face']
+    kept = _shake(rules, used)
+    codepoints = {int(code, 16) for rule in kept for code in GLYPH.findall(rule)}
+
+    faces, written = [], []
+    for prelude, body in _rules(css):
+        match = FONT_FACE_URL.search(body)
+        if prelude != '@font-face' or not match or "Font Awesome 6" not in body:
+            continue
+        stem = match.group(1)
+        source = _find_font(source_dir, stem)
+        if stem not in FA_STYLES or not FA_STYLES[stem] & used or source is None:
+            continue
+        glyphs = codepoints & _cmap(source)
+        if not glyphs:
+            continue
+        target = os.path.join(static_dir, 'src', FONTS_DIR, stem + '.woff2')
+        size = _subset(source, glyphs, target)
+        written.append((target, os.path.getsize(source), size))
+        src = f'src: url("../{FONTS_DIR}/{stem}.woff2") format("woff2");'
+        faces.append(f"@font-face {{{re.sub(r'src:[^;]*;', src, body)}}}\n")
+
+    header = license_header.group(0) + '\n' if license_header else ''
+    note = "/* Generated by `flask assets fonts` from the classes the templates use; do not edit. */\n"
+    target = os.path.join(static_dir, 'src', ICONS_CSS)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write(header + note + ''.join(kept) + '\n' + ''.join(faces))
+    written.append((target, len(css.encode()), os.path.getsize(target)))
+    return len(codepoints), written
+
+def _text_sources(source_dir, family):
+    """Weight -> static font file for ``family`` under ``source_dir``,
+    named like Google's downloads (``Inter-SemiBold.ttf``)"""
+    sources = {}
+    pattern = re.compile(rf'^{re.escape(family.replace(" ", ""))}-(\w+)\.(?:ttf|otf|woff2)$', re.I)
+    for path in _files(source_dir, ('.ttf', '.otf', '.woff2')):
+        match = pattern.match(os.path.basename(path))
+        if match and match.group(1).lower() in WEIGHT_NAMES:
+            sources.setdefault(WEIGHT_NAMES[match.group(1).lower()], path)
+    return sources
+
+def build_text_font(family, weights, sources, static_dir=None):
+    """Write ``css/fonts/<family>.css`` with one Latin face per source.
+
+    ``sources`` maps a weight, or a ``(low, high)`` range for a variable
+    font, to a font file. Returns ``[(path, full size, subset size)]``.
+    """
+    _require_fonttools()
+    static_dir = static_dir or FONT_CONFIG['static_dir']
+    unicodes = subset.parse_unicodes(LATIN.replace(' ', ''))
+    slug = _slug(family)
+    faces, written = [], []
+    for weight, source in sorted(sources.items(), key=lambda item: str(item[0])):
+        label = '-'.join(map(str, weight)) if isinstance(weight, tuple) else str(weight)
+        target = os.path.join(static_dir, 'src', FONTS_DIR, f'{slug}-{label}.woff2')
+        size = _subset(source, unicodes, target)
+        written.append((target, os.path.getsize(source), size))
+        faces.append(
+            "@font-face {\n"
+            f"  font-family: '{family}';\n"
+            "  font-style: normal;\n"
+            f"  font-weight: {label.replace('-', ' ')};\n"
+            "  font-display: swap;\n"
+            f'  src: url("../../{FONTS_DIR}/{slug}-{label}.woff2") format("woff2");\n'
+            f"  unicode-range: {LATIN};\n"
+            "}\n"
+        )
+    target = os.path.join(static_dir, 'src', TEXT_CSS_DIR, f'{slug}.css')
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write(f"/* {family} {', '.join(map(str, weights))}; generated by `flask assets fonts`. */\n" + ''.join(faces))
+    written.append((target, 0, os.path.getsize(target)))
+    return written
+
+def _fetch(url, target=None):
+    request = urllib.request.Request(url, headers={'User-Agent': WOFF2_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        data = response.read()
+    if target is not None:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+    return data
+
+def download_icons(directory):
+    """Fetch Font Awesome ``FA_VERSION`` from cdnjs into ``directory``"""
+    _fetch(FA_CDN + 'css/all.css', os.path.join(directory, 'css', 'all.css'))
+    for stem in FA_STYLES:
+        _fetch(f'{FA_CDN}webfonts/{stem}.woff2', os.path.join(directory, 'webfonts', stem + '.woff2'))
+    return directory
+
+def download_text_font(family, weights, directory):
+    """Fetch the Latin faces of ``family`` from Google Fonts into ``directory``.
+
+    Returns sources for ``build_text_font``. Variable families serve one
+    file for every weight; those weights share a single ranged face.
+    """
+    query = urllib.parse.urlencode({'family': f"{family}:wght@{';'.join(map(str, weights))}", 'display': 'swap'})
+    css = _fetch(f'{GOOGLE_FONTS_CSS}?{query}').decode()
+    by_url = {}
+    for subset_name, body in GOOGLE_FACE.findall(css):
+        weight = re.search(r'font-weight:\s*(\d+)', body)
+        url = re.search(r'url\(([^)]+)\)', body)
+        if subset_name == 'latin' and weight and url and 'italic' not in body:
+            by_url.setdefault(url.group(1), []).append(int(weight.group(1)))
+    sources = {}
+    for i, (url, found) in enumerate(sorted(by_url.items())):
+        path = os.path.join(directory, f'{_slug(family)}-{i}.woff2')
+        _fetch(url, path)
+        key = found[0] if len(found) == 1 else (min(found), max(found))
+        sources[key] = path
+    return sources
+
+def build(static_dir=None, icons_dir=None, text_dir=None, download=False, families=TEXT_FONTS):
+    """Regenerate the icon subset and text fonts; returns a report.
+
+    Icons come from ``icons_dir`` and text fonts from ``text_dir`` when
+    given, otherwise from the CDNs if ``download`` is set. Families with
+    no source are left as they are (the pages keep loading them from
+    Google Fonts).
+    """
+    _require_fonttools()
+    static_dir = static_dir or FONT_CONFIG['static_dir']
+    report = {'glyphs': 0, 'families': {}, 'files': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        if icons_dir is None and download:
+            icons_dir = download_icons(os.path.join(tmp, 'fontawesome'))
+        if icons_dir is not None:
+            report['glyphs'], written = build_icons(icons_dir, static_dir)
+            report['files'] += written
+        weights = used_font_weights(static_dir=static_dir, families=families)
+        for family in families:
+            if text_dir is not None:
+                sources = {w: path for w, path in _text_sources(text_dir, family).items() if w in weights[family]}
+            elif download:
+                sources = download_text_font(family, weights[family], os.path.join(tmp, 'text'))
+            else:
+                sources = {}
+            if sources:
+                report['families'][family] = weights[family]
+                report['files'] += build_text_font(family, weights[family], sources, static_dir)
+    return report
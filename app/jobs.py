@@ -0,0 +1,349 @@
+"""Background report jobs.
+
+Large PDFs are rendered outside the web workers. A request enqueues a row
+in ``report_jobs``; ``flask jobs worker`` claims queued rows and renders
+them in a process pool, writing each result under ``MEF_JOBS_DIR``. The
+table is the only queue, so no broker is needed and queued work survives
+restarts: a running job whose heartbeat goes stale (its worker died) is
+put back in the queue, up to ``MEF_JOBS_MAX_ATTEMPTS`` tries.
+
+Finished artifacts expire after ``MEF_JOBS_TTL_HOURS``; the worker
+deletes the files and their rows as part of its regular maintenance.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from app import reports
+from app.database import get_pool, pooled_connection
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOBS_CONFIG = {
+    'directory': os.environ.get('MEF_JOBS_DIR', os.path.join(BASE_DIR, 'cache', 'jobs')),
+    'workers': int(os.environ.get('MEF_JOBS_WORKERS', max(1, (os.cpu_count() or 2) // 2))),
+    'ttl': int(os.environ.get('MEF_JOBS_TTL_HOURS', 24)) * 3600,
+    'stale_after': int(os.environ.get('MEF_JOBS_STALE_SECONDS', 120)),
+    'max_attempts': int(os.environ.get('MEF_JOBS_MAX_ATTEMPTS', 3)),
+    'max_active_per_user': int(os.environ.get('MEF_JOBS_MAX_ACTIVE_PER_USER', 3)),
+    'poll_interval': float(os.environ.get('MEF_JOBS_POLL_INTERVAL', 1)),
+}
+
+JOB_COLUMNS = ('id', 'user_id', 'kind', 'status', 'attempts', 'artifact_path', 'artifact_name',
+               'error', 'created_at', 'started_at', 'finished_at', 'expires_at')
+
+class JobLimitError(Exception):
+    """The user already has the maximum number of jobs queued or running"""
+
+# ---------- Web side ----------
+
+def enqueue(cur, user_id, kind, params):
+    """Queue a job and return its id; the caller commits"""
+    if kind not in RENDERERS:
+        raise ValueError(f"Unknown report kind: {kind}")
+
+    cur.execute("""
+        SELECT COUNT(*) FROM report_jobs
+        WHERE user_id = %s AND status IN ('queued', 'running')
+    """, (user_id,))
+    if cur.fetchone()[0] >= JOBS_CONFIG['max_active_per_user']:
+        raise JobLimitError("Too many reports in progress")
+
+    cur.execute(
+        "INSERT INTO report_jobs (user_id, kind, params) VALUES (%s, %s, %s)",
+        (user_id, kind, json.dumps(params, default=str))
+    )
+    return cur.lastrowid
+
+def get_job(cur, job_id, user_id):
+    """A user's job as a dict, or None if it does not exist or is not theirs"""
+    cur.execute(f"""
+        SELECT {', '.join(JOB_COLUMNS)} FROM report_jobs
+        WHERE id = %s AND user_id = %s
+    """, (job_id, user_id))
+    row = cur.fetchone()
+    return dict(zip(JOB_COLUMNS, row)) if row else None
+
+def artifact_file(job):
+    """Absolute path of a finished job's PDF, or None if it is gone"""
+    if job['status'] != 'done' or not job['artifact_path']:
+        return None
+    path = os.path.join(JOBS_CONFIG['directory'], os.path.basename(job['artifact_path']))
+    return path if os.path.exists(path) else None
+
+# ---------- Renderers (run in pool processes) ----------
+
+def _render_status_report(db, params, out):
+    cur = db.cursor(buffered=False)
+    try:
+        query, query_params = reports.status_report_query(
+            params['user_id'], params.get('date', ''), params.get('status', ''), params.get('search', '')
+        )
+        cur.execute(query, query_params)
+        for chunk in reports.stream_status_report(
+            reports.iter_rows(cur), reports.EXPORT_MAX_ROWS,
+            params.get('student_name') or 'N/A', params.get('department') or 'N/A'
+        ):
+            out.write(chunk)
+    finally:
+        try:
+            cur.close()
+        except Exception:
+            pass
+    return reports.status_report_filename(params.get('date', ''), params.get('status', ''), params.get('search', ''))
+
+def _render_approval_letter(db, params, out):
+    cur = db.cursor()
+    try:
+        cur.execute(
+            f"SELECT {reports.APPROVAL_LETTER_COLUMNS} FROM requests WHERE id=%s AND user_id=%s AND status='Approved'",
+            (params['request_id'], params['user_id'])
+        )
+        request_data = cur.fetchone()
+    finally:
+        cur.close()
+    if not request_data:
+        raise LookupError("Approved request not found")
+    out.write(reports.render_approval_letter(
+        request_data, params.get('student_name') or 'N/A', params.get('department') or 'N/A'
+    ))
+    return f"approved_leave_{request_data[0]}.pdf"
+
+RENDERERS = {
+    'status_report': _render_status_report,
+    'approval_letter': _render_approval_letter,
+}
+
+def render_job(job_id, kind, params, directory):
+    """Pool entry point: render one job and return ``(file name, download name)``"""
+    # Unique per run: a requeued job may be rendered again by another worker
+    filename = f"{job_id}-{os.urandom(4).hex()}.pdf"
+    path = os.path.join(directory, filename)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pool = get_pool()
+    db = pool.acquire()
+    try:
+        with open(tmp_path, 'wb') as out:
+            download_name = RENDERERS[kind](db, json.loads(params), out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        pool.release(db)
+    return filename, download_name
+
+# ---------- Worker ----------
+
+class Worker:
+    """Claims queued jobs and renders them in a process pool.
+
+    Pool processes are spawned rather than forked, so they never share
+    the parent's MySQL sockets.
+    """
+
+    def __init__(self, workers=None, config=None):
+        self.config = dict(JOBS_CONFIG, **(config or {}))
+        self.workers = workers or self.config['workers']
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        self._executor = None
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self, once=False):
+        """Process jobs until stopped (SIGTERM/SIGINT), or until idle if ``once``"""
+        os.makedirs(self.config['directory'], exist_ok=True)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        maintenance_every = max(1, self.config['stale_after'] / 4)
+        last_maintenance = 0.0
+        running = {}
+        self._executor = self._new_executor()
+        logger.info("Report worker %s started with %d processes", self.name, self.workers)
+        try:
+            while running or not self.stopping:
+                now = time.monotonic()
+                if now - last_maintenance >= maintenance_every:
+                    self.maintain(running.values())
+                    last_maintenance = now
+
+                while not self.stopping and len(running) < self.workers:
+                    job = self.claim()
+                    if job is None:
+                        break
+                    job_id, kind, params = job
+                    try:
+                        future = self._executor.submit(render_job, job_id, kind, params, self.config['directory'])
+                    except BrokenProcessPool:
+                        self._executor = self._new_executor()
+                        future = self._executor.submit(render_job, job_id, kind, params, self.config['directory'])
+                    running[future] = job_id
+
+                if running:
+                    done, _ = wait(running, timeout=self.config['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.finish(running.pop(future), future)
+                elif once:
+                    break
+                else:
+                    time.sleep(self.config['poll_interval'])
+        finally:
+            self._executor.shutdown(wait=True)
+            logger.info("Report worker %s stopped", self.name)
+
+    def _new_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def claim(self):
+        """Atomically take the oldest queued job: ``(id, kind, params)`` or None"""
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                # LAST_INSERT_ID(id) hands back the id of the row this UPDATE took
+                cur.execute("""
+                    UPDATE report_jobs
+                    SET status = 'running', worker = %s, attempts = attempts + 1,
+                        started_at = NOW(), heartbeat_at = NOW(), id = LAST_INSERT_ID(id)
+                    WHERE status = 'queued'
+                    ORDER BY id
+                    LIMIT 1
+                """, (self.name,))
+                if cur.rowcount != 1:
+                    db.commit()
+                    return None
+                job_id = cur.lastrowid
+                cur.execute("SELECT kind, params FROM report_jobs WHERE id = %s", (job_id,))
+                kind, params = cur.fetchone()
+                db.commit()
+                return job_id, kind, params
+            finally:
+                cur.close()
+
+    def finish(self, job_id, future):
+        error = future.exception()
+        # Only while the job is still ours: if the stale sweep requeued it
+        # and another worker took it, that run's result stands
+        owned, owned_params = "id = %s AND status = 'running' AND worker = %s", [job_id, self.name]
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                if error is None:
+                    filename, download_name = future.result()
+                    cur.execute(f"""
+                        UPDATE report_jobs
+                        SET status = 'done', artifact_path = %s, artifact_name = %s, error = NULL,
+                            finished_at = NOW(), expires_at = NOW() + INTERVAL %s SECOND
+                        WHERE {owned}
+                    """, [filename, download_name, self.config['ttl']] + owned_params)
+                    if cur.rowcount == 0:
+                        logger.warning("Report job %s was taken over by another worker; discarding %s",
+                                       job_id, filename)
+                        try:
+                            os.unlink(os.path.join(self.config['directory'], filename))
+                        except OSError:
+                            pass
+                else:
+                    logger.error("Report job %s failed: %r", job_id, error)
+                    if isinstance(error, BrokenProcessPool):
+                        self._executor = self._new_executor()
+                    self._retry_or_fail(cur, owned, owned_params, str(error)[:255] or type(error).__name__)
+                db.commit()
+            finally:
+                cur.close()
+
+    def _retry_or_fail(self, cur, where, params, error):
+        # Assignments apply left to right, so status is decided before
+        # anything else changes
+        cur.execute(f"""
+            UPDATE report_jobs
+            SET status = IF(attempts >= %s, 'failed', 'queued'),
+                error = %s,
+                worker = NULL,
+                heartbeat_at = NULL,
+                finished_at = IF(status = 'failed', NOW(), NULL),
+                expires_at = IF(status = 'failed', NOW() + INTERVAL %s SECOND, NULL)
+            WHERE {where}
+        """, [self.config['max_attempts'], error, self.config['ttl']] + params)
+        return cur.rowcount
+
+    def maintain(self, running_ids):
+        """Heartbeat our jobs, requeue abandoned ones and delete expired artifacts"""
+        try:
+            with pooled_connection() as db:
+                cur = db.cursor()
+                try:
+                    running_ids = list(running_ids)
+                    if running_ids:
+                        placeholders = ", ".join(["%s"] * len(running_ids))
+                        cur.execute(
+                            f"UPDATE report_jobs SET heartbeat_at = NOW() "
+                            f"WHERE id IN ({placeholders}) AND status = 'running' AND worker = %s",
+                            running_ids + [self.name]
+                        )
+                    requeued = self._retry_or_fail(
+                        cur, "status = 'running' AND heartbeat_at < NOW() - INTERVAL %s SECOND",
+                        [self.config['stale_after']], "Worker stopped while rendering"
+                    )
+                    if requeued:
+                        logger.warning("Requeued %d abandoned report job(s)", requeued)
+                    db.commit()
+                    self.cleanup_expired(db, cur)
+                finally:
+                    cur.close()
+        except Exception:
+            logger.exception("Report worker maintenance failed")
+
+    def cleanup_expired(self, db, cur, batch=500):
+        """Delete expired jobs and their files; returns how many were removed"""
+        removed = 0
+        while True:
+            cur.execute("""
+                SELECT id, artifact_path FROM report_jobs
+                WHERE expires_at < NOW()
+                ORDER BY expires_at
+                LIMIT %s
+            """, (batch,))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            for _, artifact_path in rows:
+                if artifact_path:
+                    try:
+                        os.unlink(os.path.join(self.config['directory'], os.path.basename(artifact_path)))
+                    except FileNotFoundError:
+                        pass
+            placeholders = ", ".join(["%s"] * len(rows))
+            cur.execute(f"DELETE FROM report_jobs WHERE id IN ({placeholders})", [row[0] for row in rows])
+            db.commit()
+            removed += len(rows)
+            if len(rows) < batch:
+                break
+
+        # Temp files left by a renderer that was killed mid-write
+        cutoff = time.time() - max(3600, self.config['stale_after'])
+        if not os.path.isdir(self.config['directory']):
+            return removed
+        for name in os.listdir(self.config['directory']):
+            path = os.path.join(self.config['directory'], name)
+            try:
+                if name.endswith('.tmp') and os.stat(path).st_mtime < cutoff:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return removed
@@ -0,0 +1,173 @@
+"""Rate-limit counters shared by every worker process on a host.
+
+``memory://`` gives each gunicorn worker its own counters, so a limit of
+5 per minute becomes 5 per worker per minute and resets on restart. This
+module registers a ``sqlite://`` storage for flask-limiter that keeps the
+counters in one SQLite file (WAL mode) instead. No extra service is
+needed, and every worker on the host sees the same counts:
+
+    MEF_RATELIMIT_STORAGE_URI=sqlite:///var/lib/mefportal/ratelimit.sqlite3
+    MEF_RATELIMIT_STRATEGY=moving-window
+
+A fixed-window hit is a single upsert. A moving-window hit is one short
+write transaction. Expired rows are purged now and then during hits.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import MovingWindowSupport, Storage
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RATELIMIT_CONFIG = {
+    'storage_uri': os.environ.get(
+        'MEF_RATELIMIT_STORAGE_URI',
+        'sqlite:///' + os.path.join(_BASE_DIR, 'cache', 'ratelimit.sqlite3'),
+    ),
+    # fixed-window or moving-window
+    'strategy': os.environ.get('MEF_RATELIMIT_STRATEGY', 'fixed-window'),
+}
+
+# Purge expired rows once every this many hits per process
+PURGE_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    key TEXT NOT NULL,
+    at REAL NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_key_at ON events (key, at);
+CREATE INDEX IF NOT EXISTS idx_events_expires ON events (expires);
+CREATE INDEX IF NOT EXISTS idx_counters_expires ON counters (expires);
+"""
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """flask-limiter storage backed by a SQLite file.
+
+    Each thread has its own connection (recreated after a fork). SQLite's
+    file locking makes every statement atomic across processes.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, timeout=5.0, **options):
+        path = uri.split('://', 1)[1]
+        self.path = path or os.path.join(_BASE_DIR, 'cache', 'ratelimit.sqlite3')
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._hits = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        db = self._connect()
+        db.executescript(_SCHEMA)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            # Autocommit; transactions are opened explicitly where needed
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _maybe_purge(self, db, now):
+        self._hits += 1
+        if self._hits % PURGE_EVERY:
+            return
+        db.execute("DELETE FROM counters WHERE expires <= ?", (now,))
+        db.execute("DELETE FROM events WHERE expires <= ?", (now,))
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        db = self._connect()
+        # A counter whose window has passed starts over
+        value = db.execute("""
+            INSERT INTO counters (key, value, expires) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                value = CASE WHEN expires <= ? THEN excluded.value ELSE value + excluded.value END,
+                expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END
+            RETURNING value
+        """, (key, amount, now + expiry, now, now)).fetchone()[0]
+        self._maybe_purge(db, now)
+        return value
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM counters WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT expires FROM counters WHERE key = ? AND expires > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        db = self._connect()
+        # BEGIN IMMEDIATE takes the write lock before counting, so two
+        # processes cannot both see room for the last entry
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            count = db.execute(
+                "SELECT COUNT(*) FROM events WHERE key = ? AND at > ?", (key, now - expiry)
+            ).fetchone()[0]
+            if count + amount > limit:
+                db.execute("ROLLBACK")
+                return False
+            db.executemany(
+                "INSERT INTO events (key, at, expires) VALUES (?, ?, ?)",
+                [(key, now, now + expiry)] * amount,
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._maybe_purge(db, now)
+        return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, count = self._connect().execute(
+            "SELECT MIN(at), COUNT(*) FROM events WHERE key = ? AND at > ?", (key, now - expiry)
+        ).fetchone()
+        if not count:
+            return now, 0
+        return oldest, count
+
+    def clear(self, key):
+        db = self._connect()
+        db.execute("DELETE FROM counters WHERE key = ?", (key,))
+        db.execute("DELETE FROM events WHERE key = ?", (key,))
+
+    def reset(self):
+        db = self._connect()
+        removed = db.execute("DELETE FROM counters").rowcount
+        removed += db.execute("DELETE FROM events").rowcount
+        return removed
+
+    def check(self):
+        try:
+            self._connect().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
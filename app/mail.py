@@ -0,0 +1,470 @@
+"""Email notices for request decisions, sent from an outbox.
+
+``enqueue`` runs in the transaction that moves a request
+(``app.workflow.apply_many``) and adds rows to ``mail_outbox``. The click
+that made the decision never waits on SMTP, and a notice is queued
+exactly when the decision commits:
+
+- the student is told about every decision on their request;
+- the student's mentor is told about the advisor's and HOD's decisions,
+  one mail each, or with ``MEF_MAIL_MENTOR_DIGEST=true`` in one summary
+  a day (sent at ``MEF_MAIL_DIGEST_HOUR``, or by ``flask mail digest``).
+
+``flask mail worker`` claims batches of due messages and sends them over
+at most ``MEF_MAIL_CONNECTIONS`` SMTP connections in parallel, each one
+reused for its whole share of the batch. Temporary failures (4xx replies,
+dropped connections) are retried with exponential backoff; permanent
+ones (5xx) and messages out of attempts are kept with ``failed_at`` set.
+
+The server and credentials are the ``MAIL_*`` settings in ``config.py``.
+``SMTPStandIn`` is a local SMTP server for tests and ``flask mail standin``.
+"""
+import datetime
+import logging
+import os
+import signal
+import smtplib
+import socket
+import socketserver
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+from config import MAIL_DEFAULT_SENDER, MAIL_PASSWORD, MAIL_PORT, MAIL_SERVER, MAIL_USE_TLS, MAIL_USERNAME
+
+from app.database import pooled_connection
+from app.push import STATUS_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+MAIL_CONFIG = {
+    # Nothing is queued until a sender is set up to drain the outbox
+    'enabled': os.environ.get('MEF_MAIL_ENABLED', 'false').lower() == 'true',
+    'server': MAIL_SERVER,
+    'port': MAIL_PORT,
+    'use_tls': MAIL_USE_TLS,
+    'username': MAIL_USERNAME,
+    'password': MAIL_PASSWORD,
+    'sender': MAIL_DEFAULT_SENDER,
+    'connections': int(os.environ.get('MEF_MAIL_CONNECTIONS', 4)),
+    'batch': int(os.environ.get('MEF_MAIL_BATCH', 200)),
+    'timeout': float(os.environ.get('MEF_MAIL_TIMEOUT', 30)),
+    'max_attempts': int(os.environ.get('MEF_MAIL_MAX_ATTEMPTS', 6)),
+    'backoff_base': int(os.environ.get('MEF_MAIL_BACKOFF_BASE', 60)),
+    'backoff_max': int(os.environ.get('MEF_MAIL_BACKOFF_MAX', 6 * 3600)),
+    'stale_after': int(os.environ.get('MEF_MAIL_STALE_SECONDS', 600)),
+    'poll_interval': float(os.environ.get('MEF_MAIL_POLL_INTERVAL', 5)),
+    'mentor_digest': os.environ.get('MEF_MAIL_MENTOR_DIGEST', 'false').lower() == 'true',
+    # Local hour the worker sends the mentor digest at; -1 leaves it to `flask mail digest`
+    'digest_hour': int(os.environ.get('MEF_MAIL_DIGEST_HOUR', 7)),
+    # Prefix for links in mails, e.g. https://portal.example.edu
+    'base_url': os.environ.get('MEF_MAIL_BASE_URL', '').rstrip('/'),
+}
+
+Message = namedtuple('Message', 'id recipient subject body attempts')
+
+SENT = 'sent'
+RETRY = 'retry'
+FAILED = 'failed'
+
+# ---------- Web side ----------
+
+def enqueue(cur, request_ids, new_status, config=None):
+    """Queue the notices for requests that just moved to ``new_status``.
+
+    Runs in the caller's transaction; returns the number of mails queued.
+    """
+    config = config or MAIL_CONFIG
+    if not config['enabled'] or not request_ids or new_status not in STATUS_MESSAGES:
+        return 0
+    placeholders = ", ".join(["%s"] * len(request_ids))
+    cur.execute(f"""
+        SELECT r.id, r.request_type, r.from_date, r.to_date, r.student_name, u.email, u.mentor_email
+        FROM requests r
+        JOIN users u ON u.id = r.user_id
+        WHERE r.id IN ({placeholders})
+    """, list(request_ids))
+    link = f"{config['base_url']}/status"
+    rows = []
+    for request_id, request_type, from_date, to_date, student_name, email, mentor_email in cur.fetchall():
+        request_type = request_type or 'Leave'
+        period = f"{from_date} to {to_date}" if from_date != to_date else f"{from_date}"
+        if email:
+            rows.append((request_id, email, f"Your {request_type} request {STATUS_MESSAGES[new_status]}",
+                         f"Your {request_type} request for {period} {STATUS_MESSAGES[new_status]}.\n\n"
+                         f"Status: {new_status}\nDetails: {link}\n", 0))
+        # The mentor made the mentor decisions; they hear about the later ones
+        if mentor_email and not new_status.startswith('Mentor'):
+            rows.append((request_id, mentor_email, f"{student_name}'s {request_type} request: {new_status}",
+                         f"{student_name}'s {request_type} request for {period} is now {new_status}.\n",
+                         int(config['mentor_digest'])))
+    if rows:
+        cur.executemany("""
+            INSERT INTO mail_outbox (request_id, recipient, subject, body, digest)
+            VALUES (%s, %s, %s, %s, %s)
+        """, rows)
+    return len(rows)
+
+# ---------- Messages ----------
+
+def build_message(message, sender):
+    mail = EmailMessage()
+    mail['From'] = sender
+    mail['To'] = message.recipient
+    mail['Subject'] = message.subject
+    mail['Date'] = formatdate(localtime=True)
+    mail['Message-ID'] = make_msgid(domain=sender.rpartition('@')[2] or None)
+    mail.set_content(message.body)
+    return mail
+
+def digest_body(items):
+    """Subject and body summarising ``[(subject, created_at)]`` for one mentor"""
+    subject = f"Daily summary: {len(items)} request update{'s' if len(items) != 1 else ''}"
+    lines = [f"- {item_subject} ({created_at:%d %b %H:%M})" for item_subject, created_at in items]
+    return subject, "Updates on your students' requests since the last summary:\n\n" + "\n".join(lines) + "\n"
+
+# ---------- Outbox ----------
+
+class MailOutbox:
+    """``mail_outbox`` in MySQL, as the sender sees it"""
+
+    def __init__(self, name, config=None):
+        self.name = name
+        self.config = config or MAIL_CONFIG
+        self._batches = 0
+
+    def claim(self, limit):
+        """Take up to ``limit`` due messages for this worker; returns ``[Message]``"""
+        self._batches += 1
+        token = f"{self.name}:{self._batches}"
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                cur.execute("""
+                    UPDATE mail_outbox
+                    SET claimed_by = %s, claimed_at = NOW(), attempts = attempts + 1
+                    WHERE digest = 0 AND claimed_by IS NULL AND failed_at IS NULL AND next_attempt_at <= NOW()
+                    ORDER BY id
+                    LIMIT %s
+                """, (token, limit))
+                if cur.rowcount < 1:
+                    db.commit()
+                    return []
+                cur.execute("""
+                    SELECT id, recipient, subject, body, attempts FROM mail_outbox
+                    WHERE claimed_by = %s ORDER BY id
+                """, (token,))
+                messages = [Message(*row) for row in cur.fetchall()]
+                db.commit()
+                return messages
+            finally:
+                cur.close()
+
+    def complete(self, results):
+        """Record a batch's outcomes (see ``Sender.send_batch``)"""
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                if results[SENT]:
+                    placeholders = ", ".join(["%s"] * len(results[SENT]))
+                    cur.execute(f"DELETE FROM mail_outbox WHERE id IN ({placeholders})", results[SENT])
+                if results[RETRY]:
+                    # attempts was bumped by the claim, so the first retry waits backoff_base
+                    cur.executemany("""
+                        UPDATE mail_outbox
+                        SET claimed_by = NULL, claimed_at = NULL, last_error = %s,
+                            failed_at = IF(attempts >= %s, NOW(), NULL),
+                            next_attempt_at = NOW() + INTERVAL LEAST(%s, %s * POW(2, attempts - 1)) SECOND
+                        WHERE id = %s
+                    """, [
+                        (error[:255], self.config['max_attempts'], self.config['backoff_max'],
+                         self.config['backoff_base'], message_id)
+                        for message_id, error in results[RETRY]
+                    ])
+                if results[FAILED]:
+                    cur.executemany("""
+                        UPDATE mail_outbox
+                        SET claimed_by = NULL, claimed_at = NULL, last_error = %s, failed_at = NOW()
+                        WHERE id = %s
+                    """, [(error[:255], message_id) for message_id, error in results[FAILED]])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def release_stale(self):
+        """Put batches claimed by workers that died back in the queue"""
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                cur.execute("""
+                    UPDATE mail_outbox SET claimed_by = NULL, claimed_at = NULL
+                    WHERE claimed_by IS NOT NULL AND claimed_at < NOW() - INTERVAL %s SECOND
+                """, (self.config['stale_after'],))
+                released = cur.rowcount
+                db.commit()
+                return released
+            finally:
+                cur.close()
+
+    def compose_digests(self, day=None):
+        """Fold each mentor's held notices into one summary mail; returns how many.
+
+        With ``day``, does nothing (returns 0) if the digests for that day
+        were already composed, by this or any other worker.
+        """
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                # The state row lock serialises composers across workers and
+                # restarts; it is held until the commit below
+                cur.execute("SELECT last_digest FROM mail_digest_state WHERE id = 1 FOR UPDATE")
+                row = cur.fetchone()
+                if day is not None and row and row[0] is not None and row[0] >= day:
+                    db.commit()
+                    return 0
+                # Locked so two workers composing at once cannot both summarise a row
+                cur.execute("""
+                    SELECT id, recipient, subject, created_at FROM mail_outbox
+                    WHERE digest = 1 ORDER BY recipient, id
+                    FOR UPDATE
+                """)
+                by_recipient = {}
+                for message_id, recipient, subject, created_at in cur.fetchall():
+                    by_recipient.setdefault(recipient, []).append((message_id, subject, created_at))
+                for recipient, items in by_recipient.items():
+                    subject, body = digest_body([(item_subject, created_at) for _, item_subject, created_at in items])
+                    cur.execute("""
+                        INSERT INTO mail_outbox (recipient, subject, body) VALUES (%s, %s, %s)
+                    """, (recipient, subject, body))
+                    ids = [message_id for message_id, _, _ in items]
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    cur.execute(f"DELETE FROM mail_outbox WHERE id IN ({placeholders})", ids)
+                cur.execute("""
+                    INSERT INTO mail_digest_state (id, last_digest) VALUES (1, %s)
+                    ON DUPLICATE KEY UPDATE last_digest = VALUES(last_digest)
+                """, (day or datetime.date.today(),))
+                db.commit()
+                return len(by_recipient)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                cur.close()
+
+# ---------- Sender ----------
+
+class Sender:
+    """Sends claimed messages over a few reused SMTP connections"""
+
+    def __init__(self, outbox=None, config=None):
+        self.config = dict(MAIL_CONFIG, **(config or {}))
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.outbox = outbox or MailOutbox(self.name, self.config)
+        self.stopping = False
+        self._last_digest = None
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self, once=False):
+        """Send mail until stopped (SIGTERM/SIGINT), or until idle if ``once``"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        maintenance_every = max(1, self.config['stale_after'] / 4)
+        last_maintenance = 0.0
+        logger.info("Mail worker %s started, %d connections to %s:%s", self.name,
+                    self.config['connections'], self.config['server'], self.config['port'])
+        try:
+            while not self.stopping:
+                now = time.monotonic()
+                if now - last_maintenance >= maintenance_every:
+                    self.maintain()
+                    last_maintenance = now
+
+                batch = self.outbox.claim(self.config['batch'])
+                if batch:
+                    self.outbox.complete(self.send_batch(batch))
+                elif once:
+                    break
+                else:
+                    time.sleep(self.config['poll_interval'])
+        finally:
+            logger.info("Mail worker %s stopped", self.name)
+
+    def maintain(self):
+        try:
+            released = self.outbox.release_stale()
+            if released:
+                logger.warning("Released %d message(s) claimed by a stopped worker", released)
+            today = datetime.date.today()
+            hour = self.config['digest_hour']
+            if hour >= 0 and datetime.datetime.now().hour >= hour and self._last_digest != today:
+                # Skipped if another worker, or this one before a restart, already did today's
+                composed = self.outbox.compose_digests(today)
+                self._last_digest = today
+                if composed:
+                    logger.info("Composed %d mentor digest(s)", composed)
+        except Exception:
+            logger.exception("Mail outbox maintenance failed")
+
+    def send_batch(self, messages):
+        """Send ``messages``; returns ``{SENT: [id], RETRY: [(id, error)], FAILED: [(id, error)]}``"""
+        connections = max(1, min(self.config['connections'], len(messages)))
+        shares = [messages[i::connections] for i in range(connections)]
+        results = {SENT: [], RETRY: [], FAILED: []}
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix='mail') as pool:
+            for share in pool.map(self._send_share, shares):
+                for outcome, entries in share.items():
+                    results[outcome].extend(entries)
+        return results
+
+    def connect(self):
+        config = self.config
+        if config['port'] == 465:
+            smtp = smtplib.SMTP_SSL(config['server'], config['port'], timeout=config['timeout'])
+        else:
+            smtp = smtplib.SMTP(config['server'], config['port'], timeout=config['timeout'])
+        try:
+            if config['use_tls'] and config['port'] != 465:
+                smtp.starttls()
+            if config['username']:
+                smtp.login(config['username'], config['password'])
+        except BaseException:
+            smtp.close()
+            raise
+        return smtp
+
+    def _send_share(self, messages):
+        """Send one connection's share of a batch, in order"""
+        results = {SENT: [], RETRY: [], FAILED: []}
+        smtp = None
+        try:
+            for i, message in enumerate(messages):
+                if smtp is None:
+                    try:
+                        smtp = self.connect()
+                    except (smtplib.SMTPException, OSError) as e:
+                        # A refused greeting or login is a server or
+                        # configuration fault, not the message's: the whole
+                        # rest of the share waits for the next attempt
+                        if isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500:
+                            logger.error("SMTP server %s:%s refused the session: %s %s", self.config['server'],
+                                         self.config['port'], e.smtp_code, e.smtp_error.decode('utf-8', 'replace'))
+                        results[RETRY] += [(m.id, repr(e)) for m in messages[i:]]
+                        break
+                try:
+                    smtp.send_message(build_message(message, self.config['sender']))
+                    results[SENT].append(message.id)
+                except smtplib.SMTPRecipientsRefused as e:
+                    code, reply = next(iter(e.recipients.values()))
+                    outcome = FAILED if code >= 500 else RETRY
+                    results[outcome].append((message.id, f"{code} {reply.decode('utf-8', 'replace')}"))
+                except smtplib.SMTPResponseException as e:
+                    outcome = FAILED if e.smtp_code >= 500 else RETRY
+                    results[outcome].append((message.id, f"{e.smtp_code} {e.smtp_error.decode('utf-8', 'replace')}"))
+                except OSError as e:
+                    # smtplib's own errors are OSErrors too: a dropped connection
+                    # or a network error is retried, anything else smtplib
+                    # refuses (e.g. SMTPNotSupportedError for an SMTPUTF8
+                    # address) is this message's problem and fails it
+                    local = isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected)
+                    results[FAILED if local else RETRY].append((message.id, repr(e)))
+                    # Reconnect for the next message
+                    smtp.close()
+                    smtp = None
+        finally:
+            if smtp is not None:
+                try:
+                    smtp.quit()
+                except (smtplib.SMTPException, OSError):
+                    smtp.close()
+        return results
+
+# ---------- Local SMTP server ----------
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost stand-in ESMTP")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+            command = command.upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply("250-localhost\r\n250-8BITMIME\r\n250 SMTPUTF8" if command == 'EHLO' else "250 localhost")
+            elif command == 'MAIL':
+                sender, recipients = argument.partition(':')[2].strip('<> '), []
+                self.reply("250 OK")
+            elif command == 'RCPT':
+                recipient = argument.partition(':')[2].strip('<> ')
+                if recipient.startswith('bounce'):
+                    self.reply("550 No such user")
+                elif recipient.startswith('busy'):
+                    self.reply("451 Try again later")
+                else:
+                    recipients.append(recipient)
+                    self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                with server.lock:
+                    server.messages.append((sender, recipients, b"".join(lines)))
+                if server.on_message:
+                    server.on_message(*server.messages[-1])
+                self.reply("250 OK: queued")
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == 'NOOP':
+                self.reply("250 OK")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """A local SMTP server that keeps what it receives.
+
+    Recipients starting with ``bounce`` are refused (550) and with ``busy``
+    deferred (451). ``messages`` holds ``(sender, recipients, data)`` and
+    ``connections`` counts sessions; ``on_message`` is called with each
+    message as it arrives. Plain SMTP only (no TLS or AUTH).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, on_message=None):
+        super().__init__((host, port), _SMTPHandler)
+        self.port = self.server_address[1]
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.on_message = on_message
+
+    def start_in_thread(self):
+        """Serve from a daemon thread; returns self"""
+        threading.Thread(target=self.serve_forever, name='smtp-standin', daemon=True).start()
+        return self
@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
 from flask_login import login_required, current_user
 from app.main import bp
-from app.database import get_db
+from app.database import get_db, pool_stats
 
 @bp.route('/')
 def index():
@@ -15,3 +15,7 @@ def dashboard():
 @bp.route('/welcome')
 def welcome():
     return render_template('welcome.html')
+
+@bp.route('/healthz/pool')
+def healthz_pool():
+    return jsonify(pool_stats())
@@ -0,0 +1,92 @@
+"""Baseline schema: the tables init_db() used to create on every boot.
+
+Written with IF NOT EXISTS and column probes so it can be stamped onto
+databases created before migrations existed.
+"""
+from app.migrations import add_column
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(100) UNIQUE NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            role ENUM('Student', 'Mentor', 'Advisor', 'HOD') DEFAULT 'Student',
+            password VARCHAR(255),
+            register_number VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            year VARCHAR(10) DEFAULT '1',
+            dob DATE NOT NULL,
+            student_type ENUM('Day Scholar', 'Hosteller') DEFAULT 'Day Scholar',
+            mentor_email VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS requests (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            reason TEXT NOT NULL,
+            from_date DATE NOT NULL,
+            to_date DATE NOT NULL,
+            status ENUM('Pending', 'Mentor Approved', 'Mentor Rejected', 'Advisor Approved', 'Advisor Rejected', 'Approved', 'Rejected') DEFAULT 'Pending',
+            student_name VARCHAR(100) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            request_type ENUM('Leave', 'Permission', 'Apology', 'Bonafide', 'OD') DEFAULT 'Leave',
+            advisor_note TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS permissions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            student_name VARCHAR(100) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            custom_subject VARCHAR(200) NOT NULL,
+            reason TEXT NOT NULL,
+            from_date DATE NOT NULL,
+            to_date DATE NOT NULL,
+            status ENUM('Pending', 'Approved', 'Rejected') DEFAULT 'Pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS auth_lockouts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            register_number VARCHAR(50) UNIQUE NOT NULL,
+            failed_attempts INT NOT NULL DEFAULT 0,
+            lockout_until DATETIME NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS push_subscriptions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            endpoint TEXT NOT NULL,
+            p256dh VARCHAR(255),
+            auth VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_user_endpoint (user_id, endpoint(255)),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Columns added after the first release of these tables
+    add_column(cur, 'users', 'student_type', "ENUM('Day Scholar', 'Hosteller') DEFAULT 'Day Scholar'")
+    add_column(cur, 'users', 'mentor_email', "VARCHAR(100)")
+    add_column(cur, 'requests', 'request_type', "ENUM('Leave', 'Permission', 'Apology', 'Bonafide', 'OD') DEFAULT 'Leave'")
+    add_column(cur, 'requests', 'advisor_note', "TEXT")
@@ -0,0 +1,34 @@
+"""Normalized, indexed department_key on users and requests."""
+from app.migrations import add_column, add_index
+from app.utils import normalize_department_name
+
+INDEXES = {
+    'users': [
+        ('idx_users_dept_role_name', 'department_key, role, name'),
+        ('idx_users_role_dept_name', 'role, department_key, name'),
+    ],
+    'requests': [
+        ('idx_requests_dept_status_created', 'department_key, status, created_at'),
+        ('idx_requests_dept_created', 'department_key, created_at'),
+    ],
+}
+
+def upgrade(cur):
+    for table, indexes in INDEXES.items():
+        add_column(cur, table, 'department_key', "VARCHAR(100) NULL")
+        for index_name, columns in indexes:
+            add_index(cur, table, index_name, columns)
+        backfill(cur, table)
+
+def backfill(cur, table, batch_size=1000):
+    """Fill department_key for rows written before the column existed"""
+    while True:
+        cur.execute(f"SELECT id, department FROM {table} WHERE department_key IS NULL LIMIT %s", (batch_size,))
+        rows = cur.fetchall()
+        if not rows:
+            break
+        # Keep users.updated_at untouched; it is not a real profile change
+        cur.executemany(
+            f"UPDATE {table} SET department_key=%s, updated_at=updated_at WHERE id=%s",
+            [(normalize_department_name(department), row_id) for row_id, department in rows]
+        )
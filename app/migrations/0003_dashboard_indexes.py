@@ -0,0 +1,6 @@
+"""Indexes behind the student dashboard and status list."""
+from app.migrations import add_index
+
+def upgrade(cur):
+    add_index(cur, 'requests', 'idx_requests_user_created', 'user_id, created_at')
+    add_index(cur, 'requests', 'idx_requests_user_status', 'user_id, status')
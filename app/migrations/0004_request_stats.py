@@ -0,0 +1,24 @@
+"""request_stats counters and a maintained requests.last_activity_at."""
+from app.migrations import add_column, add_index
+from app import stats
+
+def upgrade(cur):
+    counters = ",\n".join(f"            {column} INT NOT NULL DEFAULT 0" for column in stats.STATUS_COLUMNS.values())
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS request_stats (
+            user_id INT PRIMARY KEY,
+            total INT NOT NULL DEFAULT 0,
+{counters},
+            last_activity_at TIMESTAMP NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
+
+    add_column(cur, 'requests', 'last_activity_at', "TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP")
+    cur.execute("""
+        UPDATE requests SET last_activity_at = COALESCE(updated_at, created_at)
+        WHERE last_activity_at IS NULL OR last_activity_at <> COALESCE(updated_at, created_at)
+    """)
+    add_index(cur, 'requests', 'idx_requests_user_activity', 'user_id, last_activity_at')
+
+    stats.rebuild(cur)
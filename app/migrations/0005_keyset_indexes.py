@@ -0,0 +1,19 @@
+"""Composite (..., created_at, id) indexes for keyset pagination.
+
+The new indexes supersede the (user_id, created_at) and
+(department_key, created_at) ones, which are dropped.
+"""
+from app.migrations import add_index, drop_index
+
+def upgrade(cur):
+    # Student status list: WHERE user_id=? ORDER BY created_at, id
+    add_index(cur, 'requests', 'idx_requests_user_created_id', 'user_id, created_at, id')
+    drop_index(cur, 'requests', 'idx_requests_user_created')
+
+    # HOD queue: WHERE department_key=? ORDER BY created_at, id
+    add_index(cur, 'requests', 'idx_requests_dept_created_id', 'department_key, created_at, id')
+    drop_index(cur, 'requests', 'idx_requests_dept_created')
+
+    # User management, per department (HOD) and across departments (Admin)
+    add_index(cur, 'users', 'idx_users_dept_created_id', 'department_key, created_at, id')
+    add_index(cur, 'users', 'idx_users_created_id', 'created_at, id')
@@ -0,0 +1,7 @@
+"""FULLTEXT indexes for request and user search."""
+from app.migrations import add_index
+from app.search import REQUEST_FT_COLUMNS, USER_FT_COLUMNS
+
+def upgrade(cur):
+    add_index(cur, 'requests', 'ft_requests_search', REQUEST_FT_COLUMNS, kind='FULLTEXT')
+    add_index(cur, 'users', 'ft_users_search', USER_FT_COLUMNS, kind='FULLTEXT')
@@ -0,0 +1,27 @@
+"""report_jobs: persistent queue for background PDF generation."""
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            kind VARCHAR(32) NOT NULL,
+            params TEXT NOT NULL,
+            status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+            attempts INT NOT NULL DEFAULT 0,
+            worker VARCHAR(100) NULL,
+            artifact_path VARCHAR(255) NULL,
+            artifact_name VARCHAR(255) NULL,
+            error VARCHAR(255) NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP NULL,
+            heartbeat_at TIMESTAMP NULL,
+            finished_at TIMESTAMP NULL,
+            expires_at TIMESTAMP NULL,
+            INDEX idx_report_jobs_status_id (status, id),
+            INDEX idx_report_jobs_user_status (user_id, status),
+            INDEX idx_report_jobs_status_heartbeat (status, heartbeat_at),
+            INDEX idx_report_jobs_expires (expires_at),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """)
@@ -0,0 +1,6 @@
+"""Index auth_lockouts.updated_at for the background lockout sweep."""
+from app.migrations import add_index
+
+def upgrade(cur):
+    # DELETE ... WHERE updated_at < NOW() - INTERVAL ... LIMIT 1000
+    add_index(cur, 'auth_lockouts', 'idx_auth_lockouts_updated', 'updated_at')
@@ -0,0 +1,23 @@
+"""push_outbox: pushes queued by status changes, plus per-endpoint backoff."""
+from app.migrations import add_column
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS push_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            subscription_id INT NOT NULL,
+            topic VARCHAR(32) NULL,
+            payload TEXT NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            claimed_by VARCHAR(120) NULL,
+            claimed_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_push_outbox_claim (claimed_by, next_attempt_at, id),
+            INDEX idx_push_outbox_claimed_at (claimed_at),
+            FOREIGN KEY (subscription_id) REFERENCES push_subscriptions(id) ON DELETE CASCADE
+        )
+    """)
+    # Set by the dispatcher when an endpoint answers 429/5xx or is unreachable
+    add_column(cur, 'push_subscriptions', 'failures', "INT NOT NULL DEFAULT 0")
+    add_column(cur, 'push_subscriptions', 'retry_at', "TIMESTAMP NULL")
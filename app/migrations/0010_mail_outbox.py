@@ -0,0 +1,23 @@
+"""mail_outbox: decision notices queued by status changes."""
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS mail_outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            request_id INT NULL,
+            recipient VARCHAR(100) NOT NULL,
+            subject VARCHAR(255) NOT NULL,
+            body TEXT NOT NULL,
+            digest TINYINT(1) NOT NULL DEFAULT 0,
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            claimed_by VARCHAR(120) NULL,
+            claimed_at TIMESTAMP NULL,
+            failed_at TIMESTAMP NULL,
+            last_error VARCHAR(255) NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_mail_outbox_claim (digest, claimed_by, failed_at, next_attempt_at, id),
+            INDEX idx_mail_outbox_claimed_at (claimed_at),
+            FOREIGN KEY (request_id) REFERENCES requests(id) ON DELETE SET NULL
+        )
+    """)
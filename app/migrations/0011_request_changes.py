@@ -0,0 +1,16 @@
+"""request_changes: append-only feed of request submissions and moves."""
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS request_changes (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            request_id INT NOT NULL,
+            department_key VARCHAR(100) NULL,
+            old_status VARCHAR(32) NULL,
+            new_status VARCHAR(32) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_request_changes_department (department_key, id),
+            INDEX idx_request_changes_created (created_at),
+            FOREIGN KEY (request_id) REFERENCES requests(id) ON DELETE CASCADE
+        )
+    """)
@@ -0,0 +1,10 @@
+"""mail_digest_state: the day the mentor digests were last composed."""
+
+def upgrade(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS mail_digest_state (
+            id TINYINT PRIMARY KEY,
+            last_digest DATE NULL
+        )
+    """)
+    cur.execute("INSERT IGNORE INTO mail_digest_state (id, last_digest) VALUES (1, NULL)")
@@ -0,0 +1,125 @@
+"""Versioned schema migrations.
+
+Every module in this package named ``NNNN_description.py`` is one migration
+step exposing ``upgrade(cur)``. Applied steps are recorded in the
+``schema_version`` table, so a booting worker only has to compare one number
+against the newest file here. Pending steps are applied under a MySQL named
+lock so concurrent workers never run the same DDL twice.
+"""
+import os
+import re
+import logging
+import importlib
+import pkgutil
+
+logger = logging.getLogger('mefportal')
+
+MIGRATION_LOCK = 'mefportal_schema_migrations'
+LOCK_TIMEOUT = int(os.environ.get('MEF_MIGRATION_LOCK_TIMEOUT', 60))
+
+_MODULE_RE = re.compile(r'^(\d{4})_(\w+)$')
+ER_NO_SUCH_TABLE = 1146
+
+def discover():
+    """Return ``[(version, name, module), ...]`` sorted by version"""
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{info.name}")
+        migrations.append((int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda m: m[0])
+    return migrations
+
+def latest_version():
+    migrations = discover()
+    return migrations[-1][0] if migrations else 0
+
+def current_version(cur):
+    """Highest applied version, or 0 for a database that predates migrations"""
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_version")
+        row = cur.fetchone()
+    except Exception as e:
+        if getattr(e, 'errno', None) == ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    return (row[0] or 0) if row else 0
+
+def ensure_schema(db):
+    """Cheap startup check: one SELECT when the schema is current"""
+    cur = db.cursor()
+    try:
+        version = current_version(cur)
+    finally:
+        cur.close()
+    if version >= latest_version():
+        return version
+    return upgrade(db)
+
+def upgrade(db, target=None):
+    """Apply pending migrations up to ``target`` under a named lock"""
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, LOCK_TIMEOUT))
+        locked = cur.fetchone()
+        if not locked or locked[0] != 1:
+            raise Exception(f"Could not acquire migration lock within {LOCK_TIMEOUT}s")
+        try:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Re-read under the lock: another worker may have just finished
+            version = current_version(cur)
+            for number, name, module in discover():
+                if number <= version or (target is not None and number > target):
+                    continue
+                logger.info(f"Applying migration {number:04d}_{name}")
+                try:
+                    module.upgrade(cur)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                        (number, name)
+                    )
+                    db.commit()
+                except Exception:
+                    logger.exception(f"Migration {number:04d}_{name} failed")
+                    db.rollback()
+                    raise
+                version = number
+            return version
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cur.fetchone()
+    finally:
+        cur.close()
+
+# --- Helpers for migration modules ---
+
+def column_exists(cur, table, column):
+    cur.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (column,))
+    return cur.fetchone() is not None
+
+def index_exists(cur, table, index_name):
+    cur.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (index_name,))
+    return bool(cur.fetchall())
+
+def add_column(cur, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there"""
+    if not column_exists(cur, table, column):
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def add_index(cur, table, index_name, columns, kind='INDEX'):
+    """CREATE [UNIQUE|FULLTEXT] INDEX unless an index of that name exists"""
+    if not index_exists(cur, table, index_name):
+        prefix = '' if kind == 'INDEX' else f"{kind} "
+        cur.execute(f"CREATE {prefix}INDEX {index_name} ON {table} ({columns})")
+
+def drop_index(cur, table, index_name):
+    if index_exists(cur, table, index_name):
+        cur.execute(f"DROP INDEX {index_name} ON {table}")
@@ -1,10 +1,21 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from flask_login import UserMixin
 from app.database import get_db
 
+# What AuthUser reads, in SELECT * positions (the password slot is left NULL)
+IDENTITY_COLUMNS = "id, username, name, role, NULL, register_number, email, department, year, dob, student_type"
+
+USER_CACHE_TTL = float(os.environ.get('MEF_USER_CACHE_TTL', 60))
+USER_CACHE_SIZE = int(os.environ.get('MEF_USER_CACHE_SIZE', 4096))
+
 class AuthUser(UserMixin):
     def __init__(self, user_row):
         # user_row should be a tuple from SELECT * FROM users
-        # 0:id, 1:username, 2:name, 3:role, 4:password, 5:reg_num, 
+        # 0:id, 1:username, 2:name, 3:role, 4:password, 5:reg_num,
         # 6:email, 7:dept, 8:year, 9:dob, 10:student_type, 11:mentor_email
         self.id = user_row[0]
         self.username = user_row[1]
@@ -17,19 +28,88 @@ class AuthUser(UserMixin):
         self.year = user_row[8]
         self.dob = user_row[9]
         self.student_type = user_row[10] if len(user_row) > 10 else 'Day Scholar'
-        
+
     def get_id(self):
         return str(self.id)
 
+class UserCache:
+    """Per-process LRU of AuthUser objects with a TTL.
+
+    Every user has a version stamp that ``invalidate`` bumps. A loader
+    reads the stamp before its query and ``put`` drops the result if the
+    stamp moved meanwhile, so a lookup racing an edit cannot re-cache the
+    old row. Other workers see the change once their entry expires.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def put(self, user_id, user, version=None):
+        with self._lock:
+            if version is not None and self._versions.get(user_id, 0) != version:
+                return
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache(USER_CACHE_TTL, USER_CACHE_SIZE)
+
+def cache_user(user):
+    """Seed the cache, e.g. with the user that just logged in"""
+    user_cache.put(int(user.id), user)
+
+def invalidate_user(user_id):
+    """Call after changing or deleting a user"""
+    user_cache.invalidate(int(user_id))
+
 def load_user(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    version = user_cache.version(user_id)
     try:
         db = get_db()
         cursor = db.cursor()
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
+        cursor.execute(f"SELECT {IDENTITY_COLUMNS} FROM users WHERE id = %s", (user_id,))
+        row = cursor.fetchone()
         cursor.close()
-        if user:
-            return AuthUser(user)
+        if row:
+            user = AuthUser(row)
+            user_cache.put(user_id, user, version)
+            return user
     except Exception:
         return None
     return None
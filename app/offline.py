@@ -0,0 +1,102 @@
+"""Offline cache: the service worker and the app shell it precaches.
+
+``static/service-worker.js`` is served from ``/service-worker.js`` so
+that its scope is the whole site rather than ``/static/``. The response
+starts with a ``self.MEF_OFFLINE`` header describing this deploy:
+
+- ``shell``: fingerprinted URLs of the layout's styles, scripts, fonts
+  and logo, precached when the worker installs;
+- ``pages``: pages answered stale-while-revalidate from a runtime cache,
+  so a student's last copy of ``/status`` shows at once (and offline)
+  while a fresh one loads for next time;
+- ``version``: a hash of the asset manifest. A deploy that changes any
+  asset changes the worker's bytes, so the browser installs the new
+  worker and it deletes the previous version's caches.
+
+Other files under ``/static/dist/`` are cached the first time they are
+used, so repeat visits fetch no static content at all. Cached pages are
+dropped on any POST (the data they show may have changed) and on
+``/login`` and ``/logout``. Responses that showed flashed messages are
+sent ``no-store`` so a one-off message is never replayed from the cache.
+"""
+import hashlib
+import json
+import os
+
+from flask import current_app, request
+from flask.globals import request_ctx
+
+from app.assets import DIST_DIR
+
+# Logical asset names precached at install, when built
+SHELL = [
+    'css/base.css', 'js/tailwind-config.js', 'js/layout.js', 'js/offline.js',
+    'css/icons.css', 'mobile-responsive.css', 'mobile-responsive.js', 'mef_logo.png',
+    'css/status.css', 'js/status.js',
+    # /dashboard: app.py renders dashboard_professional.html, the blueprint app dashboard.html
+    'css/dashboard_professional.css', 'css/dashboard.css',
+]
+# Generated fonts (app/fonts.py) are part of the shell too
+SHELL_PREFIXES = ('fonts/', 'css/fonts/')
+
+# Pages served stale-while-revalidate
+PAGES = ['/status', '/dashboard']
+# Navigating here drops the cached pages (another user may sign in next)
+CLEAR_ON = ['/login', '/logout']
+
+WORKER = 'service-worker.js'
+
+class _Worker:
+    """The worker script for the current manifest, rebuilt when either changes"""
+
+    def __init__(self):
+        self._manifest = None
+        self._mtime = None
+        self._body = None
+
+    def body(self, static_folder, manifest):
+        path = os.path.join(static_folder, WORKER)
+        mtime = os.stat(path).st_mtime
+        # A refresh replaces the manifest dict, so identity is enough
+        if manifest is not self._manifest or mtime != self._mtime:
+            with open(path, encoding='utf-8') as f:
+                source = f.read()
+            self._body = header(manifest) + source
+            self._manifest, self._mtime = manifest, mtime
+        return self._body
+
+def header(manifest):
+    """The ``self.MEF_OFFLINE`` line for ``manifest``"""
+    root = request.script_root
+    static = root + current_app.static_url_path.rstrip('/') + '/'
+    names = [name for name in SHELL if name in manifest]
+    names += sorted(name for name in manifest if name.startswith(SHELL_PREFIXES) and name not in names)
+    version = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:10]
+    config = {
+        'version': version,
+        'shell': [static + manifest[name] for name in names],
+        'static': f'{static}{DIST_DIR}/',
+        'pages': [root + path for path in PAGES],
+        'clear': [root + path for path in CLEAR_ON],
+    }
+    return f"self.MEF_OFFLINE = {json.dumps(config)};\n"
+
+def service_worker():
+    manifest = current_app.extensions['mef_assets'].current(current_app.debug)
+    body = current_app.extensions['mef_offline'].body(current_app.static_folder, manifest)
+    response = current_app.response_class(body, mimetype='text/javascript')
+    # Browsers revalidate the worker themselves; make that a cheap 304
+    response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
+
+def no_store_flashes(response):
+    """Keep pages that displayed flashed messages out of every cache"""
+    if request_ctx.flashes:
+        response.cache_control.no_store = True
+    return response
+
+def init_app(app):
+    app.extensions['mef_offline'] = _Worker()
+    app.add_url_rule('/' + WORKER, 'service_worker', service_worker)
+    app.after_request(no_store_flashes)
@@ -0,0 +1,143 @@
+"""Keyset (cursor) pagination.
+
+Pages are addressed by an opaque ``after``/``before`` token that encodes the
+sort key of the last/first row shown, so fetching page N costs the same
+index range read as page 1. Row counts, which keyset pagination does not
+need, come from a short-lived per-process cache instead of a ``COUNT(*)``
+on every page.
+"""
+import base64
+import datetime
+import json
+import threading
+import time
+from collections import OrderedDict
+
+def encode_cursor(values):
+    """Opaque URL-safe token for a row's sort key"""
+    payload = []
+    for value in values:
+        if isinstance(value, datetime.datetime):
+            payload.append({'dt': value.isoformat()})
+        elif isinstance(value, datetime.date):
+            payload.append({'d': value.isoformat()})
+        else:
+            payload.append(value)
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; None for a missing or tampered token"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = []
+        for value in payload:
+            if isinstance(value, dict) and 'dt' in value:
+                values.append(datetime.datetime.fromisoformat(value['dt']))
+            elif isinstance(value, dict) and 'd' in value:
+                values.append(datetime.date.fromisoformat(value['d']))
+            elif isinstance(value, (str, int, float)):
+                values.append(value)
+            else:
+                return None
+        return values
+    except Exception:
+        return None
+
+def _seek_condition(columns, values, op):
+    """Row-value comparison expanded so MySQL can use a range scan:
+    (a, b) < (x, y)  ->  a < x OR (a = x AND b < y)"""
+    clauses = []
+    params = []
+    for i, column in enumerate(columns):
+        parts = [f"{prev} = %s" for prev in columns[:i]] + [f"{column} {op} %s"]
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i] + [values[i]])
+    return "(" + " OR ".join(clauses) + ")", params
+
+def fetch_page(cur, select_sql, conditions, params, order_columns, key, per_page,
+               after=None, before=None, descending=True):
+    """Run one keyset-paginated query.
+
+    ``select_sql`` is everything before WHERE, ``conditions`` a list of SQL
+    predicates ANDed together, ``order_columns`` the unique sort key (for
+    example ``['created_at', 'id']``) and ``key(row)`` extracts those values
+    from a fetched row. Returns ``(rows, page_info)``.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    backwards = False
+    cursor_values = decode_cursor(before)
+    if cursor_values is not None and len(cursor_values) == len(order_columns):
+        backwards = True
+    else:
+        cursor_values = decode_cursor(after)
+        if cursor_values is not None and len(cursor_values) != len(order_columns):
+            cursor_values = None
+
+    # Walking backwards flips both the comparison and the scan direction
+    scan_desc = descending != backwards
+    if cursor_values is not None:
+        condition, condition_params = _seek_condition(order_columns, cursor_values, '<' if scan_desc else '>')
+        conditions.append(condition)
+        params.extend(condition_params)
+
+    where = " AND ".join(conditions) if conditions else "1=1"
+    direction = "DESC" if scan_desc else "ASC"
+    order = ", ".join(f"{column} {direction}" for column in order_columns)
+    cur.execute(f"{select_sql} WHERE {where} ORDER BY {order} LIMIT %s", params + [per_page + 1])
+    rows = cur.fetchall()
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = cursor_values is not None, more
+
+    page_info = {
+        'per_page': per_page,
+        'has_prev': has_prev and bool(rows),
+        'has_next': has_next and bool(rows),
+        'prev_cursor': encode_cursor(key(rows[0])) if has_prev and rows else None,
+        'next_cursor': encode_cursor(key(rows[-1])) if has_next and rows else None,
+    }
+    return rows, page_info
+
+class _TTLCache:
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+_totals = _TTLCache(ttl=60, max_entries=2048)
+
+def cached_total(cur, count_sql, params, cache_key):
+    """``COUNT(*)`` result reused for up to a minute per filter combination"""
+    total = _totals.get(cache_key)
+    if total is None:
+        cur.execute(count_sql, params)
+        row = cur.fetchone()
+        total = int(row[0] or 0) if row else 0
+        _totals.set(cache_key, total)
+    return total
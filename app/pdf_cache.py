@@ -0,0 +1,149 @@
+"""On-disk cache for generated PDFs.
+
+Entries are content-addressed: the key is a SHA-256 of everything that
+goes into the document, so a stale entry can never be served and the
+key doubles as a strong ETag. Writes go to a temporary file that is
+``os.replace``d into place, which keeps the cache safe to share between
+worker processes without locking; readers hold an open file handle, so
+an entry evicted by another process mid-download is still sent intact.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PDF_CACHE_CONFIG = {
+    'directory': os.environ.get('MEF_PDF_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'pdf')),
+    'max_bytes': int(os.environ.get('MEF_PDF_CACHE_MAX_MB', 256)) * 1024 * 1024,
+    'max_age': int(os.environ.get('MEF_PDF_CACHE_MAX_AGE_DAYS', 30)) * 24 * 3600,
+    'sweep_interval': float(os.environ.get('MEF_PDF_CACHE_SWEEP_INTERVAL', 300)),
+}
+
+def cache_key(*parts):
+    """SHA-256 over the parts that determine a document's bytes"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class DiskCache:
+    """Size- and age-bounded cache of files under one directory.
+
+    Any object with the same ``open``/``put`` methods can stand in for it
+    (see ``set_pdf_cache``).
+    """
+
+    def __init__(self, directory, max_bytes, max_age, sweep_interval=300, suffix='.pdf'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.suffix = suffix
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def open(self, key):
+        """Open the cached file for ``key`` for reading, or return None"""
+        path = self._path(key)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            # Bump mtime so eviction drops the least recently used entries
+            os.utime(path)
+        except OSError:
+            pass
+        return handle
+
+    def put(self, key, data):
+        """Store ``data`` under ``key`` atomically"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.maybe_sweep()
+
+    def maybe_sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        try:
+            self.sweep()
+        except OSError:
+            logger.exception("PDF cache sweep failed")
+
+    def sweep(self):
+        """Drop expired entries, then the oldest ones until under the size cap.
+
+        Several processes may sweep at once; files that vanish in between
+        are skipped.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                # Leftover temp files from a crashed writer age out too
+                if now - stat.st_mtime > self.max_age or (name.endswith('.tmp') and now - stat.st_mtime > 3600):
+                    self._unlink(path)
+                    continue
+                if name.endswith(self.suffix):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            for _mtime, size, path in sorted(entries):
+                self._unlink(path)
+                total -= size
+                removed += 1
+                if total <= self.max_bytes:
+                    break
+        return removed
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+_pdf_cache = None
+
+def get_pdf_cache():
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = DiskCache(**PDF_CACHE_CONFIG)
+    return _pdf_cache
+
+def set_pdf_cache(cache):
+    """Swap in another store (anything with ``open(key)`` and ``put(key, data)``)"""
+    global _pdf_cache
+    _pdf_cache = cache
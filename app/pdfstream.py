@@ -0,0 +1,172 @@
+"""Streaming PDF writer.
+
+FPDF keeps every page in memory until ``output()``, so a report's peak
+memory grows with its row count. This writer emits each page as soon as
+it is drawn; the only state kept per page is its object offset for the
+cross-reference table (8 bytes).
+
+It covers what the request reports need: A4 pages, the three standard
+Helvetica faces, FPDF-style ``cell``/``ln`` layout and grey rules.
+"""
+import zlib
+from array import array
+
+K = 72 / 25.4  # points per mm
+PAGE_WIDTH, PAGE_HEIGHT = 210.0, 297.0  # A4, mm
+MARGIN = 10.0
+CELL_MARGIN = 1.0
+
+# style -> (resource name, base font, FPDF width table)
+FONTS = {
+    '': ('F1', 'Helvetica', 'helvetica'),
+    'B': ('F2', 'Helvetica-Bold', 'helveticaB'),
+    'I': ('F3', 'Helvetica-Oblique', 'helveticaI'),
+}
+
+CATALOG_OBJ, PAGES_OBJ = 1, 2
+FONT_OBJ = {'F1': 3, 'F2': 4, 'F3': 5}
+FIRST_PAGE_OBJ = 6
+
+_widths = {}
+
+def _char_widths(table):
+    if not _widths:
+        from fpdf.fonts import fpdf_charwidths
+        _widths.update(fpdf_charwidths)
+    return _widths[table]
+
+def _escape(text):
+    data = str(text).replace('\r', ' ').replace('\n', ' ').encode('cp1252', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+class Page:
+    """One page, drawn with the subset of FPDF's API the reports use"""
+
+    def __init__(self):
+        self.ops = []
+        self.x = MARGIN
+        self.y = MARGIN
+        self.last_height = 0
+        self.set_font('', 12)
+
+    def set_font(self, style='', size=12):
+        self.font_name, _, table = FONTS[style]
+        self.font_widths = _char_widths(table)
+        self.font_size = size
+
+    def get_y(self):
+        return self.y
+
+    def get_string_width(self, text):
+        units = sum(self.font_widths.get(ch, 600) for ch in str(text))
+        return units * self.font_size / 1000 / K
+
+    def cell(self, w, h, txt='', ln=0, align='L'):
+        if w == 0:
+            w = PAGE_WIDTH - MARGIN - self.x
+        if txt:
+            if align == 'C':
+                dx = (w - self.get_string_width(txt)) / 2
+            elif align == 'R':
+                dx = w - CELL_MARGIN - self.get_string_width(txt)
+            else:
+                dx = CELL_MARGIN
+            # Same baseline as FPDF: vertically centred in the cell
+            baseline = self.y + 0.5 * h + 0.3 * self.font_size / K
+            self.ops.append(
+                f"BT /{self.font_name} {self.font_size:.2f} Tf "
+                f"{(self.x + dx) * K:.2f} {(PAGE_HEIGHT - baseline) * K:.2f} Td "
+                f"({_escape(txt).decode('latin-1')}) Tj ET"
+            )
+        self.last_height = h
+        if ln:
+            self.x = MARGIN
+            self.y += h
+        else:
+            self.x += w
+
+    def ln(self, h=None):
+        self.x = MARGIN
+        self.y += self.last_height if h is None else h
+
+    def line(self, x1, y1, x2, y2, gray=200):
+        self.ops.append(
+            f"{gray / 255:.3f} G 0.57 w {x1 * K:.2f} {(PAGE_HEIGHT - y1) * K:.2f} m "
+            f"{x2 * K:.2f} {(PAGE_HEIGHT - y2) * K:.2f} l S"
+        )
+
+    def content(self):
+        return "\n".join(self.ops).encode('latin-1')
+
+class StreamingPDF:
+    """Writes a PDF as a sequence of byte chunks.
+
+    Call ``begin()``, then ``add_page()`` per page, then iterate
+    ``finish()``; concatenating everything returned is the document.
+    Page ``i`` is object ``6 + 2i`` and its content stream ``7 + 2i``,
+    so the page tree can be written at the end without remembering ids.
+    """
+
+    def __init__(self):
+        self.page_count = 0
+        self._pos = 0
+        self._offsets = array('Q', [0] * FIRST_PAGE_OBJ)
+
+    def _object(self, number, body):
+        if number < len(self._offsets):
+            self._offsets[number] = self._pos
+        else:
+            self._offsets.append(self._pos)
+        data = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        self._pos += len(data)
+        return data
+
+    def begin(self):
+        out = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+        self._pos = len(out[0])
+        out.append(self._object(CATALOG_OBJ, b"<< /Type /Catalog /Pages 2 0 R >>"))
+        for style in ('', 'B', 'I'):
+            name, base_font, _ = FONTS[style]
+            out.append(self._object(FONT_OBJ[name], (
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} "
+                f"/Encoding /WinAnsiEncoding >>"
+            ).encode('ascii')))
+        return b"".join(out)
+
+    def add_page(self, page):
+        number = FIRST_PAGE_OBJ + 2 * self.page_count
+        self.page_count += 1
+        stream = zlib.compress(page.content())
+        return (
+            self._object(number, b"<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>" % (number + 1))
+            + self._object(number + 1, b"<< /Filter /FlateDecode /Length %d >>\nstream\n" % len(stream)
+                           + stream + b"\nendstream")
+        )
+
+    def finish(self, batch=1000):
+        """Yield the page tree, cross-reference table and trailer"""
+        self._offsets[PAGES_OBJ] = self._pos
+        head = b"2 0 obj\n<< /Type /Pages /Count %d /Kids [" % self.page_count
+        yield self._advance(head)
+        for start in range(0, self.page_count, batch):
+            stop = min(start + batch, self.page_count)
+            yield self._advance(b"".join(
+                b"%d 0 R " % (FIRST_PAGE_OBJ + 2 * i) for i in range(start, stop)
+            ))
+        yield self._advance((
+            f"] /Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> >> "
+            f"/MediaBox [0 0 {PAGE_WIDTH * K:.2f} {PAGE_HEIGHT * K:.2f}] >>\nendobj\n"
+        ).encode('ascii'))
+
+        xref_pos = self._pos
+        size = len(self._offsets)
+        yield b"xref\n0 %d\n0000000000 65535 f \n" % size
+        for start in range(1, size, batch):
+            yield b"".join(
+                b"%010d 00000 n \n" % self._offsets[i] for i in range(start, min(start + batch, size))
+            )
+        yield b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_pos)
+
+    def _advance(self, data):
+        self._pos += len(data)
+        return data
@@ -0,0 +1,628 @@
+"""Web Push notifications for request status changes.
+
+``enqueue`` runs inside the transaction that moves a request
+(``app.workflow.apply_many``) and adds one row per subscription of the
+student to ``push_outbox``. A push is therefore queued exactly when a
+status change commits, and never for one that rolled back.
+
+``flask push worker`` drains the outbox with an asyncio ``Dispatcher``:
+
+- Each batch is claimed with one UPDATE, so several workers can run at once.
+- Pushes fan out concurrently (``MEF_PUSH_CONCURRENCY``) over keep-alive
+  connections, at most ``MEF_PUSH_CONNECTIONS`` per push service.
+- 404/410 means the browser unsubscribed, so the subscription is deleted
+  (and its queued pushes with it).
+- 429, 5xx and network errors back the endpoint off exponentially, or
+  for as long as ``Retry-After`` asks. Its other pushes wait with it.
+- After ``MEF_PUSH_MAX_ATTEMPTS`` tries a push is dropped.
+
+Payloads are encrypted (RFC 8291) and requests signed with VAPID
+(RFC 8292) when the optional ``cryptography`` package is installed and
+``MEF_VAPID_PRIVATE_KEY`` is set (``flask push keys`` makes a pair).
+Without them an empty push is sent, and the service worker shows its
+default text. ``PushStandIn`` is a local push service for tests,
+benchmarks and ``flask push standin``.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+
+from app.database import pooled_connection
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+except ImportError:  # optional: pushes go out without payload or VAPID
+    ec = None
+
+logger = logging.getLogger(__name__)
+
+PUSH_CONFIG = {
+    'concurrency': int(os.environ.get('MEF_PUSH_CONCURRENCY', 64)),
+    'connections_per_origin': int(os.environ.get('MEF_PUSH_CONNECTIONS', 16)),
+    'batch': int(os.environ.get('MEF_PUSH_BATCH', 500)),
+    'timeout': float(os.environ.get('MEF_PUSH_TIMEOUT', 10)),
+    # How long the push service keeps an undelivered push
+    'ttl': int(os.environ.get('MEF_PUSH_TTL', 24 * 3600)),
+    'max_attempts': int(os.environ.get('MEF_PUSH_MAX_ATTEMPTS', 8)),
+    'backoff_base': int(os.environ.get('MEF_PUSH_BACKOFF_BASE', 30)),
+    'backoff_max': int(os.environ.get('MEF_PUSH_BACKOFF_MAX', 3600)),
+    # A claimed batch older than this belonged to a worker that died
+    'stale_after': int(os.environ.get('MEF_PUSH_STALE_SECONDS', 300)),
+    'poll_interval': float(os.environ.get('MEF_PUSH_POLL_INTERVAL', 1)),
+    'vapid_private_key': os.environ.get('MEF_VAPID_PRIVATE_KEY', ''),
+    'vapid_public_key': os.environ.get('MEF_VAPID_PUBLIC_KEY', ''),
+    'vapid_subject': os.environ.get('MEF_VAPID_SUBJECT', 'mailto:admin@localhost'),
+}
+
+# New status -> how the notification words it
+STATUS_MESSAGES = {
+    'Mentor Approved': 'was approved by your mentor',
+    'Mentor Rejected': 'was rejected by your mentor',
+    'Advisor Approved': 'was approved by your advisor',
+    'Advisor Rejected': 'was rejected by your advisor',
+    'Approved': 'was approved by the HOD',
+    'Rejected': 'was rejected by the HOD',
+}
+STATUS_URL = '/status'
+
+Push = namedtuple('Push', 'id subscription_id endpoint p256dh auth topic payload attempts')
+
+SENT = 'sent'
+GONE = 'gone'
+RETRY = 'retry'
+DROPPED = 'dropped'
+
+# ---------- Web side ----------
+
+def enqueue(cur, request_ids, new_status):
+    """Queue a push to every subscription of the requests' owners.
+
+    Runs in the caller's transaction; returns the number of pushes queued.
+    """
+    message = STATUS_MESSAGES.get(new_status)
+    if not request_ids or message is None:
+        return 0
+    placeholders = ", ".join(["%s"] * len(request_ids))
+    cur.execute(f"""
+        INSERT INTO push_outbox (subscription_id, topic, payload)
+        SELECT s.id, CONCAT('request-', r.id),
+               JSON_OBJECT(
+                   'title', %s,
+                   'body', CONCAT('Your ', COALESCE(r.request_type, 'Leave'), ' request ', %s),
+                   'url', %s,
+                   'tag', CONCAT('request-', r.id)
+               )
+        FROM requests r
+        JOIN push_subscriptions s ON s.user_id = r.user_id
+        WHERE r.id IN ({placeholders})
+    """, [f"Request {new_status}", message, STATUS_URL] + list(request_ids))
+    return max(cur.rowcount, 0)
+
+def init_app(app):
+    # base.html subscribes with this key (empty: push is not configured)
+    app.jinja_env.globals['vapid_public_key'] = PUSH_CONFIG['vapid_public_key']
+
+# ---------- Encryption and VAPID ----------
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _hkdf(key_material, salt, info, length):
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=salt, info=info).derive(key_material)
+
+def encrypt(payload, p256dh, auth):
+    """``payload`` encrypted for one subscription (aes128gcm, RFC 8291)"""
+    receiver_key = _b64decode(p256dh)
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    sender_key = private_key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    shared_secret = private_key.exchange(
+        ec.ECDH(), ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), receiver_key)
+    )
+    ikm = _hkdf(shared_secret, _b64decode(auth), b"WebPush: info\x00" + receiver_key + sender_key, 32)
+    salt = os.urandom(16)
+    key = _hkdf(ikm, salt, b"Content-Encoding: aes128gcm\x00", 16)
+    nonce = _hkdf(ikm, salt, b"Content-Encoding: nonce\x00", 12)
+    # One record: the payload, then the last-record padding delimiter
+    ciphertext = AESGCM(key).encrypt(nonce, payload + b"\x02", None)
+    return salt + struct.pack('!IB', 4096, len(sender_key)) + sender_key + ciphertext
+
+class Vapid:
+    """Signs push requests for the application server key pair"""
+
+    # Tokens are valid for 12 hours (the most push services accept is 24)
+    TOKEN_LIFETIME = 12 * 3600
+
+    def __init__(self, private_key, subject):
+        number = int.from_bytes(_b64decode(private_key), 'big')
+        self._key = ec.derive_private_key(number, ec.SECP256R1())
+        self.public_key = _b64encode(self._key.public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+        ))
+        self.subject = subject
+        self._tokens = {}
+
+    @staticmethod
+    def generate():
+        """A new ``(private, public)`` key pair, base64url encoded"""
+        key = ec.generate_private_key(ec.SECP256R1())
+        private = key.private_numbers().private_value.to_bytes(32, 'big')
+        public = key.public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+        )
+        return _b64encode(private), _b64encode(public)
+
+    def headers(self, endpoint):
+        parts = urllib.parse.urlsplit(endpoint)
+        audience = f"{parts.scheme}://{parts.netloc}"
+        token, expires = self._tokens.get(audience, (None, 0))
+        # Signing is the expensive part; reuse a token until it nears expiry
+        if expires - time.time() < 3600:
+            expires = int(time.time()) + self.TOKEN_LIFETIME
+            header = _b64encode(json.dumps({'typ': 'JWT', 'alg': 'ES256'}).encode())
+            claims = _b64encode(json.dumps({'aud': audience, 'exp': expires, 'sub': self.subject}).encode())
+            signing_input = f"{header}.{claims}".encode('ascii')
+            r, s = decode_dss_signature(self._key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+            token = f"{header}.{claims}.{_b64encode(r.to_bytes(32, 'big') + s.to_bytes(32, 'big'))}"
+            self._tokens[audience] = (token, expires)
+        return {'Authorization': f"vapid t={token}, k={self.public_key}"}
+
+def get_vapid(config=None):
+    """The configured ``Vapid`` signer, or None without a key or ``cryptography``"""
+    config = config or PUSH_CONFIG
+    if ec is None or not config['vapid_private_key']:
+        return None
+    return Vapid(config['vapid_private_key'], config['vapid_subject'])
+
+# ---------- HTTP ----------
+
+class PushClient:
+    """Minimal asyncio HTTP/1.1 client that keeps connections open per origin.
+
+    Push requests are small and push services allow keep-alive, so reusing
+    a connection saves a TCP and TLS handshake on every push after the
+    first to each service.
+    """
+
+    def __init__(self, connections_per_origin=16, timeout=10.0, keep_alive=True):
+        self.connections_per_origin = connections_per_origin
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.opened = 0
+        self._idle = {}
+        self._limits = {}
+
+    async def post(self, url, headers, body):
+        """POST ``body``; returns ``(status, headers)`` with lower-case header names"""
+        parts = urllib.parse.urlsplit(url)
+        secure = parts.scheme == 'https'
+        origin = (parts.hostname, parts.port or (443 if secure else 80), secure)
+        limit = self._limits.setdefault(origin, asyncio.Semaphore(self.connections_per_origin))
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        head = [f"POST {path} HTTP/1.1", f"Host: {parts.netloc}", f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        if not self.keep_alive:
+            head.append("Connection: close")
+        request = ("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body
+        async with limit:
+            return await asyncio.wait_for(self._exchange(origin, request), self.timeout)
+
+    async def _exchange(self, origin, request):
+        idle = self._idle.setdefault(origin, [])
+        while idle:
+            reader, writer = idle.pop()
+            try:
+                return await self._roundtrip(origin, reader, writer, request)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The service closed the idle connection; try the next one
+                writer.close()
+        reader, writer = await self._open(origin)
+        return await self._roundtrip(origin, reader, writer, request)
+
+    async def _open(self, origin):
+        host, port, secure = origin
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=True if secure else None)
+
+    async def _roundtrip(self, origin, reader, writer, request):
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, headers, reusable = await self._read_response(reader)
+        except BaseException:
+            writer.close()
+            raise
+        if reusable and self.keep_alive:
+            self._idle[origin].append((reader, writer))
+        else:
+            writer.close()
+        return status, headers
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        version, status = status_line.split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        status = int(status)
+        reusable = version == b'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if status in (204, 304) or 100 <= status < 200:
+            pass
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            # Delimited by the server closing the connection
+            await reader.read()
+            reusable = False
+        return status, headers, reusable
+
+    def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+# ---------- Outbox ----------
+
+class Outbox:
+    """``push_outbox`` in MySQL, as the dispatcher sees it"""
+
+    def __init__(self, name, config=None):
+        self.name = name
+        self.config = config or PUSH_CONFIG
+        self._batches = 0
+
+    def claim(self, limit):
+        """Take up to ``limit`` due pushes for this worker; returns ``[Push]``"""
+        self._batches += 1
+        token = f"{self.name}:{self._batches}"
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                cur.execute("""
+                    UPDATE push_outbox
+                    SET claimed_by = %s, claimed_at = NOW(), attempts = attempts + 1
+                    WHERE claimed_by IS NULL AND next_attempt_at <= NOW()
+                      AND NOT EXISTS (
+                          SELECT 1 FROM push_subscriptions s
+                          WHERE s.id = push_outbox.subscription_id AND s.retry_at > NOW()
+                      )
+                    ORDER BY id
+                    LIMIT %s
+                """, (token, limit))
+                if cur.rowcount < 1:
+                    db.commit()
+                    return []
+                cur.execute("""
+                    SELECT o.id, o.subscription_id, s.endpoint, s.p256dh, s.auth, o.topic, o.payload, o.attempts
+                    FROM push_outbox o
+                    JOIN push_subscriptions s ON s.id = o.subscription_id
+                    WHERE o.claimed_by = %s
+                    ORDER BY o.id
+                """, (token,))
+                rows = [Push(*row) for row in cur.fetchall()]
+                db.commit()
+                return rows
+            finally:
+                cur.close()
+
+    def complete(self, results):
+        """Record a batch's outcomes (see ``Dispatcher.send_batch``)"""
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                if results[SENT]:
+                    self._delete(cur, 'push_outbox', results[SENT])
+                    subscriptions = sorted(results['delivered_to'])
+                    placeholders = ", ".join(["%s"] * len(subscriptions))
+                    cur.execute(f"""
+                        UPDATE push_subscriptions SET failures = 0, retry_at = NULL
+                        WHERE id IN ({placeholders}) AND failures > 0
+                    """, subscriptions)
+                if results[DROPPED]:
+                    self._delete(cur, 'push_outbox', results[DROPPED])
+                # Their queued pushes go too (ON DELETE CASCADE)
+                if results[GONE]:
+                    self._delete(cur, 'push_subscriptions', sorted(results[GONE]))
+                for subscription_id, (push_ids, retry_after) in sorted(results[RETRY].items()):
+                    # retry_at is computed from the failure count before it is bumped
+                    cur.execute("""
+                        UPDATE push_subscriptions
+                        SET retry_at = NOW() + INTERVAL GREATEST(%s, LEAST(%s, %s * POW(2, failures))) SECOND,
+                            failures = failures + 1
+                        WHERE id = %s
+                    """, (retry_after or 0, self.config['backoff_max'], self.config['backoff_base'], subscription_id))
+                    placeholders = ", ".join(["%s"] * len(push_ids))
+                    cur.execute(f"""
+                        DELETE FROM push_outbox WHERE id IN ({placeholders}) AND attempts >= %s
+                    """, list(push_ids) + [self.config['max_attempts']])
+                    if cur.rowcount > 0:
+                        logger.warning("Dropped %d push(es) to subscription %s after %d attempts",
+                                       cur.rowcount, subscription_id, self.config['max_attempts'])
+                    cur.execute(f"""
+                        UPDATE push_outbox o
+                        JOIN push_subscriptions s ON s.id = o.subscription_id
+                        SET o.claimed_by = NULL, o.claimed_at = NULL, o.next_attempt_at = s.retry_at
+                        WHERE o.id IN ({placeholders})
+                    """, list(push_ids))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                cur.close()
+
+    @staticmethod
+    def _delete(cur, table, ids):
+        placeholders = ", ".join(["%s"] * len(ids))
+        cur.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", list(ids))
+
+    def release_stale(self):
+        """Put batches claimed by workers that died back in the queue"""
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                cur.execute("""
+                    UPDATE push_outbox SET claimed_by = NULL, claimed_at = NULL
+                    WHERE claimed_by IS NOT NULL AND claimed_at < NOW() - INTERVAL %s SECOND
+                """, (self.config['stale_after'],))
+                released = cur.rowcount
+                db.commit()
+                return released
+            finally:
+                cur.close()
+
+class MemoryOutbox:
+    """The ``Outbox`` interface over a list, for tests and benchmarks"""
+
+    def __init__(self, pushes=()):
+        self.queued = list(pushes)
+        self.sent = []
+        self.gone = set()
+        self.retried = {}
+        self.dropped = []
+
+    def claim(self, limit):
+        batch, self.queued = self.queued[:limit], self.queued[limit:]
+        return batch
+
+    def complete(self, results):
+        self.sent += results[SENT]
+        self.dropped += results[DROPPED]
+        self.gone |= results[GONE]
+        for subscription_id, (push_ids, retry_after) in results[RETRY].items():
+            self.retried.setdefault(subscription_id, []).extend(push_ids)
+
+    def release_stale(self):
+        return 0
+
+# ---------- Dispatcher ----------
+
+def _retry_after(headers):
+    value = headers.get('retry-after', '')
+    return int(value) if value.isdigit() else None
+
+class Dispatcher:
+    """Sends claimed pushes concurrently and records what happened to each"""
+
+    def __init__(self, outbox=None, client=None, config=None, vapid=None):
+        self.config = dict(PUSH_CONFIG, **(config or {}))
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.outbox = outbox or Outbox(self.name, self.config)
+        self.client = client or PushClient(self.config['connections_per_origin'], self.config['timeout'])
+        # vapid=False sends unsigned, empty pushes even when a key is configured
+        if vapid is None:
+            vapid = get_vapid(self.config)
+            if vapid is None:
+                logger.warning("Push payloads and VAPID are disabled (needs cryptography and MEF_VAPID_PRIVATE_KEY)")
+        self.vapid = vapid
+        self.stopping = False
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self, once=False):
+        """Send pushes until stopped (SIGTERM/SIGINT), or until idle if ``once``"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info("Push worker %s started, %d concurrent", self.name, self.config['concurrency'])
+        try:
+            asyncio.run(self.serve(once))
+        finally:
+            logger.info("Push worker %s stopped", self.name)
+
+    async def serve(self, once=False):
+        maintenance_every = max(1, self.config['stale_after'] / 4)
+        last_maintenance = 0.0
+        try:
+            while not self.stopping:
+                if time.monotonic() - last_maintenance >= maintenance_every:
+                    try:
+                        released = await asyncio.to_thread(self.outbox.release_stale)
+                        if released:
+                            logger.warning("Released %d push(es) claimed by a stopped worker", released)
+                    except Exception:
+                        logger.exception("Push outbox maintenance failed")
+                    last_maintenance = time.monotonic()
+
+                batch = await asyncio.to_thread(self.outbox.claim, self.config['batch'])
+                if batch:
+                    results = await self.send_batch(batch)
+                    await asyncio.to_thread(self.outbox.complete, results)
+                elif once:
+                    break
+                else:
+                    await asyncio.sleep(self.config['poll_interval'])
+        finally:
+            self.client.close()
+
+    async def send_batch(self, pushes):
+        """Deliver ``pushes``, one subscription's in order; returns the outcomes"""
+        results = {SENT: [], DROPPED: [], GONE: set(), RETRY: {}, 'delivered_to': set()}
+        by_subscription = {}
+        for push in pushes:
+            by_subscription.setdefault(push.subscription_id, []).append(push)
+        limit = asyncio.Semaphore(self.config['concurrency'])
+
+        async def deliver_all(subscription_id, queue):
+            async with limit:
+                for i, push in enumerate(queue):
+                    outcome, retry_after = await self.deliver(push)
+                    if outcome == SENT:
+                        results[SENT].append(push.id)
+                        results['delivered_to'].add(subscription_id)
+                    elif outcome == DROPPED:
+                        results[DROPPED].append(push.id)
+                    elif outcome == GONE:
+                        results[GONE].add(subscription_id)
+                        return
+                    else:
+                        # The endpoint is backing off; the rest of its pushes wait too
+                        results[RETRY][subscription_id] = ([p.id for p in queue[i:]], retry_after)
+                        return
+
+        await asyncio.gather(*(deliver_all(key, queue) for key, queue in by_subscription.items()))
+        return results
+
+    async def deliver(self, push):
+        """Send one push; returns ``(outcome, retry_after)``"""
+        headers = {'TTL': str(self.config['ttl']), 'Urgency': 'normal'}
+        if push.topic:
+            headers['Topic'] = push.topic
+        body = b''
+        if self.vapid:
+            headers.update(self.vapid.headers(push.endpoint))
+            if push.payload and push.p256dh and push.auth:
+                body = encrypt(push.payload.encode('utf-8'), push.p256dh, push.auth)
+                headers['Content-Encoding'] = 'aes128gcm'
+                headers['Content-Type'] = 'application/octet-stream'
+        try:
+            status, response_headers = await self.client.post(push.endpoint, headers, body)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.info("Push %s to subscription %s failed: %r", push.id, push.subscription_id, e)
+            return RETRY, None
+        if 200 <= status < 300:
+            return SENT, None
+        if status in (404, 410):
+            return GONE, None
+        if status == 429 or status >= 500:
+            return RETRY, _retry_after(response_headers)
+        logger.warning("Push %s rejected with HTTP %d; dropping it", push.id, status)
+        return DROPPED, None
+
+# ---------- Local push service ----------
+
+class PushStandIn:
+    """A local push service that accepts pushes without delivering them.
+
+    ``POST /push/<token>`` answers 201 Created after ``latency`` seconds.
+    Tokens starting with ``gone`` answer 410, ``missing`` 404, and ``busy``
+    429 with ``Retry-After``. Connections are kept alive like a real
+    service, and ``received`` keeps ``(path, headers, body)`` per push.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.received = []
+        self.connections = 0
+        self._server = None
+        self._loop = None
+
+    def url(self, token):
+        return f"http://{self.host}:{self.port}/push/{token}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def start_in_thread(self):
+        """Serve from a daemon thread (for synchronous callers); returns self"""
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, name='push-standin', daemon=True).start()
+        ready.wait()
+        return self
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                path = request_line.split()[1].decode('latin-1')
+                self.received.append((path, headers, body))
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                token = path.rsplit('/', 1)[-1]
+                if token.startswith('gone'):
+                    status, extra = '410 Gone', ''
+                elif token.startswith('missing'):
+                    status, extra = '404 Not Found', ''
+                elif token.startswith('busy'):
+                    status, extra = '429 Too Many Requests', 'Retry-After: 120\r\n'
+                else:
+                    status, extra = '201 Created', ''
+                closing = headers.get('connection', '').lower() == 'close'
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n{extra}Content-Length: 0\r\n"
+                    f"{'Connection: close' + chr(13) + chr(10) if closing else ''}\r\n".encode('latin-1')
+                )
+                await writer.drain()
+                if closing:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
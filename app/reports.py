@@ -0,0 +1,252 @@
+"""PDF documents for requests.
+
+Status reports are generated while rows are still arriving from an
+unbuffered cursor: each request becomes a page that is written out
+straight away, and the summary counts are gathered in the same pass.
+Approval letters are single pages rendered with FPDF and cached by
+``app.pdf_cache``.
+"""
+import datetime
+import os
+
+from werkzeug.utils import secure_filename
+
+from app.pdf_cache import cache_key
+from app.pdfstream import Page, StreamingPDF
+from app.search import REQUEST_FT_COLUMNS, match_condition
+
+# Upper bound on rows in one export, and rows fetched per round trip
+EXPORT_MAX_ROWS = int(os.environ.get('MEF_EXPORT_MAX_ROWS', 5000))
+EXPORT_BATCH_SIZE = int(os.environ.get('MEF_EXPORT_BATCH_SIZE', 500))
+
+# Bytes buffered before a chunk is handed to the WSGI server
+CHUNK_SIZE = 64 * 1024
+
+SUMMARY_STATUSES = [
+    ("Approved Requests", 'Approved'),
+    ("Pending Requests", 'Pending'),
+    ("Rejected Requests", 'Rejected'),
+    ("Mentor Approved", 'Mentor Approved'),
+    ("Advisor Approved", 'Advisor Approved'),
+]
+
+def status_report_query(user_id, date_filter='', status_filter='', search_query=''):
+    """``(sql, params)`` for one student's requests, with the /status filters.
+
+    An unparseable date is ignored. One row past ``EXPORT_MAX_ROWS`` is
+    selected so the report can tell it was truncated.
+    """
+    where_conditions = ["user_id = %s"]
+    params = [user_id]
+
+    if date_filter:
+        try:
+            day_start = datetime.datetime.strptime(date_filter, "%Y-%m-%d")
+            where_conditions.append("created_at >= %s AND created_at < %s")
+            params.extend([day_start, day_start + datetime.timedelta(days=1)])
+        except ValueError:
+            pass
+
+    if status_filter:
+        where_conditions.append("status = %s")
+        params.append(status_filter)
+
+    if search_query:
+        search_sql, search_params = match_condition(REQUEST_FT_COLUMNS, search_query)
+        where_conditions.append(search_sql)
+        params.extend(search_params)
+
+    query = f"""
+        SELECT id, user_id, type, reason, from_date, to_date, status,
+               COALESCE(DATE_FORMAT(updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(created_at, '%Y-%m-%d %H:%i')) as updation,
+               student_name, department, created_at
+        FROM requests
+        WHERE {" AND ".join(where_conditions)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    """
+    return query, params + [EXPORT_MAX_ROWS + 1]
+
+def status_report_filename(date_filter='', status_filter='', search_query=''):
+    filename_parts = ["requests_report"]
+    if date_filter:
+        filename_parts.append(f"date_{secure_filename(date_filter)}")
+    if status_filter:
+        filename_parts.append(f"status_{secure_filename(status_filter.lower())}")
+    if search_query:
+        filename_parts.append(f"search_{secure_filename(search_query[:10])}")
+    return f"{'_'.join(filename_parts)}.pdf"
+
+def iter_rows(cur, batch_size=EXPORT_BATCH_SIZE):
+    """Yield rows from ``cur`` ``batch_size`` at a time"""
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+def _request_page(request_data, student_name, department, separator):
+    page = Page()
+    page.set_font('B', 16)
+    page.cell(200, 10, txt="REQUEST STATUS REPORT", ln=1, align='C')
+    page.ln(5)
+
+    page.set_font('B', 12)
+    page.cell(200, 10, txt="REQUEST DETAILS", ln=1, align='L')
+    page.ln(5)
+
+    details = [
+        ("Application ID", f"LEV-2025-{request_data[0]}"),
+        ("Student Name", request_data[8] or student_name),
+        ("Department", request_data[9] or department),
+        ("Request Type", request_data[2]),
+        ("Duration", f"{request_data[4]} to {request_data[5]}"),
+        ("Status", request_data[6]),
+        ("Reason", request_data[3]),
+        ("Submitted Date", str(request_data[10])),
+        ("Last Updated", request_data[7]),
+    ]
+    for label, value in details:
+        page.set_font('B', 12)
+        page.cell(50, 8, txt=f"{label}:", ln=0)
+        page.set_font('', 12)
+        page.cell(0, 8, txt=str(value), ln=1)
+
+    page.ln(10)
+    if separator:
+        page.line(10, page.get_y(), 200, page.get_y())
+    return page
+
+def _summary_page(total, counts, truncated, generated_at):
+    page = Page()
+    page.set_font('B', 16)
+    page.cell(200, 10, txt="REQUEST SUMMARY", ln=1, align='C')
+    page.ln(10)
+
+    summary_stats = [("Total Requests", total)]
+    summary_stats += [(label, counts.get(status, 0)) for label, status in SUMMARY_STATUSES]
+    for label, value in summary_stats:
+        page.set_font('B', 12)
+        page.cell(60, 8, txt=f"{label}:", ln=0)
+        page.set_font('', 12)
+        page.cell(0, 8, txt=str(value), ln=1)
+
+    if truncated:
+        page.ln(5)
+        page.set_font('I', 11)
+        page.cell(0, 8, txt=f"Only the first {total} requests are included. Narrow the filters to export the rest.", ln=1)
+
+    page.ln(10)
+    page.set_font('I', 10)
+    page.cell(0, 10, txt=f"Generated by MEF Portal - {generated_at.strftime('%Y-%m-%d %H:%M')}", ln=1, align='C')
+    return page
+
+def stream_status_report(rows, max_rows=EXPORT_MAX_ROWS, student_name='N/A', department='N/A',
+                         chunk_size=CHUNK_SIZE):
+    """Yield a status report for ``rows`` as PDF byte chunks.
+
+    ``rows`` is consumed once; at most ``max_rows`` are rendered, and the
+    summary page says so when more were available.
+    """
+    pdf = StreamingPDF()
+    buffer = bytearray(pdf.begin())
+    counts = {}
+    total = 0
+    truncated = False
+    previous = None
+
+    # A separator is drawn under a request only when another one follows,
+    # so each page is written once the next row has been seen
+    for row in rows:
+        if total >= max_rows:
+            truncated = True
+            break
+        if previous is not None:
+            buffer += pdf.add_page(_request_page(previous, student_name, department, separator=True))
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        previous = row
+        total += 1
+        counts[row[6]] = counts.get(row[6], 0) + 1
+
+    if previous is not None:
+        buffer += pdf.add_page(_request_page(previous, student_name, department, separator=False))
+    buffer += pdf.add_page(_summary_page(total, counts, truncated, datetime.datetime.now()))
+
+    for part in pdf.finish():
+        buffer += part
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+# Bump whenever the approval letter layout changes, so cached copies
+# rendered with the old layout are no longer looked up
+APPROVAL_LETTER_VERSION = 2
+
+# The row render_approval_letter reads, in order (updated_at is the
+# approval time printed on the letter)
+APPROVAL_LETTER_COLUMNS = ("id, user_id, type, reason, from_date, to_date, status, "
+                           "updated_at, student_name, department, created_at")
+
+def approval_letter_key(request_data, student_name, department):
+    """Cache key and ETag for a letter: id, updated_at and every printed value"""
+    return cache_key(
+        APPROVAL_LETTER_VERSION, request_data[0], request_data[7],
+        request_data[2], request_data[3], request_data[4], request_data[5], request_data[6],
+        request_data[8] or student_name, request_data[9] or department, request_data[10],
+    )
+
+def render_approval_letter(request_data, student_name, department):
+    """Approval letter for one approved request (an ``APPROVAL_LETTER_COLUMNS`` row), as PDF bytes"""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+
+    # Add header
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(200, 10, txt="LEAVE APPLICATION - APPROVED", ln=1, align='C')
+    pdf.ln(10)
+
+    # Add application details
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(200, 10, txt="APPLICATION DETAILS", ln=1, align='L')
+    pdf.ln(5)
+
+    details = [
+        ("Application ID", f"LEV-2025-{request_data[0]}"),
+        ("Student Name", request_data[8] or student_name),
+        ("Department", request_data[9] or department),
+        ("Leave Type", request_data[2]),
+        ("Duration", f"{request_data[4]} to {request_data[5]}"),
+        ("Status", request_data[6]),
+        ("Reason", request_data[3]),
+        ("Submitted Date", str(request_data[10]) if len(request_data) > 10 else "N/A")
+    ]
+
+    for label, value in details:
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(50, 8, txt=f"{label}:", ln=0)
+        pdf.set_font("Arial", size=12)
+        pdf.cell(0, 8, txt=str(value), ln=1)
+
+    pdf.ln(10)
+
+    # Add approval section
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(200, 10, txt="APPROVAL INFORMATION", ln=1, align='L')
+    pdf.ln(5)
+
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 8, txt=f"This application has been officially approved by the Head of Department. The request was processed and approved on {request_data[7] if len(request_data) > 7 else 'N/A'}.")
+
+    pdf.ln(10)
+
+    # Add footer
+    pdf.set_font("Arial", 'I', 10)
+    pdf.cell(0, 10, txt="Generated by MEF Portal - Selvam College of Technology", ln=1, align='C')
+
+    return pdf.output(dest='S').encode('latin1')
@@ -0,0 +1,86 @@
+"""Full-text search over requests and users.
+
+Queries are turned into InnoDB ``MATCH ... AGAINST (... IN BOOLEAN MODE)``
+predicates backed by the FULLTEXT indexes from migration 0006, so search
+cost follows the number of matches rather than the size of the table.
+Every term is required and prefix-matched (``+leave* +medic*``).
+"""
+import re
+
+# innodb_ft_min_token_size: shorter words are never indexed
+MIN_TOKEN_LENGTH = 3
+MAX_TERMS = 8
+
+REQUEST_FT_COLUMNS = "type, reason, student_name"
+USER_FT_COLUMNS = "name, register_number, email"
+
+def boolean_query(text):
+    """``'Medical leave!'`` -> ``'+medical* +leave*'`` (None if nothing indexable)"""
+    tokens = [t for t in re.findall(r'\w+', (text or '').lower()) if len(t) >= MIN_TOKEN_LENGTH]
+    if not tokens:
+        return None
+    return " ".join(f"+{token}*" for token in tokens[:MAX_TERMS])
+
+def match_condition(columns, text, alias=''):
+    """``(sql, params)`` predicate for a search box.
+
+    Falls back to a substring LIKE when the query only has words shorter
+    than the full-text token size; callers always combine it with an
+    indexed filter (user or department), which bounds that scan.
+    """
+    prefix = f"{alias}." if alias else ''
+    query = boolean_query(text)
+    if query:
+        qualified = ", ".join(f"{prefix}{c.strip()}" for c in columns.split(','))
+        return f"MATCH({qualified}) AGAINST (%s IN BOOLEAN MODE)", [query]
+    like = f"%{text}%"
+    parts = [f"{prefix}{c.strip()} LIKE %s" for c in columns.split(',')]
+    return "(" + " OR ".join(parts) + ")", [like] * len(parts)
+
+def search_department_requests(cur, department_key, text, limit=50):
+    """Relevance-ranked requests in one department.
+
+    Matches request type, reason and student name through the FULLTEXT
+    index, plus the student's register number through the unique index on
+    ``users.register_number`` (exact or prefix).
+    """
+    columns = """r.id, r.user_id, r.type, r.reason, r.from_date, r.to_date, r.status,
+                 COALESCE(DATE_FORMAT(r.updated_at, '%Y-%m-%d %H:%i'), DATE_FORMAT(r.created_at, '%Y-%m-%d %H:%i')) as updation,
+                 r.student_name, r.department, r.created_at, r.advisor_note"""
+    branches = []
+    params = []
+
+    query = boolean_query(text)
+    if query:
+        branches.append(f"""
+            SELECT r.id, MATCH(r.{REQUEST_FT_COLUMNS.replace(', ', ', r.')}) AGAINST (%s IN BOOLEAN MODE) AS score
+            FROM requests r
+            WHERE r.department_key = %s
+              AND MATCH(r.{REQUEST_FT_COLUMNS.replace(', ', ', r.')}) AGAINST (%s IN BOOLEAN MODE)
+        """)
+        params.extend([query, department_key, query])
+
+    register_number = (text or '').strip()
+    if re.fullmatch(r'[\w-]+', register_number):
+        # A register number match outranks any text score
+        branches.append("""
+            SELECT r.id, 1000 AS score
+            FROM users u
+            JOIN requests r ON r.user_id = u.id
+            WHERE u.register_number LIKE %s AND r.department_key = %s
+        """)
+        params.extend([register_number.replace('%', '').replace('_', r'\_') + '%', department_key])
+
+    if not branches:
+        return []
+
+    # A request found by both branches is listed once, at its best score
+    union = " UNION ALL ".join(f"({branch})" for branch in branches)
+    cur.execute(f"""
+        SELECT {columns}, hits.score
+        FROM (SELECT id, MAX(score) AS score FROM ({union}) matched GROUP BY id) hits
+        JOIN requests r ON r.id = hits.id
+        ORDER BY hits.score DESC, r.created_at DESC
+        LIMIT %s
+    """, params + [limit])
+    return [row[:-1] for row in cur.fetchall()]
@@ -0,0 +1,397 @@
+"""Live staff queues over Server-Sent Events.
+
+The mentor, advisor and HOD pages subscribe to ``queue`` events for
+their department. Each event is one row of the change feed
+(``app.changes``) that enters or leaves the role's queue, so the page
+can show "2 new requests" or mark a card another staff member decided,
+without rerunning the queue queries on a reload.
+
+There are two ways to serve the stream, and neither keeps a web worker
+busy for an open tab:
+
+- ``flask sse serve`` runs an asyncio hub. It holds every open stream,
+  reads the feed once per ``MEF_SSE_POLL_INTERVAL`` for all of them, and
+  fans each change out to the matching subscribers. Point
+  ``MEF_SSE_URL`` at it (directly or through the reverse proxy) and the
+  pages connect there, with a signed token in place of the session.
+- Without a hub, ``/events/queue`` in the web app answers with whatever
+  changed since the browser's ``Last-Event-ID`` and ends the response.
+  Its ``retry:`` field makes ``EventSource`` come back after
+  ``MEF_SSE_RETRY_MS``, so the page still updates. Each visit is one
+  indexed range query.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import os
+import signal
+import time
+import urllib.parse
+
+from flask import current_app, request, session, url_for
+from flask_login import current_user, login_required
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app import changes
+from app.database import get_db, pooled_connection
+from app.utils import normalize_department_name
+from app.workflow import actionable_status
+
+logger = logging.getLogger(__name__)
+
+SSE_CONFIG = {
+    # Public URL of `flask sse serve` (empty: use /events/queue in the app)
+    'url': os.environ.get('MEF_SSE_URL', ''),
+    # Origin of the pages, when the hub is on a different one
+    'allow_origin': os.environ.get('MEF_SSE_ALLOW_ORIGIN', ''),
+    'retry_ms': int(os.environ.get('MEF_SSE_RETRY_MS', 15000)),
+    'poll_interval': float(os.environ.get('MEF_SSE_POLL_INTERVAL', 1)),
+    'heartbeat': float(os.environ.get('MEF_SSE_HEARTBEAT', 20)),
+    'token_max_age': int(os.environ.get('MEF_SSE_TOKEN_HOURS', 12)) * 3600,
+    'max_subscribers': int(os.environ.get('MEF_SSE_MAX_SUBSCRIBERS', 20000)),
+    # Events buffered for a slow client before it is dropped (it reconnects and catches up)
+    'queue_size': int(os.environ.get('MEF_SSE_QUEUE_SIZE', 256)),
+    'batch': int(os.environ.get('MEF_SSE_BATCH', 500)),
+    # How long a missing change id may still be an uncommitted transaction
+    'gap_timeout': float(os.environ.get('MEF_SSE_GAP_SECONDS', 10)),
+}
+
+TOKEN_SALT = 'mef-queue-stream'
+STAFF_ROLES = ('Mentor', 'Advisor', 'HOD')
+
+def relevant(role, change):
+    """Whether ``change`` adds a request to, or takes one off, ``role``'s queue"""
+    queue = actionable_status(role)
+    return queue is not None and queue in (change.old_status, change.new_status)
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+def format_event(change):
+    """``change`` as one SSE ``queue`` event"""
+    data = json.dumps({
+        'request_id': change.request_id,
+        'old_status': change.old_status,
+        'status': change.new_status,
+        'student_name': change.student_name,
+        'type': change.type,
+        'from_date': change.from_date,
+        'to_date': change.to_date,
+    }, default=_json_default)
+    return f"id: {change.id}\nevent: queue\ndata: {data}\n\n".encode('utf-8')
+
+def ready_event(head):
+    """Sent on a fresh connection: sets ``Last-Event-ID`` to the current head"""
+    return f"id: {head}\nevent: ready\ndata: {{}}\n\n".encode('utf-8')
+
+def reset_event(head):
+    """Sent to a client too far behind to catch up event by event"""
+    return f"id: {head}\nevent: reset\ndata: {{}}\n\n".encode('utf-8')
+
+def _last_event_id(value):
+    return int(value) if value and value.isdigit() else None
+
+# ---------- Web side ----------
+
+def _serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT)
+
+def stream_token(secret_key, user_id, role, department_key):
+    return _serializer(secret_key).dumps([user_id, role, department_key])
+
+def read_token(secret_key, token, max_age):
+    """``(user_id, role, department_key)``, or None for a bad or expired token"""
+    try:
+        user_id, role, department_key = _serializer(secret_key).loads(token, max_age=max_age)
+    except (BadSignature, ValueError, TypeError):
+        return None
+    return user_id, role, department_key
+
+def _subscriber():
+    """``(role, department_key)`` of the signed-in staff member, or None"""
+    role = session.get('role')
+    if role not in STAFF_ROLES or not current_user.is_authenticated:
+        return None
+    return role, normalize_department_name(session.get('department'))
+
+def queue_stream_url():
+    """Where this page's EventSource connects (empty for non-staff)"""
+    subscriber = _subscriber()
+    if subscriber is None:
+        return ''
+    if not SSE_CONFIG['url']:
+        return url_for('queue_events')
+    role, department_key = subscriber
+    token = stream_token(current_app.secret_key, current_user.id, role, department_key)
+    return f"{SSE_CONFIG['url']}?{urllib.parse.urlencode({'token': token})}"
+
+@login_required
+def queue_events():
+    """Changes since ``Last-Event-ID`` as a short SSE response"""
+    subscriber = _subscriber()
+    if subscriber is None:
+        return current_app.response_class(status=403)
+    role, department_key = subscriber
+    last_id = _last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    body = [f"retry: {SSE_CONFIG['retry_ms']}\n\n".encode('ascii')]
+    cur = get_db().cursor()
+    try:
+        if last_id is None:
+            body.append(ready_event(changes.head(cur)))
+        else:
+            # Every department's changes, so a gap (a change not committed
+            # yet) can be told apart from another department's change
+            rows = changes.since(cur, last_id, limit=SSE_CONFIG['batch'])
+            if len(rows) >= SSE_CONFIG['batch']:
+                body.append(reset_event(changes.head(cur)))
+            else:
+                rows, resume_id = changes.committed_prefix(rows, last_id, SSE_CONFIG['gap_timeout'])
+                body += [format_event(row) for row in rows
+                         if row.department_key == department_key and relevant(role, row)]
+                if resume_id != last_id:
+                    # Also moves the client past changes it was not sent,
+                    # but never past one that may still commit
+                    body.append(ready_event(resume_id))
+    finally:
+        cur.close()
+    response = current_app.response_class(body, mimetype='text/event-stream')
+    response.cache_control.no_store = True
+    return response
+
+def init_app(app):
+    app.add_url_rule('/events/queue', 'queue_events', queue_events)
+    app.jinja_env.globals['queue_stream_url'] = queue_stream_url
+
+# ---------- Hub ----------
+
+class DatabaseFeed:
+    """The change feed as the hub reads it"""
+
+    def head(self):
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                return changes.head(cur)
+            finally:
+                cur.close()
+                db.commit()
+
+    def since(self, after_id, department_key=None, limit=500):
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                return changes.since(cur, after_id, department_key, limit)
+            finally:
+                cur.close()
+                # End the read so the next poll sees newer commits
+                db.commit()
+
+    def prune(self):
+        with pooled_connection() as db:
+            cur = db.cursor()
+            try:
+                removed = changes.prune(cur)
+                db.commit()
+                return removed
+            finally:
+                cur.close()
+
+class _Subscriber:
+    __slots__ = ('role', 'department_key', 'queue')
+
+    def __init__(self, role, department_key, size):
+        self.role = role
+        self.department_key = department_key
+        self.queue = asyncio.Queue(size)
+
+class Hub:
+    """Holds open event streams and fans the change feed out to them"""
+
+    def __init__(self, secret_key, feed=None, config=None):
+        self.secret_key = secret_key
+        self.feed = feed or DatabaseFeed()
+        self.config = dict(SSE_CONFIG, **(config or {}))
+        self.head = 0
+        # Published ids above head (see advance)
+        self.pending = set()
+        self._gap_since = None
+        self.subscribers = {}
+        self.count = 0
+        self._server = None
+        self._poller = None
+
+    async def start(self, host='127.0.0.1', port=8090):
+        self.head = await asyncio.to_thread(self.feed.head)
+        self._server = await asyncio.start_server(self._handle, host, port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._poller = asyncio.create_task(self._poll())
+        return self
+
+    async def stop(self):
+        self._poller.cancel()
+        self._server.close()
+        for department in self.subscribers.values():
+            for subscriber in department:
+                if subscriber.queue is not None and not subscriber.queue.full():
+                    subscriber.queue.put_nowait(None)
+        await self._server.wait_closed()
+
+    def run(self, host, port):
+        """Serve until SIGTERM/SIGINT"""
+        async def main():
+            await self.start(host, port)
+            logger.info("Queue stream hub listening on %s:%s", host, self.port)
+            stopped = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, stopped.set)
+            await stopped.wait()
+            await self.stop()
+            logger.info("Queue stream hub stopped")
+
+        asyncio.run(main())
+
+    async def _poll(self):
+        last_prune = time.monotonic()
+        while True:
+            fresh = 0
+            try:
+                rows = await asyncio.to_thread(self.feed.since, self.head, None, self.config['batch'])
+                fresh = self.advance(rows)
+                if time.monotonic() - last_prune > 3600 and hasattr(self.feed, 'prune'):
+                    last_prune = time.monotonic()
+                    await asyncio.to_thread(self.feed.prune)
+            except Exception:
+                logger.exception("Reading the change feed failed")
+            # A full batch means more is waiting
+            if fresh < self.config['batch']:
+                await asyncio.sleep(self.config['poll_interval'])
+
+    def advance(self, rows, now=None):
+        """Publish the unseen ``rows`` and move ``head`` past the contiguous ones.
+
+        Ids are allotted when a transaction inserts, not when it commits,
+        so a later id can become visible first. ``head`` waits below such
+        a gap for ``gap_timeout`` seconds (a rolled-back insert leaves one
+        for good). Returns how many rows were published.
+        """
+        now = time.monotonic() if now is None else now
+        fresh = 0
+        for row in rows:
+            if row.id > self.head and row.id not in self.pending:
+                self.publish(row)
+                self.pending.add(row.id)
+                fresh += 1
+        while self.pending:
+            while self.head + 1 in self.pending:
+                self.head += 1
+                self.pending.discard(self.head)
+            if not self.pending:
+                break
+            if self._gap_since is None:
+                self._gap_since = now
+            if now - self._gap_since < self.config['gap_timeout']:
+                return fresh
+            # Give up on the gap; any later one gets its own wait
+            self.head = min(self.pending) - 1
+            self._gap_since = now
+        self._gap_since = None
+        return fresh
+
+    def publish(self, change):
+        """Queue ``change`` for every subscriber it concerns"""
+        event = None
+        for subscriber in self.subscribers.get(change.department_key, ()):
+            if subscriber.queue is None or not relevant(subscriber.role, change):
+                continue
+            event = event or format_event(change)
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too slow: drop it; EventSource reconnects and catches up from its last id
+                subscriber.queue = None
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        method, target = (request_line.decode('latin-1').split() + ['', ''])[:2]
+        return method, urllib.parse.urlsplit(target), headers
+
+    def _respond(self, writer, status, extra=''):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n{extra}\r\n".encode('latin-1'))
+
+    async def _handle(self, reader, writer):
+        try:
+            method, target, headers = await asyncio.wait_for(self._read_request(reader), 10)
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            writer.close()
+            return
+        cors = f"Access-Control-Allow-Origin: {self.config['allow_origin']}\r\n" if self.config['allow_origin'] else ''
+        query = urllib.parse.parse_qs(target.query)
+        identity = read_token(self.secret_key, (query.get('token') or [''])[0], self.config['token_max_age'])
+        if method != 'GET':
+            self._respond(writer, '405 Method Not Allowed')
+        elif identity is None or identity[1] not in STAFF_ROLES:
+            # 403 rather than 401: EventSource gives up instead of retrying
+            self._respond(writer, '403 Forbidden', cors)
+        elif self.count >= self.config['max_subscribers']:
+            self._respond(writer, '503 Service Unavailable', 'Retry-After: 30\r\n')
+        else:
+            await self._stream(writer, identity, headers, query, cors)
+            return
+        writer.close()
+
+    async def _stream(self, writer, identity, headers, query, cors):
+        _, role, department_key = identity
+        subscriber = _Subscriber(role, department_key, self.config['queue_size'])
+        department = self.subscribers.setdefault(department_key, set())
+        department.add(subscriber)
+        self.count += 1
+        try:
+            writer.write((
+                "HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-store\r\n"
+                f"X-Accel-Buffering: no\r\n{cors}\r\n"
+            ).encode('latin-1'))
+            writer.write(f"retry: {self.config['retry_ms']}\n\n".encode('ascii'))
+            last_id = _last_event_id(headers.get('last-event-id') or (query.get('last_event_id') or [''])[0])
+            # Registered first, so nothing published while catching up is missed
+            head, published = self.head, set(self.pending)
+            if last_id is None or last_id >= head:
+                writer.write(ready_event(head))
+            else:
+                backlog = await asyncio.to_thread(self.feed.since, last_id, department_key, self.config['batch'])
+                if len(backlog) >= self.config['batch']:
+                    writer.write(reset_event(head))
+                else:
+                    for row in backlog:
+                        if (row.id <= head or row.id in published) and relevant(role, row):
+                            writer.write(format_event(row))
+                    writer.write(ready_event(head))
+            await writer.drain()
+
+            while subscriber.queue is not None:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), self.config['heartbeat'])
+                except asyncio.TimeoutError:
+                    event = b": ping\n\n"
+                if event is None:
+                    break
+                writer.write(event)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            department.discard(subscriber)
+            if not department:
+                self.subscribers.pop(department_key, None)
+            self.count -= 1
+            writer.close()
@@ -0,0 +1,108 @@
+"""Static file serving ahead of Flask.
+
+``StaticFiles`` wraps the WSGI app and answers ``GET``/``HEAD`` requests
+for files under ``/static/`` itself. Those requests never reach the
+request hooks, the session, or the limiter. For each file it:
+
+- picks the ``.br`` or ``.gz`` variant written by ``app.assets.build``
+  when the client's Accept-Encoding allows it (``Vary: Accept-Encoding``);
+- marks fingerprinted files in ``static/dist/`` as
+  ``public, max-age=31536000, immutable``, and everything else as
+  ``no-cache`` so it is revalidated;
+- sends an ETag and Last-Modified and answers conditional requests with
+  ``304 Not Modified``.
+
+Paths it cannot find fall through to the app, which 404s as before.
+``MEF_PROXY_HOPS`` enables ``ProxyFix`` for the number of reverse
+proxies in front of the app, so the scheme and client address come from
+``X-Forwarded-*``. Leave it at 0 when running ``run.py`` directly.
+"""
+import mimetypes
+import os
+import re
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+from werkzeug.wrappers import Request
+
+STATIC_CONFIG = {
+    # Reverse proxies in front of the app (0: none)
+    'proxy_hops': int(os.environ.get('MEF_PROXY_HOPS', 0)),
+    'immutable_max_age': 365 * 24 * 60 * 60,
+}
+
+# dist/<name>.<10 hex digits>.<ext>, as written by app.assets.build
+FINGERPRINTED = re.compile(r'^dist/.+\.[0-9a-f]{10}\.[A-Za-z0-9]+$')
+
+# Not in every system's mime.types
+mimetypes.add_type('font/woff2', '.woff2')
+
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+class StaticFiles:
+    """WSGI middleware serving ``prefix`` from ``directory``"""
+
+    def __init__(self, app, directory, prefix='/static/'):
+        self.app = app
+        self.directory = directory
+        self.prefix = prefix
+        # Which precompressed variants exist, per fingerprinted file; these
+        # never change once written, so the lookup is done only once
+        self._variants = {}
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD') or not path.startswith(self.prefix):
+            return self.app(environ, start_response)
+        filename = path[len(self.prefix):]
+        full_path = safe_join(self.directory, filename)
+        if full_path is None or not os.path.isfile(full_path):
+            return self.app(environ, start_response)
+        return self.serve(environ, filename, full_path)(environ, start_response)
+
+    def _available(self, filename, full_path, fingerprinted):
+        variants = self._variants.get(filename) if fingerprinted else None
+        if variants is None:
+            variants = tuple(
+                (encoding, suffix) for encoding, suffix in ENCODINGS
+                if os.path.isfile(full_path + suffix)
+            )
+            if fingerprinted:
+                self._variants[filename] = variants
+        return variants
+
+    def serve(self, environ, filename, full_path):
+        fingerprinted = bool(FINGERPRINTED.match(filename))
+        variants = self._available(filename, full_path, fingerprinted)
+        encoding = None
+        send_path = full_path
+        if variants:
+            accepted = Request(environ).accept_encodings
+            for name, suffix in variants:
+                if accepted[name]:
+                    encoding, send_path = name, full_path + suffix
+                    break
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        # Without a max_age send_file marks the response no-cache
+        max_age = STATIC_CONFIG['immutable_max_age'] if fingerprinted else None
+        # Name the asset itself, not the ``.gz``/``.br`` file sent in its place
+        response = send_file(send_path, environ, mimetype=mimetype, download_name=os.path.basename(filename),
+                             conditional=True, etag=True, max_age=max_age)
+        if fingerprinted:
+            response.cache_control.immutable = True
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if variants:
+            response.vary.add('Accept-Encoding')
+        return response
+
+def init_app(app):
+    """Serve app.static_folder ahead of Flask, behind ProxyFix if configured"""
+    if app.static_folder:
+        app.wsgi_app = StaticFiles(app.wsgi_app, app.static_folder, (app.static_url_path or '/static') + '/')
+    hops = STATIC_CONFIG['proxy_hops']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops, x_port=hops, x_prefix=hops)
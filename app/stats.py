@@ -0,0 +1,79 @@
+"""Per-user request counters kept in ``request_stats``.
+
+Counters are adjusted inside the same transaction as the write that
+changes a request, so the student dashboard can read them with a single
+primary-key lookup instead of counting ``requests`` on every page view.
+``rebuild()`` recomputes everything from ``requests`` to repair drift.
+"""
+
+# requests.status value -> request_stats column
+STATUS_COLUMNS = {
+    'Pending': 'pending',
+    'Mentor Approved': 'mentor_approved',
+    'Mentor Rejected': 'mentor_rejected',
+    'Advisor Approved': 'advisor_approved',
+    'Advisor Rejected': 'advisor_rejected',
+    'Approved': 'approved',
+    'Rejected': 'rejected',
+}
+
+EMPTY_STATS = {'total': 0, **{column: 0 for column in STATUS_COLUMNS.values()}}
+
+def record_submission(cur, user_id, status='Pending'):
+    """Count a newly inserted request"""
+    column = STATUS_COLUMNS[status]
+    cur.execute(f"""
+        INSERT INTO request_stats (user_id, total, {column}, last_activity_at)
+        VALUES (%s, 1, 1, NOW())
+        ON DUPLICATE KEY UPDATE total = total + 1, {column} = {column} + 1, last_activity_at = NOW()
+    """, (user_id,))
+
+def record_transition(cur, request_ids, old_status, new_status):
+    """Move the given requests' counts from ``old_status`` to ``new_status``.
+
+    Runs after the status UPDATE, for exactly the rows it moved (see
+    ``app.workflow``), so the old status is known and no per-row status
+    lookup is needed.
+    """
+    if not request_ids:
+        return
+    old_column = STATUS_COLUMNS[old_status]
+    new_column = STATUS_COLUMNS[new_status]
+    placeholders = ", ".join(["%s"] * len(request_ids))
+    cur.execute(f"""
+        UPDATE request_stats s
+        JOIN (
+            SELECT user_id, COUNT(*) AS n
+            FROM requests
+            WHERE id IN ({placeholders})
+            GROUP BY user_id
+        ) d ON d.user_id = s.user_id
+        SET s.{old_column} = s.{old_column} - d.n,
+            s.{new_column} = s.{new_column} + d.n,
+            s.last_activity_at = NOW()
+    """, tuple(request_ids))
+
+def fetch_stats(cur, user_id):
+    """Counters for one user as a dict (zeros if they never submitted)"""
+    columns = ", ".join(['total', *STATUS_COLUMNS.values()])
+    cur.execute(f"SELECT {columns} FROM request_stats WHERE user_id=%s", (user_id,))
+    row = cur.fetchone()
+    if not row:
+        return dict(EMPTY_STATS)
+    return dict(zip(['total', *STATUS_COLUMNS.values()], (int(v or 0) for v in row)))
+
+def rebuild(cur, user_id=None):
+    """Recompute counters from ``requests`` (all users, or just one)"""
+    sums = ", ".join(f"SUM(status = '{status}')" for status in STATUS_COLUMNS)
+    columns = ", ".join(STATUS_COLUMNS.values())
+    where = "WHERE user_id = %s" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+    cur.execute(f"DELETE FROM request_stats {where}", params)
+    cur.execute(f"""
+        INSERT INTO request_stats (user_id, total, {columns}, last_activity_at)
+        SELECT user_id, COUNT(*), {sums}, MAX(COALESCE(last_activity_at, updated_at, created_at))
+        FROM requests
+        {where}
+        GROUP BY user_id
+    """, params)
+    return cur.rowcount
@@ -0,0 +1,80 @@
+"""Request status workflow.
+
+    Pending --Mentor--> Mentor Approved --Advisor--> Advisor Approved --HOD--> Approved
+       |                      |                           |
+       +--> Mentor Rejected   +--> Advisor Rejected       +--> Rejected
+
+Every move is a compare-and-set: one ``UPDATE ... WHERE id=%s AND
+status=%s`` that only matches while the request is still in the state the
+role acts on. Two staff members deciding the same request at once can
+therefore never overwrite each other; the loser's UPDATE matches no row.
+"""
+from app import changes, mail, push, stats
+
+# role -> (status the role acts on, {action: new status})
+TRANSITIONS = {
+    'Mentor': ('Pending', {'Approve': 'Mentor Approved', 'Reject': 'Mentor Rejected'}),
+    'Advisor': ('Mentor Approved', {'Approve': 'Advisor Approved', 'Reject': 'Advisor Rejected'}),
+    'HOD': ('Advisor Approved', {'Approve': 'Approved', 'Reject': 'Rejected'}),
+}
+
+class IllegalTransition(ValueError):
+    """The role cannot take this action"""
+
+def transition_for(role, action):
+    """``(from_status, to_status)`` for a role's action"""
+    if role not in TRANSITIONS or action not in TRANSITIONS[role][1]:
+        raise IllegalTransition(f"{role} cannot {action} requests")
+    from_status, actions = TRANSITIONS[role]
+    return from_status, actions[action]
+
+def actionable_status(role):
+    """The status a role's queue is made of"""
+    return TRANSITIONS[role][0] if role in TRANSITIONS else None
+
+def apply(cur, role, action, request_id, department_key, advisor_note=None):
+    """Move one request if it is still where ``role`` can act on it.
+
+    Returns True when this call made the transition. Does not commit and
+    does not touch the dashboard counters (see ``apply_many``).
+    """
+    from_status, to_status = transition_for(role, action)
+    assignments = "status=%s, updated_at=NOW(), last_activity_at=NOW()"
+    params = [to_status]
+    if role == 'Advisor':
+        assignments += ", advisor_note=%s"
+        params.append(advisor_note or '')
+    cur.execute(f"""
+        UPDATE requests SET {assignments}
+        WHERE id=%s AND status=%s AND department_key=%s
+    """, params + [request_id, from_status, department_key])
+    return cur.rowcount == 1
+
+def apply_many(db, role, action, request_ids, department_key, advisor_note=None):
+    """Apply one decision to several requests in a single transaction; commits.
+
+    Each id gets its own conditional UPDATE so the rows actually moved are
+    known exactly; their counters are then adjusted in one statement, the
+    moves appended to the change feed (``app.changes``) and the
+    notifications queued (``app.push.enqueue``, ``app.mail.enqueue``).
+    Returns ``(moved_ids, to_status)``.
+    """
+    from_status, to_status = transition_for(role, action)
+    cur = db.cursor()
+    try:
+        moved = [
+            request_id for request_id in request_ids
+            if apply(cur, role, action, request_id, department_key, advisor_note)
+        ]
+        stats.record_transition(cur, moved, from_status, to_status)
+        changes.record(cur, moved, from_status)
+        # Queued in the same transaction, so only committed moves notify
+        push.enqueue(cur, moved, to_status)
+        mail.enqueue(cur, moved, to_status)
+        db.commit()
+        return moved, to_status
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
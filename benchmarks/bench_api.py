@@ -0,0 +1,91 @@
+"""JSON API payload size and serialisation cost for a staff queue page.
+
+Builds ``--rows`` synthetic queue rows and compares the mentor queue as
+rendered HTML (mentor.html, against the app.py application) with the
+``/api/v1/queues/mentor`` body for the same rows: every default field as
+objects, as ``shape=rows`` arrays, and projected to a few fields. Sizes
+are shown raw and gzipped; times are the best of ``--repeat`` for building
+the body and its ETag. No database is needed:
+
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --rows 10 100 --fields id,status,student_name
+"""
+import argparse
+import datetime
+import gzip
+import hashlib
+import os
+import runpy
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['MEF_TEMPLATE_WARMUP'] = 'false'
+
+from flask import render_template, session  # noqa: E402
+
+from app.api.resources import REQUESTS, dumps, shape  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REASON = "Attending my cousin's wedding in the home town; travelling back on the last day."
+
+def make_request(i):
+    """One request as every REQUESTS field, by name"""
+    created = datetime.datetime(2026, 3, 1, 9, 0) + datetime.timedelta(minutes=i)
+    return {
+        'id': 1000 + i, 'type': 'Leave', 'request_type': 'Leave', 'reason': REASON,
+        'from_date': datetime.date(2026, 3, 9), 'to_date': datetime.date(2026, 3, 11),
+        'status': 'Pending', 'student_name': f"Student {i:03d}", 'department': 'CSE',
+        'advisor_note': None, 'created_at': created, 'updated_at': None,
+    }
+
+def html_row(r):
+    """The row shape the mentor page is rendered from"""
+    return (r['id'], 7, r['type'], r['reason'], r['from_date'], r['to_date'], r['status'],
+            r['created_at'].strftime('%Y-%m-%d %H:%M'), r['student_name'], r['department'], r['created_at'])
+
+def api_body(requests, names, as_rows):
+    rows = [tuple(r[name] for name in names) for r in requests]
+    body = dumps({'data': shape(rows, names, as_rows), 'page': {'next': 'x' * 40, 'prev': None}})
+    hashlib.blake2b(body, digest_size=16).hexdigest()
+    return body
+
+def best(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--fields', default='id,status,student_name,from_date,to_date',
+                        help="projection for the last variant")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    projected = REQUESTS.parse_fields(args.fields)
+
+    flask_app = runpy.run_path(os.path.join(ROOT, 'app.py'), run_name='bench')['app']
+
+    print(f"{'rows':>5} {'variant':>16} {'bytes':>8} {'gzip':>7} {'of HTML':>8} {'time':>9}")
+    with flask_app.test_request_context('/mentor'):
+        session.update(id=7, username='mentor', role='Mentor', department='CSE')
+        for count in args.rows:
+            requests = [make_request(i) for i in range(count)]
+            rows = [html_row(r) for r in requests]
+            html_time, html = best(max(1, args.repeat // 10), lambda: render_template('mentor.html', requests=rows).encode())
+            variants = [('html', html_time, html)]
+            for name, names, as_rows in (('json objects', REQUESTS.default, False),
+                                         ('json rows', REQUESTS.default, True),
+                                         ('json projected', projected, True)):
+                variants.append((name, *best(args.repeat, lambda: api_body(requests, names, as_rows))))
+            for name, elapsed, body in variants:
+                print(f"{count:>5} {name:>16} {len(body):>8} {len(gzip.compress(body)):>7} "
+                      f"{len(body) / len(html):>7.0%} {elapsed * 1e6:>7.0f}us")
+
+if __name__ == '__main__':
+    main()
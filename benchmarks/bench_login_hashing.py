@@ -0,0 +1,86 @@
+"""Password verification latency under concurrent logins, per hash cost.
+
+Each simulated login is one ``verify`` on the bounded hashing pool from
+``app.auth.passwords``; no database is needed:
+
+    python benchmarks/bench_login_hashing.py
+    python benchmarks/bench_login_hashing.py --methods scrypt:32768:8:1 --concurrency 8 64 --workers 4
+
+``--inline`` also measures hashing on the calling threads, as login did
+before the pool. Pick the most expensive method whose p99 at the expected
+peak concurrency still meets the latency target.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash  # noqa: E402
+
+from app.auth.passwords import Hasher  # noqa: E402
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def run(verify, concurrency, logins):
+    """Run ``logins`` verifications from ``concurrency`` threads at once"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+    per_thread = max(1, logins // concurrency)
+
+    def client():
+        barrier.wait()
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            verify()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--logins', type=int, default=64, help="verifications per run")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="hashing pool size")
+    parser.add_argument('--inline', action='store_true', help="also hash on the calling threads")
+    args = parser.parse_args()
+
+    print(f"{'method':>22} {'mode':>7} {'conc':>5} {'p50':>9} {'p99':>9} {'logins/s':>9}")
+    for method in args.methods:
+        stored = generate_password_hash('correct horse', method)
+        hasher = Hasher(method, workers=args.workers, queue=max(args.concurrency), wait=600)
+        modes = [('pool', lambda: hasher.verify(stored, 'correct horse'))]
+        if args.inline:
+            modes.append(('inline', lambda: check_password_hash(stored, 'correct horse')))
+        for concurrency in args.concurrency:
+            for mode, verify in modes:
+                latencies, elapsed = run(verify, concurrency, args.logins)
+                print(
+                    f"{method:>22} {mode:>7} {concurrency:>5} "
+                    f"{percentile(latencies, 50) * 1000:>7.0f}ms {percentile(latencies, 99) * 1000:>7.0f}ms "
+                    f"{len(latencies) / elapsed:>9.1f}"
+                )
+
+if __name__ == '__main__':
+    main()
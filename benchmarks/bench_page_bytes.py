@@ -0,0 +1,92 @@
+"""HTML bytes and third-party origins per page, now and at an earlier revision.
+
+Renders every page template as it is now and as it was at ``--before``
+(any git revision) with the same empty context as bench_templates.py,
+and lists the HTML size of each, the size of the cacheable assets the
+page now links to, and how many other origins (each a DNS lookup and TLS
+handshake on a cold load) it needed then and needs now:
+
+    python benchmarks/bench_page_bytes.py --before fba3287
+"""
+import argparse
+import os
+import re
+import runpy
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_templates import CONTEXT, ROOT  # noqa: E402
+from jinja2 import ChainableUndefined, FileSystemLoader  # noqa: E402
+
+from app import templating  # noqa: E402
+
+STATIC_LINK = re.compile(r'(?:href|src)="/static/([^"?]+)')
+EXTERNAL_LINK = re.compile(r'(?:href|src)="https?://([^/"]+)')
+
+def origins(html):
+    hosts = set(EXTERNAL_LINK.findall(html.decode('utf-8')))
+    # Google Fonts stylesheets load the font files from a second origin
+    if 'fonts.googleapis.com' in hosts:
+        hosts.add('fonts.gstatic.com')
+    return hosts
+
+def git_templates(revision, directory):
+    """Check out ``templates/`` at ``revision`` into ``directory``"""
+    archive = subprocess.run(
+        ['git', 'archive', revision, 'templates'], cwd=ROOT, check=True, capture_output=True
+    ).stdout
+    subprocess.run(['tar', '-x', '-C', directory], input=archive, check=True)
+    return os.path.join(directory, 'templates')
+
+def render(env, name):
+    try:
+        return env.get_template(name).render(CONTEXT).encode('utf-8')
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--before', required=True, help="git revision to compare against")
+    args = parser.parse_args()
+
+    flask_app = runpy.run_path(os.path.join(ROOT, 'app.py'), run_name='bench')['app']
+    now_env = flask_app.jinja_env.overlay(undefined=ChainableUndefined)
+
+    with tempfile.TemporaryDirectory() as tmp, flask_app.test_request_context('/'):
+        before_env = flask_app.jinja_env.overlay(
+            undefined=ChainableUndefined, loader=FileSystemLoader(git_templates(args.before, tmp))
+        )
+        print(f"{'page':>32} {'before':>9} {'after':>9} {'change':>7} {'cacheable':>10} {'origins':>8}")
+        totals = [0, 0, 0, 0]
+        for name in templating.template_names(flask_app):
+            if name.startswith('components/'):
+                continue
+            before, after = render(before_env, name), render(now_env, name)
+            if before is None or after is None:
+                print(f"{name:>32}  skipped (needs page data)")
+                continue
+            cacheable = sum(
+                os.path.getsize(os.path.join(flask_app.static_folder, path))
+                for path in set(STATIC_LINK.findall(after.decode('utf-8')))
+                if os.path.exists(os.path.join(flask_app.static_folder, path))
+            )
+            origins_before, origins_after = len(origins(before)), len(origins(after))
+            totals[0] += len(before)
+            totals[1] += len(after)
+            totals[2] += origins_before
+            totals[3] += origins_after
+            print(
+                f"{name:>32} {len(before) / 1024:>7.1f}KB {len(after) / 1024:>7.1f}KB "
+                f"{(len(after) - len(before)) * 100 / len(before):>6.0f}% {cacheable / 1024:>8.1f}KB "
+                f"{origins_before:>3} -> {origins_after}"
+            )
+        print(
+            f"{'total':>32} {totals[0] / 1024:>7.1f}KB {totals[1] / 1024:>7.1f}KB "
+            f"{(totals[1] - totals[0]) * 100 / max(totals[0], 1):>6.0f}% {'':>10} {totals[2]:>3} -> {totals[3]}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Peak memory of the status report export, from 10 to 100k rows.
+
+Rows are generated in-process, so no database is needed:
+
+    python benchmarks/bench_pdf_export.py
+    python benchmarks/bench_pdf_export.py --sizes 10 1000 --legacy
+
+``--legacy`` also measures the previous FPDF implementation, which keeps
+the whole document in memory (skipped above 10k rows; it takes minutes).
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.reports import stream_status_report  # noqa: E402
+
+STATUSES = ['Pending', 'Mentor Approved', 'Advisor Approved', 'Approved', 'Rejected']
+
+def fake_rows(count):
+    created = datetime.datetime(2025, 1, 1, 9, 0)
+    for i in range(count):
+        yield (
+            i, 1, 'Leave', f"Medical leave for hospital appointment number {i}",
+            datetime.date(2025, 1, 2), datetime.date(2025, 1, 4), STATUSES[i % len(STATUSES)],
+            '2025-01-01 09:00', 'Student Name', 'CSE', created,
+        )
+
+def measure_streaming(count):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for chunk in stream_status_report(fake_rows(count), max_rows=count):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+def measure_legacy(count):
+    from fpdf import FPDF
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = list(fake_rows(count))
+    pdf = FPDF()
+    for row in rows:
+        pdf.add_page()
+        pdf.set_font("Arial", 'B', 12)
+        for value in row:
+            pdf.cell(0, 8, txt=str(value), ln=1)
+    size = len(pdf.output(dest='S').encode('latin1'))
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--legacy', action='store_true', help="also measure the in-memory FPDF export")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'impl':>10} {'pdf size':>12} {'peak mem':>12} {'time':>8}")
+    for count in args.sizes:
+        runs = [('streaming', measure_streaming)]
+        if args.legacy and count <= 10000:
+            runs.append(('fpdf', measure_legacy))
+        for name, measure in runs:
+            size, peak, elapsed = measure(count)
+            print(f"{count:>8} {name:>10} {size / 1024:>10.0f}KB {peak / 1024:>10.0f}KB {elapsed:>7.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Push dispatcher throughput, in pushes per second for one worker.
+
+Sends pushes from an in-memory outbox to the local push stand-in (run in
+a separate process, answering after ``--latency`` seconds like a remote
+push service would), at several concurrency levels, with and without
+connection reuse. No database or network is needed:
+
+    python benchmarks/bench_push.py
+    python benchmarks/bench_push.py --pushes 5000 --latency 0.05 --encrypt
+
+``--encrypt`` signs every push with VAPID and encrypts its payload (needs
+``cryptography``), which is what a configured worker does.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import push  # noqa: E402
+
+def _serve(latency, ports):
+    async def serve():
+        standin = await push.PushStandIn(latency=latency).start()
+        ports.put(standin.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+def make_pushes(standin_url, count, subscriptions, keys):
+    p256dh, auth = keys
+    return [
+        push.Push(i, i % subscriptions, standin_url(f"sub{i % subscriptions}"), p256dh, auth,
+                  f"request-{i}", '{"title": "Request Approved", "body": "Your Leave request was approved"}', 1)
+        for i in range(count)
+    ]
+
+def bench(pushes, concurrency, keep_alive, vapid):
+    outbox = push.MemoryOutbox(pushes)
+    config = {'concurrency': concurrency, 'connections_per_origin': concurrency, 'batch': 500}
+    client = push.PushClient(concurrency, timeout=30, keep_alive=keep_alive)
+    dispatcher = push.Dispatcher(outbox=outbox, client=client, config=config, vapid=vapid)
+    started = time.perf_counter()
+    asyncio.run(dispatcher.serve(once=True))
+    elapsed = time.perf_counter() - started
+    assert len(outbox.sent) == len(pushes), "not every push was accepted"
+    return len(pushes) / elapsed, client.opened
+
+def receiver_keys():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    key = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return push._b64encode(key), push._b64encode(os.urandom(16))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pushes', type=int, default=2000)
+    parser.add_argument('--subscriptions', type=int, default=500, help="distinct endpoints")
+    parser.add_argument('--latency', type=float, default=0.02, help="push service response time (seconds)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64, 256])
+    parser.add_argument('--encrypt', action='store_true', help="VAPID-sign and encrypt (needs cryptography)")
+    args = parser.parse_args()
+
+    if args.encrypt and push.ec is None:
+        parser.error("--encrypt needs the cryptography package")
+    vapid = push.Vapid(push.Vapid.generate()[0], 'mailto:bench@localhost') if args.encrypt else False
+    keys = receiver_keys() if args.encrypt else (None, None)
+
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(args.latency, ports), daemon=True)
+    server.start()
+    try:
+        standin = push.PushStandIn(port=ports.get(timeout=10))
+        pushes = make_pushes(standin.url, args.pushes, args.subscriptions, keys)
+
+        print(f"{args.pushes} pushes, {args.latency * 1000:.0f}ms service latency, "
+              f"{'encrypted' if args.encrypt else 'empty'} payloads")
+        print(f"{'concurrency':>11} {'reuse':>6} {'pushes/s':>10} {'connections':>12}")
+        for concurrency in args.concurrency:
+            for keep_alive in (False, True):
+                rate, opened = bench(pushes, concurrency, keep_alive, vapid)
+                print(f"{concurrency:>11} {'yes' if keep_alive else 'no':>6} {rate:>10.0f} {opened:>12}")
+    finally:
+        server.terminate()
+
+if __name__ == '__main__':
+    main()
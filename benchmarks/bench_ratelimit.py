@@ -0,0 +1,120 @@
+"""Per-request cost of the rate limiter, memory:// versus the shared SQLite store.
+
+Measures a bare limiter hit and a full Flask request to a limited route
+(minus the same request to an unlimited one). A temporary SQLite file is
+used, so no setup is needed:
+
+    python benchmarks/bench_ratelimit.py
+    python benchmarks/bench_ratelimit.py --hits 20000 --processes 4
+
+``--processes`` also checks that a limit is enforced across processes:
+the total of allowed hits must equal the limit, whatever the worker count.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask_limiter import Limiter  # noqa: E402
+from limits import RateLimitItemPerMinute  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import STRATEGIES  # noqa: E402
+
+import app.limiter_storage  # noqa: E402,F401  registers sqlite://
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def bench_hits(uri, strategy, hits):
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = RateLimitItemPerMinute(10 ** 9)
+    latencies = []
+    for i in range(hits):
+        started = time.perf_counter()
+        limiter.hit(item, 'bench', str(i % 50))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def bench_requests(uri, strategy, requests):
+    flask_app = Flask(__name__)
+    limiter = Limiter(lambda: '127.0.0.1', app=flask_app, storage_uri=uri, strategy=strategy)
+
+    @flask_app.route('/limited')
+    @limiter.limit("1000000 per minute")
+    def limited():
+        return 'ok'
+
+    @flask_app.route('/open')
+    @limiter.exempt
+    def open_route():
+        return 'ok'
+
+    client = flask_app.test_client()
+    timings = {}
+    for path in ('/open', '/limited'):
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(path)
+            latencies.append(time.perf_counter() - started)
+        timings[path] = latencies
+    return timings
+
+def _contend(uri, strategy, attempts, limit, results):
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = RateLimitItemPerMinute(limit)
+    results.put(sum(limiter.hit(item, 'shared') for _ in range(attempts)))
+
+def check_shared(uri, strategy, processes, limit):
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_contend, args=(uri, strategy, limit, limit, results))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    allowed = sum(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    return allowed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hits', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=0, help="also check limits across N processes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ('memory', 'memory://', 'fixed-window'),
+            ('memory', 'memory://', 'moving-window'),
+            ('sqlite', f"sqlite:///{tmp}/fixed.sqlite3", 'fixed-window'),
+            ('sqlite', f"sqlite:///{tmp}/moving.sqlite3", 'moving-window'),
+        ]
+
+        print(f"{'backend':>8} {'strategy':>14} {'hit p50':>9} {'hit p99':>9} {'req overhead p50':>17}")
+        for name, uri, strategy in backends:
+            hits = bench_hits(uri, strategy, args.hits)
+            timings = bench_requests(uri, strategy, args.requests)
+            overhead = percentile(timings['/limited'], 50) - percentile(timings['/open'], 50)
+            print(
+                f"{name:>8} {strategy:>14} {percentile(hits, 50) * 1e6:>7.1f}us {percentile(hits, 99) * 1e6:>7.1f}us "
+                f"{overhead * 1e6:>15.1f}us"
+            )
+
+        if args.processes:
+            limit = 100
+            for strategy in ('fixed-window', 'moving-window'):
+                uri = f"sqlite:///{tmp}/shared-{strategy}.sqlite3"
+                allowed = check_shared(uri, strategy, args.processes, limit)
+                print(f"{args.processes} processes, limit {limit}/minute, {strategy}: {allowed} allowed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Load test: how many concurrent queue subscribers one stream hub holds.
+
+Starts ``flask sse serve``'s hub in a separate process over an in-memory
+change feed that gains a change every ``--interval`` seconds (cycling
+through ``--departments``). Subscribers are then opened in steps and, at
+each step, the hub's memory and the fan-out latency (change written ->
+event read by every subscriber of its department) are measured. No
+database is needed:
+
+    python benchmarks/bench_sse.py
+    python benchmarks/bench_sse.py --subscribers 1000 5000 9000 --departments 20
+
+Each subscriber is one socket in this process and one in the hub, so the
+open-file limit (``ulimit -n``) caps the largest step.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import changes, sse  # noqa: E402
+
+SECRET = 'bench-secret'
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else float('nan')
+
+def _raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+def _rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+def _hub(departments, interval, ports):
+    _raise_file_limit()
+
+    async def main():
+        feed = changes.MemoryFeed()
+        hub = await sse.Hub(SECRET, feed=feed, config={'poll_interval': 0.05}).start(port=0)
+        ports.put(hub.port)
+        n = 0
+        while True:
+            await asyncio.sleep(interval)
+            n += 1
+            # The write time rides in student_name so subscribers can time delivery
+            feed.append(n, f"dept{n % departments}", None, 'Pending', student_name=repr(time.time()))
+
+    asyncio.run(main())
+
+class Subscribers:
+    def __init__(self, port, departments):
+        self.port = port
+        self.departments = departments
+        self.latencies = []
+        self.received = 0
+        self.tasks = []
+        self.failed = 0
+
+    async def open(self, count, parallel=200):
+        """Open ``count`` more subscribers, ``parallel`` connecting at a time"""
+        limit = asyncio.Semaphore(parallel)
+        loop = asyncio.get_running_loop()
+        first = len(self.tasks)
+
+        async def one(i):
+            async with limit:
+                connected = loop.create_future()
+                self.tasks.append(asyncio.create_task(self._listen(i, connected)))
+                await connected
+
+        await asyncio.gather(*(one(first + i) for i in range(count)))
+
+    async def _listen(self, i, connected):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        except OSError:
+            self.failed += 1
+            connected.set_result(False)
+            return
+        token = sse.stream_token(SECRET, i, 'Mentor', f"dept{i % self.departments}")
+        writer.write(f"GET /events/queue?token={token} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+        try:
+            status = await reader.readline()
+            if not status.startswith(b'HTTP/1.1 200'):
+                self.failed += 1
+                connected.set_result(False)
+                return
+            connected.set_result(True)
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.startswith(b'data: {"request_id"'):
+                    sent = float(json.loads(line[6:])['student_name'])
+                    self.latencies.append(time.time() - sent)
+                    self.received += 1
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+
+async def run(args, port, hub_pid):
+    subscribers = Subscribers(port, args.departments)
+    print(f"{'subscribers':>11} {'hub RSS':>9} {'KB/sub':>7} {'events/s':>9} {'p50':>8} {'p99':>8} {'failed':>7}")
+    base_rss = _rss_mb(hub_pid)
+    for target in sorted(args.subscribers):
+        opening = target - len(subscribers.tasks)
+        if opening > 0:
+            await subscribers.open(opening)
+        await asyncio.sleep(1)
+        subscribers.latencies, subscribers.received = [], 0
+        await asyncio.sleep(args.duration)
+        rss = _rss_mb(hub_pid)
+        per_sub = (rss - base_rss) * 1024 / max(1, target - subscribers.failed)
+        lat = subscribers.latencies
+        print(
+            f"{target:>11} {rss:>7.1f}MB {per_sub:>7.1f} {subscribers.received / args.duration:>9.0f} "
+            f"{percentile(lat, 50) * 1000:>6.1f}ms {percentile(lat, 99) * 1000:>6.1f}ms {subscribers.failed:>7}"
+        )
+    subscribers.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[500, 2000, 5000, 9000])
+    parser.add_argument('--departments', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=0.1, help="seconds between changes")
+    parser.add_argument('--duration', type=float, default=5, help="seconds measured per step")
+    args = parser.parse_args()
+
+    limit = _raise_file_limit()
+    if max(args.subscribers) + 100 > limit:
+        parser.error(f"the open-file limit ({limit}) is too low for {max(args.subscribers)} subscribers")
+
+    ports = multiprocessing.Queue()
+    hub = multiprocessing.Process(target=_hub, args=(args.departments, args.interval, ports), daemon=True)
+    hub.start()
+    try:
+        port = ports.get(timeout=10)
+        print(f"{args.departments} departments, a change every {args.interval * 1000:.0f}ms, "
+              f"{args.duration:.0f}s per step")
+        asyncio.run(run(args, port, hub.pid))
+    finally:
+        hub.terminate()
+
+if __name__ == '__main__':
+    main()
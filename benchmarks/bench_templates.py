@@ -0,0 +1,96 @@
+"""First-render versus steady-state time for every template.
+
+For each template three timings are taken, each the best of ``--repeat``:
+
+- ``compile``: a fresh process without bytecode cache (the old cold start)
+- ``bytecode``: a fresh process with the bytecode cache filled
+- ``warm``: render only, the template already loaded
+
+Templates are rendered against the app.py application with an empty
+context (missing variables and unknown URLs render as blanks), so no
+database is needed:
+
+    python benchmarks/bench_templates.py
+    python benchmarks/bench_templates.py --templates dashboard.html status.html
+"""
+import argparse
+import os
+import runpy
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['MEF_TEMPLATE_WARMUP'] = 'false'
+
+from flask import url_for  # noqa: E402
+from jinja2 import ChainableUndefined, FileSystemBytecodeCache  # noqa: E402
+from werkzeug.routing import BuildError  # noqa: E402
+
+from app import templating  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def lenient_url_for(endpoint, **values):
+    try:
+        return url_for(endpoint, **values)
+    except BuildError:
+        return '#'
+
+CONTEXT = {'url_for': lenient_url_for, 'current_user': ChainableUndefined(name='current_user')}
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def best(repeat, fn):
+    return min(timed(fn) for _ in range(repeat))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--templates', nargs='+', default=None)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    flask_app = runpy.run_path(os.path.join(ROOT, 'app.py'), run_name='bench')['app']
+    names = args.templates or templating.template_names(flask_app)
+
+    with tempfile.TemporaryDirectory() as tmp, flask_app.test_request_context('/'):
+        bytecode_cache = FileSystemBytecodeCache(tmp)
+
+        def fresh_env(cache=None):
+            # cache_size=0: nothing survives between loads, like a new worker
+            return flask_app.jinja_env.overlay(undefined=ChainableUndefined, bytecode_cache=cache, cache_size=0)
+
+        # Steady state: templates (and the layouts they extend) stay loaded
+        warm_env = flask_app.jinja_env.overlay(undefined=ChainableUndefined, cache_size=400)
+
+        def first_render(env, name):
+            return lambda: env.get_template(name).render(CONTEXT)
+
+        print(f"{'template':>32} {'lines':>6} {'compile':>9} {'bytecode':>9} {'warm':>9}")
+        totals = [0.0, 0.0, 0.0]
+        for name in names:
+            source, _, _ = flask_app.jinja_env.loader.get_source(flask_app.jinja_env, name)
+            try:
+                compile_time = best(args.repeat, first_render(fresh_env(), name))
+                fresh_env(bytecode_cache).get_template(name)  # fill the cache
+                bytecode_time = best(args.repeat, first_render(fresh_env(bytecode_cache), name))
+                template = warm_env.get_template(name)
+                template.render(CONTEXT)
+                warm_time = best(args.repeat, lambda: template.render(CONTEXT))
+            except Exception as e:
+                print(f"{name:>32} {source.count(chr(10)):>6}  skipped: {e}")
+                continue
+            for i, value in enumerate((compile_time, bytecode_time, warm_time)):
+                totals[i] += value
+            print(
+                f"{name:>32} {source.count(chr(10)):>6} {compile_time * 1000:>7.1f}ms "
+                f"{bytecode_time * 1000:>7.1f}ms {warm_time * 1000:>7.1f}ms"
+            )
+        print(f"{'total':>32} {'':>6} {totals[0] * 1000:>7.1f}ms {totals[1] * 1000:>7.1f}ms {totals[2] * 1000:>7.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,90 @@
 // service-worker.js
+// Served from /service-worker.js by app/offline.py, which prepends
+// self.MEF_OFFLINE (cache version, app shell, cached pages).
+const offline = self.MEF_OFFLINE || null;
+const SHELL_CACHE = offline && 'mef-shell-' + offline.version;
+const STATIC_CACHE = offline && 'mef-static-' + offline.version;
+const PAGE_CACHE = offline && 'mef-pages-' + offline.version;
+
+self.addEventListener('install', function(event) {
+  if (!offline) return;
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(function(cache) { return cache.addAll(offline.shell); })
+      .then(function() { return self.skipWaiting(); })
+  );
+});
+
+self.addEventListener('activate', function(event) {
+  if (!offline) return;
+  const current = [SHELL_CACHE, STATIC_CACHE, PAGE_CACHE];
+  // Everything cached for an earlier deploy goes, pages included: they link to its assets
+  event.waitUntil(
+    caches.keys()
+      .then(function(names) {
+        return Promise.all(names
+          .filter(function(name) { return name.startsWith('mef-') && current.indexOf(name) === -1; })
+          .map(function(name) { return caches.delete(name); }));
+      })
+      .then(function() { return self.clients.claim(); })
+  );
+});
+
+self.addEventListener('fetch', function(event) {
+  if (!offline) return;
+  const request = event.request;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  // A submitted form may change what the cached pages show; signing in or out changes whose they are
+  if (request.method !== 'GET' || offline.clear.indexOf(url.pathname) !== -1) {
+    event.waitUntil(caches.delete(PAGE_CACHE));
+    return;
+  }
+  if (url.pathname.startsWith(offline.static)) {
+    event.respondWith(cacheFirst(request));
+  } else if (request.mode === 'navigate' && offline.pages.indexOf(url.pathname) !== -1) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});
+
+// Fingerprinted files never change, so a cached copy is always current
+function cacheFirst(request) {
+  return caches.match(request).then(function(cached) {
+    return cached || fetch(request).then(function(response) {
+      if (response.ok) {
+        const copy = response.clone();
+        caches.open(STATIC_CACHE).then(function(cache) { cache.put(request, copy); });
+      }
+      return response;
+    });
+  });
+}
+
+function staleWhileRevalidate(event) {
+  const request = event.request;
+  return caches.open(PAGE_CACHE).then(function(cache) {
+    return cache.match(request).then(function(cached) {
+      const network = fetch(request).then(function(response) {
+        const cacheControl = response.headers.get('Cache-Control') || '';
+        if (response.redirected || response.status === 401 || response.status === 403) {
+          // Signed out: the cached copy must not outlive the session
+          return cache.delete(request).then(function() { return response; });
+        }
+        if (response.ok && cacheControl.indexOf('no-store') === -1) {
+          return cache.put(request, response.clone()).then(function() { return response; });
+        }
+        return response;
+      });
+      if (cached) {
+        event.waitUntil(network.catch(function() {}));
+        return cached;
+      }
+      return network;
+    });
+  });
+}
+
 self.addEventListener('push', function(event) {
   const data = event.data ? event.data.json() : {};
   const title = data.title || 'MEF Portal Notification';
@@ -6,6 +92,8 @@ self.addEventListener('push', function(event) {
     body: data.body || 'You have a new notification.',
     icon: '/static/mef_logo.png',
     badge: '/static/mef_logo.png',
+    // One notification per request: a later decision replaces the earlier one
+    tag: data.tag,
     data: data.url || '/status'
   };
   event.waitUntil(self.registration.showNotification(title, options));
@@ -0,0 +1,19 @@
+// Filter requests by student
+document.querySelectorAll('.student-item').forEach(item => {
+    item.addEventListener('click', function() {
+        const regNumber = this.dataset.reg;
+
+        // Highlight selected student
+        document.querySelectorAll('.student-item').forEach(s => s.style.background = '#f8f9fa');
+        this.style.background = '#e9ecef';
+
+        // Filter request cards
+        document.querySelectorAll('.request-card').forEach(card => {
+            if (card.dataset.reg === regNumber) {
+                card.style.display = 'block';
+            } else {
+                card.style.display = 'none';
+            }
+        });
+    });
+});
@@ -0,0 +1,36 @@
+// Mobile FAB for showing student sidebar
+document.addEventListener('DOMContentLoaded', function () {
+    const fab = document.getElementById('mobile-fab');
+    const sidebar = document.querySelector('.sidebar-students');
+    const mediaQuery = window.matchMedia('(max-width: 768px)');
+
+    function handleScreenChange(e) {
+        if (e.matches) {
+            fab.style.display = 'flex';
+            sidebar.style.display = 'none';
+            sidebar.dataset.visible = 'false';
+        } else {
+            fab.style.display = 'none';
+            sidebar.style.display = 'block';
+        }
+    }
+
+    // Initial check
+    handleScreenChange(mediaQuery);
+
+    // Add listener for changes
+    mediaQuery.addEventListener('change', handleScreenChange);
+
+    // FAB click handler
+    fab.addEventListener('click', function () {
+        if (sidebar.dataset.visible === 'true') {
+            sidebar.style.display = 'none';
+            sidebar.dataset.visible = 'false';
+            fab.innerHTML = '<i class="fas fa-users" style="font-size:1.2rem;"></i>';
+        } else {
+            sidebar.style.display = 'block';
+            sidebar.dataset.visible = 'true';
+            fab.innerHTML = '<i class="fas fa-times" style="font-size:1.2rem;"></i>';
+        }
+    });
+});
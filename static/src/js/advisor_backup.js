@@ -0,0 +1,130 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // Store active student for highlighting
+    let activeStudent = null;
+
+    // Function to reset all students (remove active state)
+    function resetStudents() {
+        document.querySelectorAll('.student-item').forEach(student => {
+            student.classList.remove('active');
+        });
+    }
+
+    // Function to show filter status message
+    function updateFilterStatus(isFiltered, studentName = '') {
+        const tableContainer = document.querySelector('.table-container');
+        let filterStatus = document.getElementById('filter-status');
+
+        if (!filterStatus) {
+            filterStatus = document.createElement('div');
+            filterStatus.id = 'filter-status';
+            filterStatus.style.padding = '10px 20px';
+            filterStatus.style.borderBottom = '1px solid #eaeaea';
+            filterStatus.style.backgroundColor = '#f9faff';
+            filterStatus.style.fontSize = '0.9rem';
+            filterStatus.style.display = 'none';
+
+            // Insert after the header section
+            const headerSection = tableContainer.querySelector('div');
+            tableContainer.insertBefore(filterStatus, headerSection.nextSibling);
+        }
+
+        if (isFiltered) {
+            filterStatus.innerHTML = `
+            <div style="display:flex;justify-content:space-between;align-items:center;">
+                <span><i class="fas fa-filter"></i> Showing requests for: <strong>${studentName}</strong></span>
+                <button id="clear-filter" style="background:none;border:none;color:#1a237e;cursor:pointer;font-size:0.85rem;padding:2px 5px;border-radius:4px;">
+                    <i class="fas fa-times"></i> Clear
+                </button>
+            </div>
+        `;
+            filterStatus.style.display = 'block';
+
+            // Add event listener to the clear button
+            document.getElementById('clear-filter').addEventListener('click', function () {
+                showAllRequests();
+            });
+        } else {
+            filterStatus.style.display = 'none';
+        }
+    }
+
+    // Function to filter requests
+    function filterRequestsByStudent(reg, studentName) {
+        var foundRows = false;
+        document.querySelectorAll('tbody tr').forEach(function (row) {
+            if (row.getAttribute('data-reg') === reg) {
+                row.style.display = '';
+                foundRows = true;
+            } else {
+                row.style.display = 'none';
+            }
+        });
+
+        // Show a message if no requests found
+        var noRequestsMsg = document.getElementById('no-requests-msg');
+        var tbody = document.querySelector('tbody');
+
+        if (!foundRows) {
+            if (!noRequestsMsg) {
+                noRequestsMsg = document.createElement('tr');
+                noRequestsMsg.id = 'no-requests-msg';
+                noRequestsMsg.innerHTML = `
+                <td colspan="8">
+                    <div style="padding:30px 20px;text-align:center;">
+                        <div style="color:#999;margin-bottom:10px;">
+                            <i class="fas fa-search" style="font-size:2rem;"></i>
+                        </div>
+                        <h3 style="margin:0 0 5px;color:#333;font-weight:500;">No Requests Found</h3>
+                        <p style="color:#666;margin:0;">No requests from this student require your attention.</p>
+                    </div>
+                </td>
+            `;
+                tbody.appendChild(noRequestsMsg);
+            } else {
+                noRequestsMsg.style.display = '';
+            }
+        } else if (noRequestsMsg) {
+            noRequestsMsg.style.display = 'none';
+        }
+
+        updateFilterStatus(true, studentName);
+    }
+
+    // Function to show all requests
+    function showAllRequests() {
+        document.querySelectorAll('tbody tr').forEach(function (row) {
+            row.style.display = '';
+        });
+
+        var noRequestsMsg = document.getElementById('no-requests-msg');
+        if (noRequestsMsg) {
+            noRequestsMsg.style.display = 'none';
+        }
+
+        resetStudents();
+        activeStudent = null;
+        updateFilterStatus(false);
+    }
+
+    // Set up click handlers for student items
+    document.querySelectorAll('.student-item').forEach(function (item) {
+        item.addEventListener('click', function () {
+            const reg = this.getAttribute('data-reg').toString().trim();
+            const name = this.querySelector('.student-name').textContent;
+
+            resetStudents();
+            this.classList.add('active');
+            activeStudent = reg;
+
+            filterRequestsByStudent(reg, name);
+        });
+    });
+
+    // Show All button
+    var showAllBtn = document.getElementById('show-all-btn');
+    if (showAllBtn) {
+        showAllBtn.addEventListener('click', function () {
+            showAllRequests();
+        });
+    }
+});
@@ -0,0 +1,17 @@
+// Highlight active navigation link
+document.addEventListener('DOMContentLoaded', function () {
+    const currentPath = window.location.pathname;
+    const navItems = document.querySelectorAll('.nav-item');
+
+    navItems.forEach(link => {
+        const linkPath = new URL(link.href).pathname;
+        if (currentPath === linkPath ||
+            (currentPath.includes('status') && linkPath.includes('status')) ||
+            (currentPath.includes('dashboard') && linkPath.includes('dashboard')) ||
+            (currentPath.includes('request') && linkPath.includes('request')) ||
+            (currentPath.includes('mentor') && linkPath.includes('mentor')) ||
+            (currentPath === '/' && linkPath.includes('login'))) {
+            link.classList.add('active');
+        }
+    });
+});
@@ -0,0 +1,9 @@
+(function () {
+    var selectAll = document.getElementById('bulkSelectAll');
+    if (!selectAll) return;
+    selectAll.addEventListener('change', function () {
+        document.querySelectorAll('input[name="request_ids"][form="bulkActionForm"]').forEach(function (box) {
+            box.checked = selectAll.checked;
+        });
+    });
+})();
@@ -0,0 +1,131 @@
+// Approve/reject in place (templates/components/inline_decisions.html).
+// The action routes answer fetch requests with per-request outcomes, so a
+// decision costs one UPDATE and the page only drops or marks the cards it
+// touched. Anything unexpected falls back to the normal form post.
+(function () {
+    var notice = document.getElementById('decisionNotice');
+    if (!notice || !window.fetch || !window.FormData) return;
+
+    function card(requestId) {
+        return document.querySelector('.request-card[data-request-id="' + requestId + '"]');
+    }
+
+    function show(message, category) {
+        notice.textContent = message;
+        notice.className = 'decision-notice decision-notice--' + (category || 'info');
+        notice.hidden = false;
+    }
+
+    function setStatus(element, status) {
+        var badge = element.querySelector('.status-badge');
+        if (!badge || !status) return;
+        badge.textContent = status;
+        badge.className = 'status-badge ' + (status.indexOf('Reject') !== -1 ? 'status-rejected'
+            : status === 'Approved' ? 'status-approved' : 'status-pending');
+    }
+
+    function markDecided(element, status) {
+        element.classList.add('request-card--decided');
+        setStatus(element, status);
+        var box = element.querySelector('.bulk-select');
+        if (box) {
+            box.checked = false;
+            box.disabled = true;
+        }
+    }
+
+    function apply(result) {
+        var element = card(result.id);
+        if (!element) return;
+        if (result.outcome === 'updated' && result.remove) {
+            // Off this page now, as after a reload
+            element.remove();
+            document.querySelectorAll('[data-queue-count]').forEach(function (counter) {
+                counter.textContent = Math.max(0, parseInt(counter.textContent, 10) - 1);
+            });
+        } else if (result.outcome === 'updated') {
+            // Still listed after a reload (the HOD page keeps rejected
+            // requests): show it as processed instead
+            setStatus(element, result.status);
+            var box = element.querySelector('.bulk-select');
+            if (box) box.remove();
+            var form = element.querySelector('form[data-inline-decision]');
+            if (form) {
+                var done = document.createElement('span');
+                done.className = 'decision-done';
+                done.textContent = 'Already processed';
+                form.replaceWith(done);
+            }
+        } else if (result.outcome === 'not_actionable') {
+            markDecided(element, result.status);
+        }
+    }
+
+    function cardsFor(form) {
+        if (form.id === 'bulkActionForm') {
+            return Array.prototype.map.call(
+                document.querySelectorAll('input[name="request_ids"][form="bulkActionForm"]:checked'),
+                function (box) { return box.closest('.request-card'); }
+            ).filter(Boolean);
+        }
+        var own = form.closest('.request-card');
+        return own ? [own] : [];
+    }
+
+    function fallback(form, submitter) {
+        // Native submit skips this listener; keep the clicked button's value
+        var field = document.createElement('input');
+        field.type = 'hidden';
+        field.name = submitter.name;
+        field.value = submitter.value;
+        form.appendChild(field);
+        HTMLFormElement.prototype.submit.call(form);
+    }
+
+    document.addEventListener('submit', function (event) {
+        var form = event.target;
+        if (form.id !== 'bulkActionForm' && !form.hasAttribute('data-inline-decision')) return;
+        var submitter = event.submitter;
+        if (!submitter || !submitter.name) return;
+        event.preventDefault();
+
+        var data = new FormData(form);
+        data.append(submitter.name, submitter.value);
+        var cards = cardsFor(form);
+        cards.forEach(function (element) {
+            // queue_stream.js leaves cards alone while their decision is in flight
+            element.dataset.deciding = '1';
+            element.classList.add('request-card--deciding');
+        });
+
+        fetch(form.action, {
+            method: 'POST',
+            body: data,
+            credentials: 'same-origin',
+            headers: {'Accept': 'application/json'}
+        }).then(function (response) {
+            var type = response.headers.get('Content-Type') || '';
+            if (type.indexOf('application/json') === -1) throw new Error('not json');
+            return response.json().then(function (body) {
+                return {ok: response.ok, body: body};
+            });
+        }).then(function (reply) {
+            cards.forEach(function (element) {
+                delete element.dataset.deciding;
+                element.classList.remove('request-card--deciding');
+            });
+            if (!reply.ok) {
+                show(reply.body.error || 'Error updating request status', 'danger');
+                return;
+            }
+            reply.body.results.forEach(apply);
+            show(reply.body.message, reply.body.category);
+            var selectAll = document.getElementById('bulkSelectAll');
+            if (selectAll) selectAll.checked = false;
+            // Queue emptied: reload once for the next page or the empty state
+            if (!document.querySelector('.request-card')) window.location.reload();
+        }).catch(function () {
+            fallback(form, submitter);
+        });
+    });
+})();
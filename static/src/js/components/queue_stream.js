@@ -0,0 +1,66 @@
+// Live queue updates (templates/components/queue_stream.html).
+// Requests entering the queue are counted in the banner; requests someone
+// else decided are marked on the page. Updates are idempotent, so an event
+// delivered twice after a reconnect changes nothing.
+(function () {
+    var bar = document.getElementById('queueUpdates');
+    if (!bar || !window.EventSource) return;
+    var queueStatus = bar.dataset.queueStatus;
+    var text = bar.querySelector('.queue-updates-text');
+    var added = new Set();
+    var decided = new Set();
+    var stale = false;
+
+    function card(requestId) {
+        return document.querySelector('.request-card[data-request-id="' + requestId + '"]');
+    }
+
+    function plural(count, word) {
+        return count + ' ' + word + (count === 1 ? '' : 's');
+    }
+
+    function render() {
+        var parts = [];
+        if (added.size) parts.push(plural(added.size, 'new request'));
+        if (decided.size) parts.push(plural(decided.size, 'request') + ' decided by someone else');
+        if (stale && !parts.length) parts.push('The queue has changed');
+        text.textContent = parts.join(' · ');
+        bar.hidden = !parts.length;
+    }
+
+    function markDecided(element, status) {
+        element.classList.add('request-card--decided');
+        var badge = element.querySelector('.status-badge');
+        if (badge) badge.textContent = status;
+        var box = element.querySelector('.bulk-select');
+        if (box) {
+            box.checked = false;
+            box.disabled = true;
+        }
+    }
+
+    var source = new EventSource(bar.dataset.streamUrl);
+    source.addEventListener('queue', function (event) {
+        var change = JSON.parse(event.data);
+        var existing = card(change.request_id);
+        if (change.status === queueStatus) {
+            if (!existing) added.add(change.request_id);
+        } else {
+            added.delete(change.request_id);
+            if (existing && !existing.dataset.deciding && !existing.classList.contains('request-card--decided')) {
+                markDecided(existing, change.status);
+                decided.add(change.request_id);
+            }
+        }
+        render();
+    });
+    // Too far behind to replay: offer a reload
+    source.addEventListener('reset', function () {
+        stale = true;
+        render();
+    });
+
+    bar.querySelector('.queue-updates-show').addEventListener('click', function () {
+        window.location.reload();
+    });
+})();
@@ -0,0 +1,21 @@
+// Show/hide year and student type based on role
+document.getElementById('role').addEventListener('change', function () {
+    const yearGroup = document.getElementById('year').closest('.form-group');
+    const studentTypeGroup = document.getElementById('student_type').closest('.form-group');
+    const mentorEmailGroup = document.getElementById('mentor_email').closest('.form-group');
+
+    if (this.value === 'Student') {
+        yearGroup.style.display = 'flex';
+        studentTypeGroup.style.display = 'flex';
+        mentorEmailGroup.style.display = 'flex';
+    } else {
+        yearGroup.style.display = 'none';
+        studentTypeGroup.style.display = 'none';
+        mentorEmailGroup.style.display = 'none';
+    }
+});
+
+// Initialize visibility on page load
+document.addEventListener('DOMContentLoaded', function () {
+    document.getElementById('role').dispatchEvent(new Event('change'));
+});
@@ -0,0 +1,18 @@
+// Register the service worker (app/offline.py): it caches the app shell and
+// keeps the last copy of /status and /dashboard for slow or no connections.
+(function () {
+    var script = document.currentScript;
+    if (!('serviceWorker' in navigator) || !script) return;
+    var workerUrl = script.getAttribute('data-service-worker');
+    window.addEventListener('load', function () {
+        navigator.serviceWorker.register(workerUrl);
+        // The worker used to be registered from /static/, where it could not see the pages
+        navigator.serviceWorker.getRegistrations().then(function (registrations) {
+            registrations.forEach(function (registration) {
+                if (/\/static\/$/.test(registration.scope)) {
+                    registration.unregister();
+                }
+            });
+        });
+    });
+})();
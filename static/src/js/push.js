@@ -0,0 +1,38 @@
+// Subscribe to push notifications once the service worker (js/offline.js) is ready
+// (templates/components/push.html: only for signed-in users when push is configured).
+var vapidKey = document.querySelector('meta[name="vapid-public-key"]');
+if (vapidKey && 'serviceWorker' in navigator && 'PushManager' in window) {
+    window.addEventListener('load', function () {
+        navigator.serviceWorker.ready.then(function (reg) {
+            // Request notification permission
+            Notification.requestPermission().then(function (permission) {
+                if (permission !== 'granted') return;
+                reg.pushManager.getSubscription().then(function (sub) {
+                    return sub || reg.pushManager.subscribe({
+                        userVisibleOnly: true,
+                        applicationServerKey: urlBase64ToUint8Array(vapidKey.content)
+                    });
+                }).then(function (subscription) {
+                    // Sent every visit: the server upsert also clears any backoff
+                    var csrf = document.querySelector('meta[name="csrf-token"]');
+                    fetch('/save-subscription', {
+                        method: 'POST',
+                        headers: {
+                            'Content-Type': 'application/json',
+                            'X-CSRFToken': csrf ? csrf.content : ''
+                        },
+                        body: JSON.stringify(subscription)
+                    });
+                });
+            });
+        });
+    });
+}
+
+function urlBase64ToUint8Array(value) {
+    var padded = (value + '='.repeat((4 - value.length % 4) % 4)).replace(/-/g, '+').replace(/_/g, '/');
+    var raw = atob(padded);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+    return bytes;
+}
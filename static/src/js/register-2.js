@@ -0,0 +1,140 @@
+function togglePassword(id, iconId) {
+    const input = document.getElementById(id);
+    const icon = document.getElementById(iconId);
+    if (input.type === "password") {
+        input.type = "text";
+        icon.className = "fas fa-eye-slash";
+    } else {
+        input.type = "password";
+        icon.className = "fas fa-eye";
+    }
+}
+
+function validateRegisterNumber(input) {
+    input.value = input.value.replace(/[^0-9]/g, ''); // Removes non-numeric characters
+}
+
+// Password validation
+function validatePassword(password) {
+    // Check length
+    if (password.length < 8) {
+        return false;
+    }
+
+    // Check for uppercase
+    if (!/[A-Z]/.test(password)) {
+        return false;
+    }
+
+    // Check for lowercase
+    if (!/[a-z]/.test(password)) {
+        return false;
+    }
+
+    // Check for digits
+    if (!/[0-9]/.test(password)) {
+        return false;
+    }
+
+    // Check for special characters
+    if (!/[!@#$%^&*(),.?":{}|<>]/.test(password)) {
+        return false;
+    }
+
+    return true;
+}
+
+// Form validation before submission
+document.addEventListener('DOMContentLoaded', function () {
+    var form = document.querySelector('form');
+    var passwordInput = document.getElementById('password');
+    var confirmInput = document.getElementById('confirm_password');
+
+    // Real-time password validation
+    passwordInput.addEventListener('input', function () {
+        var isValid = validatePassword(this.value);
+        this.style.borderColor = isValid ? '#3f51b5' : '#ff5252';
+    });
+
+    // Check password match
+    confirmInput.addEventListener('input', function () {
+        var passwordsMatch = this.value === passwordInput.value;
+        this.style.borderColor = passwordsMatch ? '#3f51b5' : '#ff5252';
+    });
+
+    form.addEventListener('submit', function (event) {
+        var password = passwordInput.value;
+        var confirmPassword = confirmInput.value;
+        var name = document.getElementById('name').value.trim();
+        var email = document.getElementById('email').value.trim();
+        var role = document.getElementById('role').value;
+        var department = document.getElementById('department').value;
+        var dob = document.getElementById('dob').value;
+
+        // Basic field validation
+        if (!name) {
+            alert('Please enter your full name');
+            event.preventDefault();
+            return false;
+        }
+
+        if (!email) {
+            alert('Please enter your email address');
+            event.preventDefault();
+            return false;
+        }
+
+        if (!role) {
+            alert('Please select your role');
+            event.preventDefault();
+            return false;
+        }
+
+        if (!department) {
+            alert('Please select your department');
+            event.preventDefault();
+            return false;
+        }
+
+        if (!dob) {
+            alert('Please enter your date of birth');
+            event.preventDefault();
+            return false;
+        }
+
+        // Role-specific validation
+        var selectedRole = role.toLowerCase();
+        if (selectedRole === 'student') {
+            var registerNumber = document.getElementById('register_number').value.trim();
+            var studentType = document.getElementById('student_type').value;
+
+            if (!registerNumber) {
+                alert('Please enter your register number');
+                event.preventDefault();
+                return false;
+            }
+
+            if (!studentType) {
+                alert('Please select your student type (Day Scholar or Hosteller)');
+                event.preventDefault();
+                return false;
+            }
+        }
+
+        // Check password requirements
+        if (!validatePassword(password)) {
+            alert('Password must be at least 8 characters and contain at least one uppercase letter, one lowercase letter, one digit, and one special character.');
+            event.preventDefault();
+            return false;
+        }
+
+        // Check if passwords match
+        if (password !== confirmPassword) {
+            alert('Passwords do not match!');
+            event.preventDefault();
+            return false;
+        }
+
+        return true;
+    });
+});
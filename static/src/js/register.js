@@ -0,0 +1,105 @@
+// Show mentor dropdown only for Student role, hide year/class for HOD
+document.addEventListener('DOMContentLoaded', function () {
+    var roleSelect = document.getElementById('role');
+    var yearGroup = document.getElementById('year-group');
+    var mentorGroup = document.getElementById('mentor-group');
+    var studentTypeGroup = document.getElementById('student-type-group');
+    var registerNumberField = document.getElementById('register_number');
+    var autoGeneratedNote = document.getElementById('auto_generated_note');
+    var studentTypeSelect = document.getElementById('student_type');
+    var departmentSelect = document.getElementById('department');
+    var mentorSelect = document.getElementById('mentor');
+
+    // Store all mentor options
+    var allMentorOptions = [];
+    if (mentorSelect) {
+        Array.from(mentorSelect.options).forEach(function (option) {
+            if (option.value) {
+                allMentorOptions.push({
+                    value: option.value,
+                    text: option.text,
+                    department: option.getAttribute('data-department')
+                });
+            }
+        });
+    }
+
+    function updateRoleVisibility() {
+        var selectedRole = roleSelect.value.toLowerCase();
+
+        if (selectedRole && selectedRole === 'hod') {
+            yearGroup.style.display = 'none';
+        } else {
+            yearGroup.style.display = '';
+        }
+
+        if (selectedRole && selectedRole === 'student') {
+            mentorGroup.style.display = '';
+            studentTypeGroup.style.display = '';
+            registerNumberField.style.display = '';
+            registerNumberField.required = true;
+            studentTypeSelect.required = true;
+            autoGeneratedNote.style.display = 'none';
+
+            // Filter mentors when department changes
+            filterMentorsByDepartment();
+        } else {
+            mentorGroup.style.display = 'none';
+            studentTypeGroup.style.display = 'none';
+            studentTypeSelect.required = false;
+
+            if (selectedRole === 'mentor' || selectedRole === 'advisor' || selectedRole === 'hod') {
+                registerNumberField.style.display = 'none';
+                registerNumberField.required = false;
+                autoGeneratedNote.style.display = 'block';
+                // Show the auto-generated format
+                if (selectedRole === 'mentor') {
+                    autoGeneratedNote.textContent = 'Register number will be auto-generated (e.g., MEN001, MEN002, ...)';
+                } else if (selectedRole === 'advisor') {
+                    autoGeneratedNote.textContent = 'Register number will be auto-generated (e.g., ADV001, ADV002, ...)';
+                } else if (selectedRole === 'hod') {
+                    autoGeneratedNote.textContent = 'Register number will be auto-generated (e.g., HOD001, HOD002, ...)';
+                }
+            } else {
+                registerNumberField.style.display = '';
+                registerNumberField.required = true;
+                studentTypeGroup.style.display = '';
+                studentTypeSelect.required = true;
+                autoGeneratedNote.style.display = 'none';
+            }
+        }
+    }
+
+    function filterMentorsByDepartment() {
+        if (!mentorSelect || roleSelect.value.toLowerCase() !== 'student') return;
+
+        var selectedDept = departmentSelect.value;
+
+        // Clear current options except the first one
+        mentorSelect.innerHTML = '<option value="">Select Mentor</option>';
+
+        // Add filtered options
+        allMentorOptions.forEach(function (mentor) {
+            if (!selectedDept || mentor.department === selectedDept) {
+                var option = document.createElement('option');
+                option.value = mentor.value;
+                option.textContent = mentor.text;
+                option.setAttribute('data-department', mentor.department);
+                mentorSelect.appendChild(option);
+            }
+        });
+
+        // Show info if no mentors available
+        if (selectedDept && mentorSelect.options.length === 1) {
+            var option = document.createElement('option');
+            option.value = '';
+            option.textContent = 'No mentors available for this department';
+            option.disabled = true;
+            mentorSelect.appendChild(option);
+        }
+    }
+
+    roleSelect.addEventListener('change', updateRoleVisibility);
+    departmentSelect.addEventListener('change', filterMentorsByDepartment);
+    updateRoleVisibility();
+});
@@ -0,0 +1,70 @@
+function copyRegisterNumber() {
+    const registerNumber = document.getElementById('registerNumber').textContent;
+
+    // Try to use the modern clipboard API
+    if (navigator.clipboard && window.isSecureContext) {
+        navigator.clipboard.writeText(registerNumber).then(() => {
+            showCopySuccess();
+        }).catch(() => {
+            fallbackCopy(registerNumber);
+        });
+    } else {
+        fallbackCopy(registerNumber);
+    }
+}
+
+function fallbackCopy(text) {
+    // Fallback for older browsers
+    const textArea = document.createElement('textarea');
+    textArea.value = text;
+    textArea.style.position = 'fixed';
+    textArea.style.left = '-999999px';
+    textArea.style.top = '-999999px';
+    document.body.appendChild(textArea);
+    textArea.focus();
+    textArea.select();
+
+    try {
+        document.execCommand('copy');
+        showCopySuccess();
+    } catch (err) {
+        console.error('Failed to copy: ', err);
+        alert('Could not copy register number. Please manually copy: ' + text);
+    }
+
+    document.body.removeChild(textArea);
+}
+
+function showCopySuccess() {
+    const button = document.querySelector('.copy-button');
+    const originalText = button.textContent;
+    button.textContent = 'Copied!';
+    button.style.background = 'rgba(76, 175, 80, 0.3)';
+    button.style.borderColor = 'rgba(76, 175, 80, 0.8)';
+
+    setTimeout(() => {
+        button.textContent = originalText;
+        button.style.background = 'rgba(255, 255, 255, 0.2)';
+        button.style.borderColor = 'rgba(255, 255, 255, 0.5)';
+    }, 2000);
+}
+
+// Auto-focus and highlight register number for easy copying
+document.addEventListener('DOMContentLoaded', function () {
+    const registerNumberElement = document.getElementById('registerNumber');
+
+    // Add click to select functionality
+    registerNumberElement.addEventListener('click', function () {
+        const range = document.createRange();
+        range.selectNodeContents(registerNumberElement);
+        const selection = window.getSelection();
+        selection.removeAllRanges();
+        selection.addRange(range);
+    });
+
+    // Celebration animation
+    setTimeout(() => {
+        const icon = document.querySelector('.success-icon');
+        icon.style.animation = 'bounce 0.6s ease-in-out';
+    }, 500);
+});
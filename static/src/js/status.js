@@ -0,0 +1,163 @@
+// Show More functionality
+let currentlyShown = 1;
+const showMoreBtn = document.getElementById('showMoreBtn');
+const currentCountSpan = document.getElementById('currentCount');
+const showMoreContainer = document.getElementById('showMoreContainer');
+
+if (showMoreBtn) {
+    showMoreBtn.addEventListener('click', function () {
+        const allCards = document.querySelectorAll('.request-card-item');
+        const cardsToShow = Math.min(currentlyShown + 5, allCards.length);
+
+        for (let i = currentlyShown; i < cardsToShow; i++) {
+            allCards[i].style.display = 'block';
+        }
+
+        currentlyShown = cardsToShow;
+        currentCountSpan.textContent = currentlyShown;
+
+        if (currentlyShown >= allCards.length) {
+            showMoreContainer.style.display = 'none';
+        }
+    });
+}
+
+var requestsData = [];
+try {
+    var dataElement = document.getElementById('requests-data');
+    if (dataElement && dataElement.textContent) {
+        requestsData = JSON.parse(dataElement.textContent);
+    }
+} catch (e) {
+    console.error('Error parsing requests data:', e);
+}
+
+function showRequestDetails(index) {
+    var req = requestsData[parseInt(index)];
+    if (!req) return;
+    if (req[6] === 'Approved') {
+        window.open('/approved/' + req[0], '_blank');
+        return;
+    }
+    document.getElementById('status-modal-title').innerHTML = '<i class="fas fa-file-alt"></i> Request #' + req[0] + ' Details';
+    const body = document.getElementById('status-modal-body');
+    body.innerHTML = '' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-hashtag"></i> Request ID</div>' +
+        '<div class="status-full-value">#' + req[0] + '</div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-user"></i> Student Name</div>' +
+        '<div class="status-full-value">' + (req[8] || 'N/A') + '</div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-building"></i> Department</div>' +
+        '<div class="status-full-value">' + (req[9] || 'N/A') + '</div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-tag"></i> Leave Type</div>' +
+        '<div class="status-full-value">' + req[2] + '</div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-align-left"></i> Reason</div>' +
+        '<div class="status-full-value"><div class="status-reason">' + req[3] + '</div></div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-calendar-alt"></i> From Date</div>' +
+        '<div class="status-full-value">' + req[4] + '</div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-calendar-alt"></i> To Date</div>' +
+        '<div class="status-full-value">' + req[5] + '</div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-info-circle"></i> Status</div>' +
+        '<div class="status-full-value"><span class="status-badge status-' + req[6].toLowerCase() + '">' + req[6] + '</span></div>' +
+        '</div>' +
+        '<div class="status-full-item">' +
+        '<div class="status-full-label"><i class="fas fa-clock"></i> Last Updated</div>' +
+        '<div class="status-full-value">' + (req[10] || 'Not updated yet') + '</div>' +
+        '</div>';
+    document.getElementById('status-modal').style.display = 'block';
+}
+
+function closeModal() {
+    document.getElementById('status-modal').style.display = 'none';
+}
+
+// Close modal when clicking outside
+window.onclick = function (event) {
+    var modal = document.getElementById('status-modal');
+    if (event.target == modal) {
+        closeModal();
+    }
+}
+
+// Close modal with Escape key
+document.addEventListener('keydown', function (event) {
+    if (event.key === 'Escape') {
+        closeModal();
+    }
+});
+
+// Download PDF: queue the report for the background worker and poll
+// until it is ready; the plain link (a direct download) is the fallback
+var downloadLink = document.getElementById('downloadReport');
+if (downloadLink && window.fetch && window.FormData) {
+    downloadLink.addEventListener('click', function (event) {
+        event.preventDefault();
+        var link = this;
+        var label = link.innerHTML;
+        // Give up on the queue if no worker picks the job up quickly
+        var pickupDeadline = Date.now() + 10000;
+        var deadline = Date.now() + 120000;
+        link.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Preparing...';
+
+        function fallback() {
+            link.innerHTML = label;
+            window.location = link.href;
+        }
+
+        function poll(statusUrl) {
+            fetch(statusUrl, { credentials: 'same-origin' })
+                .then(function (response) { return response.ok ? response.json() : Promise.reject(); })
+                .then(function (job) {
+                    if (job.status === 'done') {
+                        link.innerHTML = label;
+                        window.location = job.download_url;
+                    } else if (job.status === 'failed' || Date.now() > deadline ||
+                        (job.status === 'queued' && Date.now() > pickupDeadline)) {
+                        fallback();
+                    } else {
+                        setTimeout(function () { poll(statusUrl); }, 1500);
+                    }
+                })
+                .catch(fallback);
+        }
+
+        var body = new FormData();
+        body.append('kind', 'status_report');
+        new URL(link.href, window.location.href).searchParams.forEach(function (value, key) {
+            body.append(key, value);
+        });
+        fetch(link.dataset.enqueueUrl, {
+            method: 'POST',
+            body: body,
+            credentials: 'same-origin',
+            headers: { 'X-CSRFToken': link.dataset.csrfToken }
+        })
+            .then(function (response) { return response.ok ? response.json() : Promise.reject(); })
+            .then(function (job) { poll(job.status_url); })
+            .catch(fallback);
+    });
+}
+
+// Card keyboard navigation
+document.querySelectorAll('.status-card').forEach(card => {
+    card.addEventListener('keydown', function (event) {
+        if (event.key === 'Enter' || event.key === ' ') {
+            event.preventDefault();
+            showRequestDetails(this.dataset.index);
+        }
+    });
+});
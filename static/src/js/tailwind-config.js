@@ -0,0 +1,19 @@
+tailwind.config = {
+    theme: {
+        extend: {
+            fontFamily: {
+                sans: ['Outfit', 'sans-serif'],
+            },
+            colors: {
+                glass: {
+                    100: 'rgba(255, 255, 255, 0.1)',
+                    200: 'rgba(255, 255, 255, 0.2)',
+                    300: 'rgba(255, 255, 255, 0.3)',
+                }
+            },
+            backdropBlur: {
+                xs: '2px',
+            }
+        }
+    }
+}
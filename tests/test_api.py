@@ -0,0 +1,115 @@
+import datetime
+import json
+
+import pytest
+from flask import Flask, g
+from flask_login import LoginManager, UserMixin
+
+from app.api import bp
+from app.api.resources import REQUESTS, ApiError
+
+CREATED = datetime.datetime(2026, 3, 2, 9, 30)
+
+
+class User(UserMixin):
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, list(params)))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.cur = FakeCursor(rows)
+
+    def cursor(self):
+        return self.cur
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test')
+    app.register_blueprint(bp)
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: User(user_id))
+    app.db = FakeDB([])
+
+    @app.before_request
+    def use_fake_db():
+        g._database = app.db
+
+    client = app.test_client()
+    client.db = app.db
+    with client.session_transaction() as session:
+        session.update(_user_id='7', id=7, role='Mentor', department='CSE')
+    return client
+
+
+def test_fields_are_validated_and_deduplicated():
+    assert REQUESTS.parse_fields('') == REQUESTS.default
+    assert REQUESTS.parse_fields('status, id,status') == ['status', 'id']
+    with pytest.raises(ApiError) as error:
+        REQUESTS.parse_fields('id,password')
+    assert 'password' in error.value.message
+
+
+def test_projection_reads_only_the_fields_and_the_sort_key(client):
+    client.db.cur.rows = [(2, 'Pending', CREATED, 2), (1, 'Pending', CREATED, 1)]
+    response = client.get('/api/v1/queues/mentor?fields=id,status&limit=1')
+
+    sql, params = client.db.cur.executed[0]
+    assert sql.startswith('SELECT r.id, r.status, r.created_at FROM requests r WHERE')
+    assert params == ['cse', 2]
+    body = response.get_json()
+    assert body['data'] == [{'id': 2, 'status': 'Pending'}]
+    assert body['page']['next'] and body['page']['prev'] is None
+
+
+def test_rows_shape_is_compact(client):
+    client.db.cur.rows = [(3, datetime.date(2026, 3, 4), CREATED)]
+    response = client.get('/api/v1/queues/mentor?fields=id,from_date&shape=rows')
+
+    assert response.data == b'{"data":{"fields":["id","from_date"],"rows":[[3,"2026-03-04"]]},"page":{"next":null,"prev":null}}'
+
+
+def test_unchanged_page_is_not_modified(client):
+    client.db.cur.rows = [(3, 'Pending', CREATED)]
+    first = client.get('/api/v1/queues/mentor?fields=id,status')
+    again = client.get('/api/v1/queues/mentor?fields=id,status', headers={'If-None-Match': first.headers['ETag']})
+
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+    assert again.status_code == 304 and again.data == b''
+
+
+def test_errors_are_json(client):
+    assert client.get('/api/v1/queues/hod').status_code == 403
+    assert client.get('/api/v1/users').status_code == 403
+    response = client.get('/api/v1/queues/mentor?fields=nope')
+    assert response.status_code == 400
+    assert json.loads(response.data) == {'error': 'Unknown field(s): nope'}
+
+
+def test_signed_out_call_gets_a_json_401(client):
+    with client.session_transaction() as session:
+        session.clear()
+    response = client.get('/api/v1/requests')
+
+    assert response.status_code == 401
+    assert response.get_json() == {'error': 'Authentication required'}
@@ -0,0 +1,157 @@
+import datetime
+import email
+import smtplib
+
+import pytest
+
+from app import mail
+
+
+class FakeOutbox:
+    def __init__(self, messages):
+        self.queued = list(messages)
+        self.results = {mail.SENT: [], mail.RETRY: [], mail.FAILED: []}
+
+    def claim(self, limit):
+        batch, self.queued = self.queued[:limit], self.queued[limit:]
+        return batch
+
+    def complete(self, results):
+        for outcome, entries in results.items():
+            self.results[outcome].extend(entries)
+
+    def release_stale(self):
+        return 0
+
+    def compose_digests(self, day=None):
+        return 0
+
+
+@pytest.fixture
+def smtp():
+    server = mail.SMTPStandIn().start_in_thread()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_sender(server, messages, **config):
+    config = dict({
+        'server': '127.0.0.1', 'port': server.port, 'use_tls': False, 'username': '',
+        'sender': 'noreply@mefportal.edu', 'digest_hour': -1, 'timeout': 5,
+    }, **config)
+    outbox = FakeOutbox(messages)
+    return mail.Sender(outbox=outbox, config=config), outbox
+
+
+def message(message_id, recipient):
+    return mail.Message(message_id, recipient, f"Notice {message_id}", "Your request was approved.\n", 1)
+
+
+def test_batch_is_sent_over_a_few_reused_connections(smtp):
+    sender, outbox = make_sender(smtp, [message(i, f"student{i}@example.edu") for i in range(1, 31)], connections=3)
+    sender.run(once=True)
+
+    assert sorted(outbox.results[mail.SENT]) == list(range(1, 31))
+    assert smtp.connections == 3
+    _, recipients, data = smtp.messages[0]
+    parsed = email.message_from_bytes(data)
+    assert parsed['From'] == 'noreply@mefportal.edu'
+    assert parsed['To'] == recipients[0]
+    assert parsed['Subject'].startswith('Notice ')
+
+
+def test_refusals_are_failed_or_retried_by_reply_code(smtp):
+    sender, outbox = make_sender(smtp, [
+        message(1, 'bounce@example.edu'),
+        message(2, 'busy@example.edu'),
+        message(3, 'ok@example.edu'),
+    ], connections=1)
+    sender.run(once=True)
+
+    assert outbox.results[mail.SENT] == [3]
+    assert [(i, error[:3]) for i, error in outbox.results[mail.FAILED]] == [(1, '550')]
+    assert [(i, error[:3]) for i, error in outbox.results[mail.RETRY]] == [(2, '451')]
+    # A refused recipient does not cost the connection
+    assert smtp.connections == 1
+
+
+def test_unreachable_server_retries_the_whole_batch():
+    outbox = FakeOutbox([message(1, 'a@example.edu'), message(2, 'b@example.edu')])
+    sender = mail.Sender(outbox=outbox, config={
+        'server': '127.0.0.1', 'port': 9, 'use_tls': False, 'username': '', 'digest_hour': -1,
+        'timeout': 2, 'connections': 1,
+    })
+    sender.run(once=True)
+
+    assert outbox.results[mail.SENT] == []
+    assert [i for i, _ in outbox.results[mail.RETRY]] == [1, 2]
+
+
+
+def test_refused_login_retries_the_share_instead_of_failing_a_message(smtp, monkeypatch):
+    sender, outbox = make_sender(smtp, [message(1, 'a@example.edu'), message(2, 'b@example.edu')], connections=1)
+
+    def refuse():
+        raise smtplib.SMTPAuthenticationError(535, b'Authentication credentials invalid')
+    monkeypatch.setattr(sender, 'connect', refuse)
+    sender.run(once=True)
+
+    assert outbox.results[mail.FAILED] == []
+    assert [i for i, _ in outbox.results[mail.RETRY]] == [1, 2]
+
+
+def test_other_smtp_errors_fail_only_that_message(smtp, monkeypatch):
+    sender, outbox = make_sender(smtp, [message(1, 'a@example.edu'), message(2, 'b@example.edu')], connections=1)
+    build = mail.build_message
+
+    def unsupported(msg, sender_address):
+        if msg.id == 1:
+            raise smtplib.SMTPNotSupportedError("SMTPUTF8 not supported by server")
+        return build(msg, sender_address)
+    monkeypatch.setattr(mail, 'build_message', unsupported)
+    sender.run(once=True)
+
+    assert [i for i, _ in outbox.results[mail.FAILED]] == [1]
+    assert outbox.results[mail.SENT] == [2]
+
+def test_digest_summarises_every_update():
+    subject, body = mail.digest_body([
+        ("Asha's Leave request: Approved", datetime.datetime(2025, 3, 4, 9, 30)),
+        ("Ravi's OD request: Advisor Rejected", datetime.datetime(2025, 3, 4, 11, 5)),
+    ])
+    assert subject == 'Daily summary: 2 request updates'
+    assert "- Asha's Leave request: Approved (04 Mar 09:30)" in body
+    assert "- Ravi's OD request: Advisor Rejected (04 Mar 11:05)" in body
+
+
+class RecordingCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.inserted = []
+
+    def execute(self, sql, params=()):
+        assert sql.split()[0] == 'SELECT'
+
+    def fetchall(self):
+        return self.rows
+
+    def executemany(self, sql, rows):
+        assert 'INSERT INTO mail_outbox' in sql
+        self.inserted.extend(rows)
+
+
+@pytest.mark.parametrize('digest', [False, True])
+def test_enqueue_tells_the_student_and_holds_mentor_mail_for_the_digest(digest):
+    day = datetime.date(2025, 3, 4)
+    cur = RecordingCursor([(7, 'Leave', day, day, 'Asha', 'asha@example.edu', 'mentor@example.edu')])
+    config = dict(mail.MAIL_CONFIG, enabled=True, mentor_digest=digest)
+
+    assert mail.enqueue(cur, [7], 'Approved', config) == 2
+    (_, student, student_subject, _, student_digest), (_, mentor, _, _, mentor_digest) = cur.inserted
+    assert (student, student_subject, student_digest) == ('asha@example.edu', 'Your Leave request was approved by the HOD', 0)
+    assert (mentor, mentor_digest) == ('mentor@example.edu', int(digest))
+
+    # The mentor is not told about their own decision
+    cur.inserted = []
+    assert mail.enqueue(cur, [7], 'Mentor Approved', config) == 1
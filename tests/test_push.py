@@ -0,0 +1,135 @@
+import asyncio
+import os
+import runpy
+
+import pytest
+from flask import render_template, session
+
+from app import push
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_push(push_id, subscription_id):
+    return push.Push(push_id, subscription_id, None, None, None, f'request-{push_id}', '{}', 1)
+
+
+def dispatch(pushes, **config):
+    """Run one dispatcher pass against a local push service"""
+    async def run():
+        standin = await push.PushStandIn().start()
+        outbox = push.MemoryOutbox(
+            p._replace(endpoint=standin.url(token)) for p, token in pushes
+        )
+        dispatcher = push.Dispatcher(outbox=outbox, config=config, vapid=False)
+        try:
+            await dispatcher.serve(once=True)
+        finally:
+            await standin.stop()
+        return outbox, standin
+
+    return asyncio.run(run())
+
+
+def test_pushes_are_sent_over_reused_connections():
+    pushes = [(make_push(i, i), f'ok{i}') for i in range(1, 41)]
+    outbox, standin = dispatch(pushes, concurrency=4, connections_per_origin=4)
+
+    assert sorted(outbox.sent) == list(range(1, 41))
+    assert len(standin.received) == 40
+    assert standin.connections <= 4
+    path, headers, body = standin.received[0]
+    assert headers['ttl'] == str(push.PUSH_CONFIG['ttl'])
+    assert headers['topic'].startswith('request-')
+    assert body == b''
+
+
+def test_gone_endpoints_are_pruned():
+    pushes = [
+        (make_push(1, 10), 'gone'),
+        (make_push(2, 10), 'gone'),
+        (make_push(3, 11), 'missing'),
+        (make_push(4, 12), 'ok'),
+    ]
+    outbox, standin = dispatch(pushes)
+
+    assert outbox.gone == {10, 11}
+    assert outbox.sent == [4]
+    # Nothing more is sent to an endpoint once it is known to be gone
+    assert len(standin.received) == 3
+
+
+def test_busy_endpoint_backs_off_with_its_queue():
+    pushes = [
+        (make_push(1, 20), 'busy'),
+        (make_push(2, 20), 'busy'),
+        (make_push(3, 21), 'ok'),
+    ]
+    outbox, standin = dispatch(pushes)
+
+    assert outbox.retried == {20: [1, 2]}
+    assert outbox.sent == [3]
+    assert len(standin.received) == 2
+
+
+def test_unreachable_endpoint_is_retried():
+    async def run():
+        outbox = push.MemoryOutbox([
+            push.Push(1, 30, 'http://127.0.0.1:9/push/x', None, None, None, '{}', 1)
+        ])
+        await push.Dispatcher(outbox=outbox, config={'timeout': 2}, vapid=False).serve(once=True)
+        return outbox
+
+    assert asyncio.run(run()).retried == {30: [1]}
+
+
+def test_signed_push_carries_an_encrypted_payload():
+    ec = pytest.importorskip('cryptography.hazmat.primitives.asymmetric.ec')
+    from cryptography.hazmat.primitives import serialization
+
+    receiver = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    vapid = push.Vapid(push.Vapid.generate()[0], 'mailto:admin@localhost')
+
+    async def run():
+        standin = await push.PushStandIn().start()
+        outbox = push.MemoryOutbox([push.Push(
+            1, 40, standin.url('ok'), push._b64encode(receiver), push._b64encode(b'0' * 16),
+            'request-1', '{"title": "Request Approved"}', 1,
+        )])
+        try:
+            await push.Dispatcher(outbox=outbox, vapid=vapid).serve(once=True)
+        finally:
+            await standin.stop()
+        return outbox, standin
+
+    outbox, standin = asyncio.run(run())
+    assert outbox.sent == [1]
+    _, headers, body = standin.received[0]
+    assert headers['content-encoding'] == 'aes128gcm'
+    assert headers['authorization'].startswith('vapid t=')
+    assert b'Request Approved' not in body
+
+
+class SignedIn:
+    is_authenticated = True
+
+
+@pytest.mark.parametrize('template, context', [
+    ('dashboard_professional.html', {'requests': [], 'recent_updates': [], 'selected_date': None,
+                                     'stats': {'total_requests': 0, 'pending_requests': 0,
+                                               'approved_requests': 0, 'rejected_requests': 0}}),
+    ('status.html', {'requests': [], 'pagination': {}, 'date_filter': '', 'status_filter': '', 'search_query': ''}),
+    ('unified_request_form.html', {}),
+])
+def test_student_pages_subscribe_to_push(template, context):
+    # Decisions are pushed to the student, so their own pages must subscribe
+    flask_app = runpy.run_path(os.path.join(ROOT, 'app.py'), run_name='test')['app']
+    flask_app.jinja_env.globals['vapid_public_key'] = 'test-public-key'
+    with flask_app.test_request_context('/'):
+        session.update(id=7, username='student', name='Asha', role='Student', department='CSE')
+        html = render_template(template, current_user=SignedIn(), **context)
+
+    assert '<meta name="vapid-public-key" content="test-public-key">' in html
+    assert '/js/push.' in html
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+from app import changes, sse
+
+SECRET = 'test-secret'
+
+
+def row(change_id, age=None):
+    return changes.Change(change_id, change_id, 'cse', None, 'Pending', '', 'Leave', None, None, age)
+
+
+def test_role_sees_changes_entering_or_leaving_its_queue():
+    feed = changes.MemoryFeed()
+    submitted = feed.append(1, 'cse', None, 'Pending')
+    mentored = feed.append(1, 'cse', 'Pending', 'Mentor Approved')
+
+    assert sse.relevant('Mentor', submitted) and sse.relevant('Mentor', mentored)
+    assert not sse.relevant('Advisor', submitted) and sse.relevant('Advisor', mentored)
+    assert not sse.relevant('HOD', mentored)
+    assert not sse.relevant('Student', submitted)
+
+
+def test_head_waits_at_a_gap_until_it_fills_or_times_out():
+    hub = sse.Hub(SECRET, feed=changes.MemoryFeed(), config={'gap_timeout': 10})
+
+    assert hub.advance([row(1), row(3)], now=0) == 2
+    assert hub.head == 1
+    # 2 commits late: published once, head moves past both
+    assert hub.advance([row(2), row(3)], now=1) == 1
+    assert hub.head == 3
+
+    hub.advance([row(5)], now=2)
+    assert hub.head == 3
+    # 4 was rolled back
+    hub.advance([row(5)], now=12)
+    assert hub.head == 5 and not hub.pending
+
+
+def test_polling_reader_stops_below_a_recent_gap():
+    # 2 may still commit: resume after 1 and see 3 again next time
+    assert changes.committed_prefix([row(1, 1), row(3, 1)], 0, gap_timeout=10) == ([row(1, 1)], 1)
+    # 3 was written 30s ago, so the insert that took 2 was rolled back
+    assert changes.committed_prefix([row(1, 30), row(3, 30)], 0, gap_timeout=10) == ([row(1, 30), row(3, 30)], 3)
+    # Nothing committed past the gap yet
+    assert changes.committed_prefix([row(6, 1)], 4, gap_timeout=10) == ([], 4)
+
+
+async def read_event(reader):
+    fields = {}
+    while True:
+        line = (await asyncio.wait_for(reader.readline(), 5)).decode().rstrip('\n')
+        if not line:
+            if 'event' in fields:
+                return fields
+            continue
+        if line.startswith(':'):
+            continue
+        name, _, value = line.partition(': ')
+        fields[name] = value
+
+
+async def subscribe(hub, role, department_key, last_event_id=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', hub.port)
+    token = sse.stream_token(SECRET, 1, role, department_key)
+    extra = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id is not None else ''
+    writer.write(f"GET /events/queue?token={token} HTTP/1.1\r\nHost: x\r\n{extra}\r\n".encode())
+    status = await reader.readline()
+    while (await reader.readline()) != b'\r\n':
+        pass
+    return status, reader, writer
+
+
+def run_hub(scenario, feed):
+    async def main():
+        hub = await sse.Hub(SECRET, feed=feed, config={'poll_interval': 0.01}).start(port=0)
+        try:
+            return await scenario(hub)
+        finally:
+            await hub.stop()
+
+    return asyncio.run(main())
+
+
+def test_hub_streams_matching_changes_to_subscribers():
+    feed = changes.MemoryFeed()
+    feed.append(1, 'cse', None, 'Pending')
+
+    async def scenario(hub):
+        status, reader, writer = await subscribe(hub, 'Mentor', 'cse')
+        assert status.startswith(b'HTTP/1.1 200')
+        ready = await read_event(reader)
+        assert (ready['event'], ready['id']) == ('ready', '1')
+
+        feed.append(2, 'ece', None, 'Pending')
+        feed.append(3, 'cse', 'Mentor Approved', 'Advisor Approved')
+        feed.append(4, 'cse', None, 'Pending', student_name='Asha')
+        event = await read_event(reader)
+        writer.close()
+        return event
+
+    event = run_hub(scenario, feed)
+    # Another department's change and one outside the mentor's queue were skipped
+    assert (event['event'], event['id']) == ('queue', '4')
+    assert json.loads(event['data'])['student_name'] == 'Asha'
+
+
+def test_reconnect_replays_missed_changes():
+    feed = changes.MemoryFeed()
+    feed.append(1, 'cse', None, 'Pending')
+    feed.append(1, 'cse', 'Pending', 'Mentor Approved')
+    feed.append(2, 'cse', None, 'Pending')
+
+    async def scenario(hub):
+        _, reader, writer = await subscribe(hub, 'Mentor', 'cse', last_event_id=1)
+        events = [await read_event(reader), await read_event(reader), await read_event(reader)]
+        writer.close()
+        return [(event['event'], event['id']) for event in events]
+
+    assert run_hub(scenario, feed) == [('queue', '2'), ('queue', '3'), ('ready', '3')]
+
+
+def test_bad_token_is_refused():
+    async def scenario(hub):
+        reader, writer = await asyncio.open_connection('127.0.0.1', hub.port)
+        writer.write(b"GET /events/queue?token=forged HTTP/1.1\r\nHost: x\r\n\r\n")
+        status = await reader.readline()
+        writer.close()
+        return status
+
+    assert run_hub(scenario, changes.MemoryFeed()).startswith(b'HTTP/1.1 403')
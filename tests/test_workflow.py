@@ -0,0 +1,153 @@
+import re
+import threading
+
+import pytest
+
+from app import workflow
+
+
+class FakeDatabase:
+    """Just enough of MySQL for the workflow's statements.
+
+    Each statement runs atomically under one lock, which is the guarantee
+    InnoDB gives a single-row UPDATE.
+    """
+
+    def __init__(self, rows):
+        self.lock = threading.Lock()
+        self.rows = rows
+        self.stats = {}
+        self.pushes = []
+        self.changes = []
+        for row in rows.values():
+            counters = self.stats.setdefault(row['user_id'], {})
+            column = workflow.stats.STATUS_COLUMNS[row['status']]
+            counters[column] = counters.get(column, 0) + 1
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return FakeCursor(self.database)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rowcount = -1
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        params = list(params)
+        with self.database.lock:
+            if sql.startswith("UPDATE requests SET"):
+                assert "WHERE id=%s AND status=%s AND department_key=%s" in sql
+                new_status = params[0]
+                request_id, from_status, department_key = params[-3:]
+                row = self.database.rows.get(request_id)
+                if row and row['status'] == from_status and row['department_key'] == department_key:
+                    row['status'] = new_status
+                    self.rowcount = 1
+                else:
+                    self.rowcount = 0
+            elif sql.startswith("UPDATE request_stats s"):
+                old_column, new_column = re.search(
+                    r"SET s\.(\w+) = s\.\1 - d\.n, s\.(\w+) = s\.\2 \+ d\.n", sql
+                ).groups()
+                for request_id in params:
+                    counters = self.database.stats[self.database.rows[request_id]['user_id']]
+                    counters[old_column] = counters.get(old_column, 0) - 1
+                    counters[new_column] = counters.get(new_column, 0) + 1
+            elif sql.startswith("INSERT INTO request_changes"):
+                old_status, request_ids = params[0], params[1:]
+                for request_id in request_ids:
+                    self.database.changes.append((request_id, old_status, self.database.rows[request_id]['status']))
+            elif sql.startswith("INSERT INTO push_outbox"):
+                self.database.pushes.extend(params[3:])
+                self.rowcount = len(params) - 3
+            else:
+                raise AssertionError(f"unexpected statement: {sql}")
+
+    def close(self):
+        pass
+
+
+def make_database(status='Pending'):
+    return FakeDatabase({7: {'user_id': 1, 'status': status, 'department_key': 'cse'}})
+
+
+def test_concurrent_decisions_on_one_request_have_one_winner():
+    database = make_database()
+    threads_per_action = 16
+    barrier = threading.Barrier(threads_per_action * 2)
+    winners = []
+    errors = []
+
+    def decide(action):
+        db = database.connect()
+        try:
+            barrier.wait()
+            moved, new_status = workflow.apply_many(db, 'Mentor', action, [7], 'cse')
+            if moved:
+                winners.append(new_status)
+        except Exception as e:  # pragma: no cover - surfaced by the assert below
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=decide, args=(action,))
+        for action in ['Approve', 'Reject'] * threads_per_action
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(winners) == 1
+    assert database.rows[7]['status'] == winners[0]
+
+    counters = database.stats[1]
+    assert counters['pending'] == 0
+    assert counters.get('mentor_approved', 0) + counters.get('mentor_rejected', 0) == 1
+    # Only the winning transition notifies the student and reaches the change feed
+    assert database.pushes == [7]
+    assert database.changes == [(7, 'Pending', winners[0])]
+
+
+def test_stage_must_match_role():
+    database = make_database()
+    db = database.connect()
+
+    # The HOD cannot skip the mentor and advisor
+    assert workflow.apply_many(db, 'HOD', 'Approve', [7], 'cse') == ([], 'Approved')
+    assert database.rows[7]['status'] == 'Pending'
+
+    assert workflow.apply_many(db, 'Mentor', 'Approve', [7], 'cse')[0] == [7]
+    assert workflow.apply_many(db, 'Advisor', 'Approve', [7], 'cse', advisor_note='ok')[0] == [7]
+    assert workflow.apply_many(db, 'HOD', 'Approve', [7], 'cse')[0] == [7]
+    assert database.rows[7]['status'] == 'Approved'
+
+
+def test_other_department_is_not_touched():
+    database = make_database()
+    moved, _ = workflow.apply_many(database.connect(), 'Mentor', 'Approve', [7], 'ece')
+    assert moved == []
+    assert database.rows[7]['status'] == 'Pending'
+
+
+def test_unknown_action_is_rejected():
+    with pytest.raises(workflow.IllegalTransition):
+        workflow.transition_for('Mentor', 'Escalate')
+    with pytest.raises(workflow.IllegalTransition):
+        workflow.transition_for('Student', 'Approve')